@@ -0,0 +1,89 @@
+"""
+.. module:: import_benchmark.py
+   :synopsis: Measures the time spent importing the modules of the pipeline
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Each module is imported in a fresh interpreter, otherwise the modules
+# imported by the previous ones would be free
+MODULES = ['imsdb.pipeline',
+           'imsdb.batch',
+           'imsdb.dataextraction',
+           'imsdb.gen_database',
+           'imsdb.gen_dataframe',
+           'imsdb.interactions',
+           'imsdb.social_net',
+           'imsdb.export']
+
+IMPORT_SNIPPET = ('import time; start = time.time(); import %s; '
+                  'print(time.time() - start)')
+
+
+def time_import(module):
+    """
+    Returns the seconds spent importing a module in a fresh interpreter
+    None if the import fails
+    """
+
+    process = subprocess.Popen([sys.executable, '-c', IMPORT_SNIPPET % module],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    output, _ = process.communicate()
+
+    if process.returncode != 0:
+        return None
+
+    return float(output.strip())
+
+
+def time_command(command):
+    """
+    Returns the wall clock seconds of a command, including the interpreter
+    start up
+    """
+
+    start = time.time()
+
+    with open(os.devnull, 'w') as devnull:
+        subprocess.call(command, stdout=devnull, stderr=devnull)
+
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    # Process arguments from the command line
+    PARSER = argparse.ArgumentParser()
+
+    PARSER.add_argument('--repeat',
+                        help='Number of measures of each module, the best one is kept',
+                        type=int,
+                        default=5)
+
+    ARGS = PARSER.parse_args()
+
+    # The modules are imported from the directory of this script
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print '%-25s %10s' % ('module', 'import (ms)')
+
+    for MODULE in MODULES:
+        TIMES = [time_import(MODULE) for _ in range(ARGS.repeat)]
+
+        if None in TIMES:
+            print '%-25s %10s' % (MODULE, 'failed')
+        else:
+            print '%-25s %10.1f' % (MODULE, min(TIMES) * 1000)
+
+    # Whole invocation of the command line, up to the parsing of the options
+    TIMES = [time_command([sys.executable, 'movienucleobase.py', '--help'])
+             for _ in range(ARGS.repeat)]
+
+    print '%-25s %10.1f' % ('movienucleobase.py --help', min(TIMES) * 1000)
@@ -0,0 +1,213 @@
+"""
+.. module:: batch
+    :synopsis: Runs the pipeline over many movie scripts with a pool of worker processes
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import logging
+import logging.config
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+import traceback
+
+import imsdb.engines
+import imsdb.pipeline
+import imsdb.snapshot
+
+
+def list_movie_jobs(source, args):
+    """Builds the list of movies to be processed.
+
+    The source can be a directory, in which case every HTML file and every
+    snapshot inside it is processed with the options given in the command
+    line, or a manifest file with one movie script (or snapshot path) per
+    line:
+        filename[,sub_wikia[,config]]
+
+    The optional fields of the manifest override the options given in the
+    command line for that movie. Empty lines and lines starting with "#"
+    are ignored.
+
+    Args:
+        source (string): The directory or the manifest file
+        args (argparse.Namespace): The options of the command line
+
+    Returns:
+        list of argparse.Namespace: The options of each movie, with the
+        attribute "filename" set
+    """
+
+    jobs = []
+
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.lower().endswith(('.html', '.htm')):
+                jobs.append(_movie_job(args, filename, scripts_dir=source))
+            elif imsdb.snapshot.is_snapshot(filename):
+                jobs.append(_movie_job(args, os.path.join(source, filename)))
+    else:
+        with open(source, 'r') as manifest:
+            for line in manifest:
+                line = line.strip()
+
+                if not line or line.startswith('#'):
+                    continue
+
+                fields = [field.strip() for field in line.split(',')]
+                overrides = dict((name, value)
+                                 for name, value in zip(['sub_wikia', 'config'], fields[1:])
+                                 if value)
+
+                jobs.append(_movie_job(args, fields[0], **overrides))
+
+    return jobs
+
+
+def _movie_job(args, filename, **overrides):
+    """Returns a copy of the options with the movie specific ones set."""
+
+    job = argparse.Namespace(**vars(args))
+    job.filename = filename
+
+    for name, value in overrides.iteritems():
+        setattr(job, name, value)
+
+    return job
+
+
+def process_movie_job(job):
+    """Runs the pipeline for a single movie inside a worker process.
+
+    Any exception raised by the pipeline is caught, so that one movie
+    can't stop the remaining ones.
+
+    Args:
+        job (argparse.Namespace): The options of the movie
+
+    Returns:
+        dict: Summary of the movie with the keys filename, title, status
+        ('ok', 'skipped', 'empty' or 'error'), n_characters, n_scenes, seconds and error
+    """
+
+    logger = logging.getLogger(__name__)
+
+    result = {'filename': job.filename,
+              'title': None,
+              'status': 'ok',
+              'n_characters': 0,
+              'n_scenes': 0,
+              'seconds': 0.0,
+              'error': None}
+
+    start = time.time()
+
+    try:
+        fingerprint = imsdb.pipeline.movie_fingerprint(job.filename, job)
+
+        if imsdb.pipeline.movie_already_inserted(fingerprint, job):
+            result['status'] = 'skipped'
+        else:
+            movie = imsdb.pipeline.process_movie(job.filename, job, fingerprint)
+
+            if movie is None:
+                result['status'] = 'empty'
+            else:
+                result['title'] = movie.title
+                result['n_characters'] = len(movie.characters)
+                result['n_scenes'] = len(movie.scenes)
+    except Exception:
+        logger.exception('Error processing the movie script: ' + job.filename)
+        result['status'] = 'error'
+        result['error'] = traceback.format_exc()
+
+    result['seconds'] = time.time() - start
+
+    return result
+
+
+def _init_worker(log_config):
+    """Sets up the logging system of a worker, each one logs to its own file.
+
+    The database engine of the worker is disposed when the worker exits.
+    """
+
+    if log_config:
+        logfile = 'movienucleobase.%d.log' % os.getpid()
+        logging.config.fileConfig(log_config, defaults={'logfilename': logfile})
+
+    multiprocessing.util.Finalize(None, imsdb.engines.dispose, exitpriority=10)
+
+
+def run_batch(jobs, workers=None, log_config=None):
+    """Processes all movies with a pool of worker processes.
+
+    The worker processes are reused from one movie to the next one, so the
+    imports and the setup are only paid once per worker.
+
+    Args:
+        jobs (list of argparse.Namespace): The options of each movie
+        workers (int): Number of worker processes, defaults to the number
+        of CPUs
+        log_config (string): The logging configuration file of the workers
+
+    Returns:
+        list of dict: The summary of each movie, in the same order as the jobs
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if not workers:
+        workers = multiprocessing.cpu_count()
+
+    workers = min(workers, max(len(jobs), 1))
+
+    logger.info('Processing %d movies with %d workers' % (len(jobs), workers))
+
+    pool = multiprocessing.Pool(workers, _init_worker, (log_config,))
+
+    results = []
+
+    try:
+        for result in pool.imap(process_movie_job, jobs):
+            print '[%s] %s (%.1fs)' % (result['status'], result['filename'], result['seconds'])
+            results.append(result)
+
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return results
+
+
+def print_summary(results, elapsed):
+    """Prints the aggregated summary of a batch run.
+
+    Args:
+        results (list of dict): The summary of each movie
+        elapsed (float): Wall clock time of the whole batch in seconds
+    """
+
+    statuses = [result['status'] for result in results]
+
+    print 'Movies processed: %d' % len(results)
+    print '    - ok: %d' % statuses.count('ok')
+    print '    - skipped: %d' % statuses.count('skipped')
+    print '    - empty: %d' % statuses.count('empty')
+    print '    - error: %d' % statuses.count('error')
+    print 'Characters: %d' % sum(result['n_characters'] for result in results)
+    print 'Scenes: %d' % sum(result['n_scenes'] for result in results)
+    print 'Wall clock: %.1fs ; Sum of movie times: %.1fs' % \
+        (elapsed, sum(result['seconds'] for result in results))
+
+    for result in results:
+        if result['status'] == 'error':
+            print 'Error in ' + result['filename'] + ':'
+            print result['error']
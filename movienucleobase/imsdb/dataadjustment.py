@@ -8,13 +8,10 @@
 
 import logging
 import __builtin__
-import json
-import urllib
-import wikia
 import unidecode
 
 
-def retrieve_character_real_name(sub_wikia, movie_character_name):
+def retrieve_character_real_name(sub_wikia, movie_character_name, cache=None, wikia_client=None):
     """Retrieve the complete name of the movie character.
     
     The character's names in the movie script are often incomplete or
@@ -43,20 +40,63 @@ def retrieve_character_real_name(sub_wikia, movie_character_name):
     with the same name are irrelevant and it will automatically strip the
     substring "(disambiguation)".
 
+    If a cache is given, the wikia is only queried for the characters that
+    are not in the cache, and the result is stored in the cache afterwards.
+    The rejected characters are stored as negative results.
+
     Args:
         sub_wikia (String): The sub-wikia to be queried
         movie_character_name (String): The character's 
+        cache (RealNameCache): Cache of the real names already resolved
+        wikia_client (module): Client of the wikia API, it must provide the
+        function search(sub_wikia, query), defaults to the wikia module
+
+    Returns:
+        String: The character's real name
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if cache is not None:
+        found, real_name = cache.get(sub_wikia, movie_character_name)
+
+        if found:
+            logger.debug('Resolved ' + movie_character_name + ' from the cache')
+            return real_name
+
+    real_name, negative = _search_character_real_name(sub_wikia,
+                                                      movie_character_name,
+                                                      wikia_client)
+
+    if cache is not None:
+        cache.set(sub_wikia, movie_character_name, real_name, negative)
+
+    return real_name
+
+
+def _search_character_real_name(sub_wikia, movie_character_name, wikia_client):
+    """Query the wikia for the real name of the movie character.
+
+    See retrieve_character_real_name() for the rules applied to the search
+    result.
 
     Returns:
         String: The character's real name
+        Bool: True if the character was rejected, False otherwise
     """
 
     logger = logging.getLogger(__name__)
 
     black_list = ['List of']
 
+    # The wikia module pulls in a whole HTTP and HTML stack, so it is only
+    # imported when a search is actually sent
+    if wikia_client is None:
+        import wikia
+        wikia_client = wikia
+
     try:
-        real_name = wikia.search(sub_wikia, movie_character_name)[0]  # here
+        real_name = wikia_client.search(sub_wikia, movie_character_name)[0]  # here
 
         logger.info('Resolved ' + movie_character_name + ' to ' + real_name)
 
@@ -65,20 +105,22 @@ def retrieve_character_real_name(sub_wikia, movie_character_name):
                         ' Name: ' + movie_character_name +
                         ' ; Real name: ' + real_name)
             real_name = None
+            negative = True
         else:
             # Removing any "(disambiguation)" sub-strings
             real_name = real_name.split('(')[0].strip(' ')
+            negative = False
 
         # Remove any special accents from the string
         real_name = unidecode.unidecode(unicode(real_name))
 
-        return real_name
+        return real_name, negative
 
     except ValueError:
-        return 'problematic character'
+        return 'problematic character', True
 
 
-def retrieve_character_gender(real_name, api_key_path='api_key'):
+def retrieve_character_gender(real_name, freebase_client):
     """Retrieve the character's gender from the Freebase database.
 
     This function will query the Freebase's database for the character's name
@@ -94,55 +136,44 @@ def retrieve_character_gender(real_name, api_key_path='api_key'):
     "retrieve_character_real_name()".
 
     It is necessary to request a Google API enabled for Freebase and store it
-    in a text file. The path to the text file shall be passed as an argument
-    of the function, otherwise the script will look for a file name "api_key"
-    in the current path of the shell.
+    in a text file, which is read once when creating the Freebase client
+    (see imsdb.gender.GenderResolver).
 
     Args:
         real_name (String): The character's name to be queried on Freebase
-        api_key_path (String): The path to the text file containing the 
-        Google API's key
+        freebase_client (FreebaseClient): The client used to access Freebase
 
     Returns:
         String: The character's gender
     """
 
     logger = logging.getLogger(__name__)
-    logger.debug('Attempting to get the gender from character: ' + real_name)
+    logger.debug('Attempting to get the gender from character: ' + str(real_name))
 
     nogender = "nogender"
 
     if real_name is None:
         return nogender
 
-    freebase_search_url = 'https://www.googleapis.com/freebase/v1/search'
-    freebase_topic_url = 'https://www.googleapis.com/freebase/v1/topic'
     freebase_json_gender = '/fictional_universe/fictional_character/gender'
-    freebase_api_key = open(api_key_path).read()
 
     # First step: check if the character exists in freebase's database
-    character_id = get_freebase_character_id(real_name,
-                                             freebase_api_key,
-                                             freebase_search_url)
+    character_id = get_freebase_character_id(real_name, freebase_client)
 
     if not character_id:
         return nogender
 
     # Second step: look up for the character's gender
-    freebase_topic_url = freebase_topic_url + character_id
-    freebase_search_params = {
-        'key': freebase_api_key,
-        'filter': freebase_json_gender
-        }
-    url = freebase_topic_url + '?' + urllib.urlencode(freebase_search_params)
-    logger.debug('Looking up ' + real_name + '\'s gender: ' + url)
+    logger.debug('Looking up ' + real_name + '\'s gender: ' + character_id)
 
-    response = json.loads(urllib.urlopen(freebase_topic_url).read())
+    response = freebase_client.topic(character_id, freebase_json_gender)
 
     if 'property' not in response:
-        print 'Error retrieving data from freebase: ' + url
+        print 'Error retrieving data from freebase: ' + character_id
         print response
 
+        return nogender
+
     if freebase_json_gender in response['property'].keys():
         gender = response['property'][freebase_json_gender]['values'][0]['text']
         
@@ -151,7 +182,7 @@ def retrieve_character_gender(real_name, api_key_path='api_key'):
         return nogender
 
 
-def get_freebase_character_id(real_name, freebase_api_key, freebase_search_url):
+def get_freebase_character_id(real_name, freebase_client):
     """Retrieve the character's ID associated to the Freebase database.
     
     This function retrives the character ID to be used by the 
@@ -162,27 +193,17 @@ def get_freebase_character_id(real_name, freebase_api_key, freebase_search_url):
 
     Args:
         real_name (String): The character's name to be queried on Freebase
-        freebase_api_key (String): The Google API's key used to access Freebase
-        freebase_search_url (String): The URL to be used to perform searches
+        freebase_client (FreebaseClient): The client used to access Freebase
 
     Returns:
         String: The character's ID on Freebase
     """
     logger = logging.getLogger(__name__)
+    logger.debug('Looking up the character ' + real_name)
 
-    freebase_search_params = {
-        'query': real_name,
-        'key': freebase_api_key
-    }
-
-    url = freebase_search_url + '?' + urllib.urlencode(freebase_search_params)
-    logger.debug('Looking up the character ' + real_name + ': ' + url)
-
-    response = json.loads(urllib.urlopen(url).read())
+    response = freebase_client.search(real_name)
 
     if len(response['result']) <= 0 or 'id' not in response['result'][0].keys():
         return
     else:
         return response['result'][0]['id']
-
-
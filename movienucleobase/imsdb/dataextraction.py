@@ -6,19 +6,24 @@
 .. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
 """
 
-import re
+import array
+import collections
 import logging
 import imsdb.datastructures
+import imsdb.freebase
+import imsdb.gender
+import imsdb.nameindex
+import imsdb.realnames
+import imsdb.tokenizer
 import imsdb.utilities
 
 
-def extract_characters(imsdb_movie_script):
+def extract_characters(script_events):
     """ Extract the movie characters from a movie script into a list.
 
-    This function receives as a parameter a list containing the movie
-    lines in the format of the IMSDb HTML page. The HTML page will be
-    parsed using a regular expression which will extract all the possible
-    candidates for movie characters.
+    This function receives as a parameter the events emitted by the
+    tokenizer for the IMSDb HTML page. Every speaker tag found by the
+    tokenizer is a possible candidate for movie character.
 
     After the extraction of those candidates, the function will reject all
     false positives classified as such by the function valid_movie_character().
@@ -32,8 +37,8 @@ def extract_characters(imsdb_movie_script):
     No repeated characters shall be added to the list.
 
     Args:
-        imsdb_movie_script (list of strings): The file containing the
-        IMSDb HTML page
+        script_events (list of ScriptEvent): The events of the IMSDb HTML
+        page returned by imsdb.tokenizer.tokenize()
 
     Returns:
         list of MovieCharacter: This list contains all the detected
@@ -43,31 +48,16 @@ def extract_characters(imsdb_movie_script):
     logger = logging.getLogger(__name__)
     logger.info('Extracting the characters...')
 
-    movie_chars_names_extracted = []
     movie_characters_list = []
+    similar_names_index = imsdb.nameindex.SimilarNameIndex()
+    collected_names_index = imsdb.nameindex.SubstringIndex()
+
+    for event in script_events:
+        if event.kind != imsdb.tokenizer.SPEAKER:
+            continue
+
+        name = event.text
 
-    # *** Regex explanation ***
-    # (1) First and second lines
-    #   Match all text enclosed by the HTML tags:
-    #       - "<b></b>"
-    #   Except for the ones that start with the strings:
-    #       - "EXT."
-    #       - "INT."
-    #       - "SUPER"
-    #   And put them under the capturing group "movie_char"
-    #
-    # (2) Third line
-    #   Match all text that comes after the previous HTML tags until
-    #   the next "<b>" tag (which represents the next character) and
-    #   put it under the captuing group "movie_text"
-    regex = ur'<b>(?!EXT\.)(?!INT\.)(?!SUPER)' + \
-            ur'(?P<movie_char>.*?)<\/b>' + \
-            ur'(?P<movie_text>.*?)(?=<b>)'
-
-    for char in re.finditer(regex, imsdb_movie_script):
-        movie_chars_names_extracted.append(char.group('movie_char'))
-    
-    for name in movie_chars_names_extracted:
         if not imsdb.utilities.valid_movie_character(name):
             continue
         
@@ -80,120 +70,149 @@ def extract_characters(imsdb_movie_script):
             logger.debug('Rejecting possible invalid character: ' + movie_character_name)
             continue
 
-        if imsdb.utilities.similar_character_already_added(movie_characters_list, movie_character_name):
+        if imsdb.utilities.similar_character_already_added(similar_names_index, movie_character_name):
+            continue
+
+        # Check if the character was already collected in the list, as a
+        # part of the name of a collected character
+        if movie_character_name in collected_names_index:
             continue
 
-        # Check if the character was already collected in the list
-        for existent_movie_character in movie_characters_list:
-            if movie_character_name in existent_movie_character.name:
-                break
-        else:
-            logger.info('Adding character... ' + movie_character_name)
-            movie_characters_list.append(imsdb.datastructures.MovieCharacter(movie_character_name))
+        logger.info('Adding character... ' + movie_character_name)
+        movie_characters_list.append(imsdb.datastructures.MovieCharacter(movie_character_name))
+        imsdb.utilities.add_similar_character_name(similar_names_index, movie_character_name)
+        collected_names_index.add(movie_character_name)
 
     return movie_characters_list
 
 
-def extract_scenes(imsdb_movie_script):
-    """Parse the movie script and collect all movie scenes in the movie script.
+def extract_scenes(imsdb_movie_script, script_events):
+    """Collect all movie scenes from the events of the movie script.
 
-    The function parses the HTML page using a regex code which considers
-    a movie scene any text from the following list of tags until the next
-    same list of tags:
+    The function considers a movie scene any text from one of the following
+    scene headings until the next "EXT." or "INT." heading:
         - BLACK SCREEN
         - EXT.
         - INT.
 
-    Each scene will be stored as a string in a list of string.
+    The "BLACK SCREEN" heading is usually the very beginning of the movie
+    script. The text after the last heading is not considered a scene.
+
+    Each scene will be stored as a MovieScene with the offsets of the scene
+    and of the character lines spoken during the scene, no text is copied
+    out of the movie script. A character line only belongs
+    to the scene if another bold tag of the same scene ends it, so the
+    line that is ended by the next scene heading is discarded.
 
     The scenes can, and should, contain:
         - Movie characters
         - Character's lines
 
+    The function is a generator, each scene is only built once it is pulled
+    by the caller.
+
     Args:
-        imsdb_movie_script (list of strings): The file containing the
-        IMSDb HTML page
+        imsdb_movie_script (MovieScript): The IMSDb HTML page minus the header
+        script_events (list of ScriptEvent): The events of the IMSDb HTML
+        page returned by imsdb.tokenizer.tokenize()
 
-    Returns:
-        List of strings: The returned list contains each individual scene
-        from the movie
+    Yields:
+        MovieScene: Each individual scene from the movie
     """
     logger = logging.getLogger(__name__)
     
     logger.info('Extracting all the scenes from the movie script...')
 
-    # *** Regex explanation ***
-    # (1) First line
-    #   Start by matching the beginning of each scene. Every scene
-    #   starts with one of these strings:
-    #     - "<pre>BLACK SCREEN"
-    #     - "<b>EXT."
-    #     - "<b>INT."
-    #   The "BLACK SCREEN" string is usually the very beginning
-    #   of the movie script.
-    #
-    # (2) Second line
-    #   Match all text starting from one of the previous strings
-    #   and tag it under the capturing group "movie_text"
-    #
-    # (3) Third line
-    #   Stop matching until the beginning of the next scene, which
-    #   is given by the strings mentioned earlier.
-    regex = ur'(<pre>BLACK SCREEN|<b>EXT\.|<b>INT\.)' + \
-            ur'(?P<movie_text>.*?)' + \
-            ur'(?=<b>(EXT\.|INT\.))'
-
-    movie_scenes_list = []
-
-    for mscene in re.finditer(regex, imsdb_movie_script):
-        movie_scenes_list.append(mscene.group('movie_text'))
-     
-    return movie_scenes_list
-
-
-def process_movie_single_scene(single_scene, movie_characters_list, scene_number):
+    scene_start = None
+    line_spans = array.array('i')
+    speaker = None
+
+    for event in script_events:
+        if event.kind == imsdb.tokenizer.SCENE_HEADING:
+            if event.text == imsdb.tokenizer.BLACK_SCREEN_HEADING:
+                # The "BLACK SCREEN" heading only opens a scene
+                if scene_start is None:
+                    scene_start = event.end
+                continue
+
+            if scene_start is not None:
+                # A line ended by the heading itself doesn't belong to the scene
+                if line_spans and line_spans[-1] == event.start:
+                    del line_spans[-4:]
+
+                yield imsdb.datastructures.MovieScene(scene_start, event.start, line_spans)
+
+            scene_start = event.end
+            line_spans = array.array('i')
+        elif scene_start is None:
+            continue
+        elif event.kind == imsdb.tokenizer.SPEAKER:
+            speaker = event
+        elif event.kind == imsdb.tokenizer.DIALOGUE:
+            line_spans.extend(imsdb.tokenizer.text_span(speaker))
+            line_spans.extend(imsdb.tokenizer.text_span(event))
+
+
+def process_movie_single_scene(imsdb_movie_script, single_scene, scene_incidence,
+                               scene_number, mention_detector):
     """Parse a single movie scene and extract the interactions between the
     characters.
 
+    The lines of the scene are read from the movie script one at a time.
+
+    The characters speaking in the scene are recorded in the incidence
+    matrix, the interactions are only counted once all scenes are recorded
+    by SceneIncidence.update_characters().
+
     Args:
-        single_scene (list of strings): A single movie scene
-        movieCharactersList (list of MovieCharacter): list of all extracted
-        characters
+        imsdb_movie_script (MovieScript): The IMSDb HTML page minus the header
+        single_scene (MovieScene): A single movie scene
+        scene_incidence (SceneIncidence): Scene x character matrix of the
+        movie characters
         scene_number (integer): The number of scene being analyzed.
+        mention_detector (MentionDetector): Detector of the characters
+        mentioned in the movie lines, built once for the movie
 
     Returns:
         List of strings: The returned list returns the list of interactions
     """
 
-    # *** Regex explanation ***
-    # (1) First and second lines
-    #   Match all text enclosed by the HTML tags:
-    #       - "<b></b>"
-    #   Except for the ones that start with the strings:
-    #       - "EXT."
-    #       - "INT."
-    #       - "SUPER"
-    #   And put them under the capturing group "movie_char"
-    #
-    # (2) Third line
-    #   Match all text that comes after the previous HTML tags until
-    #   the next "<b>" tag (which represents the next character) and
-    #   put it under the captuing group "movie_text"
-    regex = ur'<b>(?!EXT\.)(?!INT\.)(?!SUPER)' + \
-            ur'(?P<movie_char>.*?)<\/b>' + \
-            ur'(?P<movie_text>.*?)(?=<b>)'
-
-    process = re.compile(regex, re.MULTILINE | re.DOTALL)
-     
-    # The elements of the list movie_lines are extracted in the
-    # following manner:
+    scene_result = extract_scene_result(imsdb_movie_script, single_scene, mention_detector)
+
+    apply_scene_result(scene_result, scene_incidence, scene_number, mention_detector)
+
+    return scene_result.speakers
+
+
+def extract_scene_result(imsdb_movie_script, single_scene, mention_detector):
+    """Find the characters speaking in a single movie scene and the
+    characters they mention, without changing the characters.
+
+    The result only depends on the scene text and on the names of the
+    characters, so it can be cached and applied again by
+    apply_scene_result().
+
+    Args:
+        imsdb_movie_script (MovieScript): The IMSDb HTML page minus the header
+        single_scene (MovieScene): A single movie scene
+        mention_detector (MentionDetector): Detector of the characters
+        mentioned in the movie lines, built once for the movie
+
+    Returns:
+        SceneResult: The speakers and the mentions of the scene
+    """
+
+    # The elements of movie_lines are read from the script one at a time,
+    # in the following manner:
     #   [Line 0] - [Character name, Character line]
     #   [Line 1] - [Character name, Character line]
     #   [Line 2] - [Character name, Character line]
     #       ...
-    movie_lines = re.findall(process, single_scene)
+    movie_lines = single_scene.lines(imsdb_movie_script)
 
     characters_interacted_with = []
+    speakers = set()
+    mentions = collections.Counter()
 
     for line in movie_lines:
         # First step:
@@ -211,7 +230,8 @@ def process_movie_single_scene(single_scene, movie_characters_list, scene_number
 
         movie_char_from_scene = imsdb.utilities.strip_unwanted_strings(movie_char_from_scene)
 
-        if movie_char_from_scene not in characters_interacted_with:
+        if movie_char_from_scene not in speakers:
+            speakers.add(movie_char_from_scene)
             characters_interacted_with.append(movie_char_from_scene)
 
         # Second step:
@@ -219,61 +239,83 @@ def process_movie_single_scene(single_scene, movie_characters_list, scene_number
         #       For example: Frodo might talk about Gandalf even though
         #       Gandalf might not be in the scene
 
-        movie_line_from_scene = line[1]
+        mentioning_character, mentioned_characters = \
+            imsdb.utilities.find_mentioned_characters(movie_char_from_scene,
+                                                      line[1],
+                                                      mention_detector)
 
-        imsdb.utilities.check_mentioned_characters(movie_char_from_scene,
-                                                   movie_line_from_scene,
-                                                   movie_characters_list)
+        for mentioned_character in mentioned_characters:
+            mentions[mentioning_character.name, mentioned_character.name] += 1
 
-    char_list = []
-    for char in movie_characters_list:
-        char_list.append(char.name)
+    return imsdb.datastructures.SceneResult(characters_interacted_with,
+                                            sorted((speaker, mentioned, count)
+                                                   for (speaker, mentioned), count
+                                                   in mentions.iteritems()))
 
-    for char1 in movie_characters_list:
-        for char2 in characters_interacted_with:
-            if char1.name == char2:
-                char1.add_characters_interacted_with(characters_interacted_with, char_list)
-                char1.add_appeared_scene(scene_number)
 
-    return characters_interacted_with
+def apply_scene_result(scene_result, scene_incidence, scene_number, mention_detector):
+    """Record the speakers and the mentions of a single movie scene.
 
+    The speakers are recorded in the incidence matrix and the mentions are
+    added to the characters mentioning them.
 
-def get_real_name_and_id(characters, movie):
+    Args:
+        scene_result (SceneResult): The result of extract_scene_result()
+        scene_incidence (SceneIncidence): Scene x character matrix of the
+        movie characters
+        scene_number (integer): The number of scene being analyzed.
+        mention_detector (MentionDetector): Detector of the characters
+        mentioned in the movie lines, built once for the movie
+    """
+
+    for speaker, mentioned, count in scene_result.mentions:
+        mentioning_character = mention_detector.speaker(speaker)
+        mentioned_character = mention_detector.speaker(mentioned)
+
+        for _ in range(count):
+            mentioning_character.add_mentioned_character(mentioned_character)
+
+    scene_incidence.add_scene(scene_number, scene_result.speakers)
+
+
+def get_real_name_and_id(characters, movie, resolver=None):
     """
     Gets the real name of the char from the wikia
     Adds an id to that char
+    Only the first char with each real name is kept in the movie
+    The wikia lookups are sent concurrently by the resolver, but the ids
+    follow the order of the list
     """
-    identi = 0
+    if resolver is None:
+        resolver = imsdb.realnames.RealNameResolver()
 
-    for character in characters:
-        character.real_name = imsdb.dataadjustment.retrieve_character_real_name(
-            movie.sub_wikia,
-            character.name)
+    real_names = resolver.resolve(movie.sub_wikia,
+                                  [character.name for character in characters])
 
+    for identi, character in enumerate(characters):
+        character.real_name = real_names[identi]
         character.id = identi
-        identi = identi +1
 
     # Clean up list
-    real_name_list = []
-
-    for character in characters:
-        if character.real_name not in real_name_list:
-            real_name_list.append(character.real_name)
-        else:
-            movie.characters.remove(character)
+    movie.clean_up_character_list()
 
 
-def get_gender(characters, args):
+def get_gender(characters, args, resolver=None):
     """
     Gets the gender for each char and adds it to the object
     Gender can be:
     male
     female
     no gender
+    The config file and the api key are only read once by the resolver
     """
-    for character in characters:
-        if not args.bypass_gender_retrieval:
-            character.real_name = imsdb.dataadjustment.retrieve_character_gender(character.real_name)
-        else:
-            dict_gender = imsdb.filehandlers.load_config_file(args.config, 'gender')
-            character.gender = dict_gender[character.name.lower()]
+    if resolver is None:
+        resolver = imsdb.gender.GenderResolver(args.config,
+                                               args.bypass_gender_retrieval,
+                                               freebase_url=getattr(args, 'freebase_url',
+                                                                    imsdb.freebase.FREEBASE_URL))
+
+    try:
+        resolver.resolve(characters)
+    finally:
+        resolver.close()
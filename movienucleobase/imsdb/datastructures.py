@@ -6,10 +6,161 @@
 .. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
 """
 
+import array
+import collections
+import itertools
 import logging
 
 
-class MovieData:
+class MovieScene(collections.namedtuple('MovieScene', ['start', 'end', 'line_spans'])):
+    """A single movie scene, as offsets into the movie script.
+
+    The scene doesn't hold any text, the text is sliced out of the movie
+    script when it is asked for, so the scenes of a whole movie only take a
+    few integers each.
+
+    Attributes:
+        start (int): Offset of the start of the scene in the movie script
+        end (int): Offset of the end of the scene in the movie script
+        line_spans (array of int): The lines spoken during the scene, four
+        offsets per line: start and end of the character name, start and
+        end of the character line
+    """
+
+    __slots__ = ()
+
+    def text(self, imsdb_movie_script):
+        """Return the scene as it appears in the movie script, without the
+        new line chars.
+
+        Args:
+            imsdb_movie_script (MovieScript): The movie script the scene
+            belongs to
+
+        Returns:
+            String: The scene text
+        """
+
+        return imsdb_movie_script[self.start:self.end].replace('\n', '')
+
+    def lines(self, imsdb_movie_script):
+        """Yield the lines spoken during the scene, one at a time.
+
+        Args:
+            imsdb_movie_script (MovieScript): The movie script the scene
+            belongs to
+
+        Yields:
+            tuple of String: The (character name, character line) pair, without
+            the new line chars
+        """
+
+        spans = iter(self.line_spans)
+
+        for name_start, name_end, line_start, line_end in itertools.izip(spans, spans,
+                                                                          spans, spans):
+            yield (imsdb_movie_script[name_start:name_end].replace('\n', ''),
+                   imsdb_movie_script[line_start:line_end].replace('\n', ''))
+
+
+# The result of processing a single movie scene:
+#   speakers (list of str): Names of the characters speaking in the scene,
+#   in the order in which they first speak
+#   mentions (list of tuple): The (speaker name, mentioned name, count)
+#   mentions made during the scene
+SceneResult = collections.namedtuple('SceneResult', ['speakers', 'mentions'])
+
+
+class CharacterIndex(object):
+    """Indexes of the characters of a movie by name, by real name and by id.
+
+    Each key maps to the characters that have it, in the order in which they
+    were indexed, so the duplicated real names of the characters that are
+    not cleaned up yet are kept. The characters update the index when their
+    id or real name is set.
+    """
+
+    def __init__(self, characters=()):
+        """Builds the indexes of a list of characters.
+
+        Args:
+            characters (list of MovieCharacter): The characters to be indexed
+        """
+
+        self._by_key = {'name': {}, 'real_name': {}, 'id': {}}
+
+        for character in characters:
+            self.add(character)
+
+    def add(self, character):
+        """Indexes a character, it then belongs to this index.
+
+        Args:
+            character (MovieCharacter): The character to be indexed
+        """
+
+        # The index is set on the character so that its setters can reach it
+        character._index = self
+
+        for attribute in self._by_key:
+            self.rekey(character, attribute, None, getattr(character, attribute))
+
+    def remove(self, character):
+        """Removes a character from the indexes.
+
+        Args:
+            character (MovieCharacter): The character to be removed
+        """
+
+        for attribute in self._by_key:
+            self.rekey(character, attribute, getattr(character, attribute), None)
+
+        character._index = None
+
+    def rekey(self, character, attribute, old_key, new_key):
+        """Moves a character from one key of an index to another.
+
+        Args:
+            character (MovieCharacter): The indexed character
+            attribute (String): The index, "name", "real_name" or "id"
+            old_key: The previous value of the attribute, None if not indexed
+            new_key: The new value of the attribute, None to not index it
+        """
+
+        characters_by_key = self._by_key[attribute]
+
+        if old_key is not None and old_key in characters_by_key:
+            characters = characters_by_key[old_key]
+
+            if character in characters:
+                characters.remove(character)
+
+            if not characters:
+                del characters_by_key[old_key]
+
+        if new_key is not None and new_key != '':
+            characters_by_key.setdefault(new_key, []).append(character)
+
+    def get(self, attribute, key):
+        """Returns the first character indexed with a key.
+
+        Args:
+            attribute (String): The index, "name", "real_name" or "id"
+            key: The value of the attribute
+
+        Returns:
+            MovieCharacter: The character, None if there isn't one
+        """
+
+        characters = self._by_key[attribute].get(key)
+
+        if characters:
+            return characters[0]
+
+        return None
+
+
+class MovieData(object):
     """This class contains all information related to the movie being analyzed.
 
     This class stores mostly characters and scenes and it provides a number of
@@ -19,8 +170,14 @@ class MovieData:
         title (str): Movie title
         sub_wikia (str): Sub-wikia related to the movie. Used for completing
         information about the movies' characters
-        characters (list of MovieCharacter): List of all characters in the movie
-        scenes (list of str): List of all scenes from the movie
+        characters (list of MovieCharacter): List of all characters in the movie,
+        indexed by name, real name and id. The list must be changed through
+        add_character() and remove_character() to keep the indexes right
+        scenes (list of MovieScene): List of all scenes from the movie
+        fingerprint (str): Hash of the movie script and of the pipeline
+        configuration used to analyze it
+        script (str): Name of the file of the movie script, several movie
+        scripts can have the same title
     """
 
     def __init__(self, sub_wikia):
@@ -36,6 +193,26 @@ class MovieData:
 
         #self._title = title
         self._sub_wikia = sub_wikia
+        self._characters = []
+        self._index = CharacterIndex()
+        self.fingerprint = None
+        self.script = None
+
+    def __getstate__(self):
+        """
+        Returns the state to be pickled, the indexes are left out
+        """
+        state = self.__dict__.copy()
+        del state['_index']
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled state and rebuilds the indexes
+        """
+        self.__dict__.update(state)
+        self._index = CharacterIndex(self._characters)
 
     @property
     def title(self):
@@ -44,6 +221,13 @@ class MovieData:
         """
         return self._title 
 
+    @title.setter
+    def title(self, argx):
+        """
+        Sets the movie title
+        """
+        self._title = argx
+
     @property
     def sub_wikia(self):
         """
@@ -70,14 +254,53 @@ class MovieData:
             from the movie script
         """
 
-        self._characters = argx
+        for character in self._characters:
+            self._index.remove(character)
+
+        self._characters = list(argx)
+        self._index = CharacterIndex(self._characters)
+
+    def add_character(self, character):
+        """Add a character to the movie.
+
+        Args:
+            character (MovieCharacter): The character to be added
+        """
+
+        self._characters.append(character)
+        self._index.add(character)
+
+    def remove_character(self, character):
+        """Remove a character from the movie.
+
+        Args:
+            character (MovieCharacter): The character to be removed
+        """
+
+        self._characters.remove(character)
+        self._index.remove(character)
+
+    def character_by_name(self, name):
+        """Return the character with a name, None if there isn't one."""
+
+        return self._index.get('name', name)
+
+    def character_by_real_name(self, real_name):
+        """Return the first character with a real name, None if there isn't one."""
+
+        return self._index.get('real_name', real_name)
+
+    def character_by_id(self, character_id):
+        """Return the character with an id, None if there isn't one."""
+
+        return self._index.get('id', character_id)
 
     @property
     def scenes(self):
         """Return the movie scenes
         
         Returns:
-            List of string: Movie scenes
+            List of MovieScene: Movie scenes
         """
 
         return self._scenes
@@ -87,7 +310,7 @@ class MovieData:
         """Set the movie scenes.
         
         Args:
-            argx (list of str): List of all scenes from the movie
+            argx (list of MovieScene): List of all scenes from the movie
         """
 
         self._scenes = argx
@@ -122,20 +345,31 @@ class MovieData:
     def clean_up_character_list(self):
         """
         Cleans the char list from some unwanted names
+        Only the first char with each real name is kept
         """
-        real_name_list = []
+        real_names = set()
+        duplicates = []
 
         for character in self.characters:
-            if character.real_name not in real_name_list:
-                real_name_list.append(character.real_name)
+            if character.real_name in real_names:
+                duplicates.append(character)
             else:
-                self.characters.remove(character)
+                real_names.add(character.real_name)
+
+        for character in duplicates:
+            self._index.remove(character)
+
+        if duplicates:
+            removed = set(duplicates)
+            self._characters[:] = [character for character in self._characters
+                                   if character not in removed]
 
     def build_table_interactions(self):
         """
         Helps with the process of building the interations info
         Returns the info relative to char mentions in an id manner
         This way building the table is much easier
+        Each pair of chars shows up only once
         returns ex:
         1 - Frodo
         2 - Sam
@@ -145,38 +379,11 @@ class MovieData:
         """
         logger = logging.getLogger(__name__)
 
-        source_name_list = []
-        target_name_list = []
-        source_id_list = []
-        target_id_list = []
-        weight_list = []
-        interactions_list = ['']
-
-        for source in self.characters:
-            for target, value in source.characters_interacted_with.iteritems():
-                for target_name in self.characters:
-
-                    if len(source.appeared_scenes) > 1 and len(target_name.appeared_scenes) > 1 \
-                            and target_name.name == target:
-                        interaction = str(target) + str(source.name)
-                        interaction_rev = str(source.name) + str(target)
-
-                        if interaction not in interactions_list and interaction_rev not in interactions_list:
-                            # Appends source and target names
-                            source_name_list.append(source.name)
-                            target_name_list.append(target)
-
-                            # Appends source and target id's
-                            source_id_list.append(source.id)
-
-                            for char in self.characters:
-                                if char.name == target:
-                                    target_id_list.append(char.id)
-                                    break
-
-                            # Appends interaction weigth
-                            weight_list.append(value)
-                            interactions_list.append(interaction)
+        source_name_list, \
+            target_name_list, \
+            source_id_list, \
+            target_id_list, \
+            weight_list = self._build_table_edges('interaction_counts', True)
 
         logger.debug('Interaction:Source Name List\n' + ','.join(source_name_list))
         logger.debug('Interaction:Target Name List\n' + ','.join(target_name_list))
@@ -204,37 +411,62 @@ class MovieData:
         """
         logger = logging.getLogger(__name__)
 
+        source_name_list, \
+            target_name_list, \
+            source_id_list, \
+            target_id_list, \
+            weight_list = self._build_table_edges('mention_counts', False)
+
+        logger.debug('Mention:Source Name List\n' + ','.join(source_name_list))
+        logger.debug('Mention:Target Name List\n' + ','.join(target_name_list))
+        logger.debug('Mention:Source Id List\n' + ','.join(map(str, source_id_list)))
+        logger.debug('Mention:Target Id List\n' + ','.join(map(str, target_id_list)))
+        logger.debug('Mention:Weight List\n' + ','.join(map(str, weight_list)))
+
+        return source_name_list, \
+               target_name_list, \
+               source_id_list, \
+               target_id_list, \
+               weight_list
+
+    def _build_table_edges(self, edges_attribute, undirected):
+        """
+        Builds the columns of an edge table from the id keyed dict
+        'edges_attribute' of each char (ex: interaction_counts)
+        Only chars that appeared in more than one scene are considered
+        The targets are found through the id index, and if the edges are
+        undirected each pair of ids (min id, max id) is kept only once
+        """
         source_name_list = []
         target_name_list = []
         source_id_list = []
         target_id_list = []
         weight_list = []
+        added_pairs = set()
 
         for source in self.characters:
-            for target, value in source.mentioned_characters.iteritems():
-                for target_name in self.characters:
-                    if len(source.appeared_scenes) > 1 and len(target_name.appeared_scenes) > 1 \
-                            and target_name.name == target:
-                        # Appends source and target names
-                        source_name_list.append(source.name)
-                        target_name_list.append(target)
+            if len(source.appeared_scenes) <= 1:
+                continue
 
-                        # Appends source and target id's
-                        source_id_list.append(source.id)
+            for target_id, value in sorted(getattr(source, edges_attribute).iteritems()):
+                target = self.character_by_id(target_id)
 
-                        for char in self.characters:
-                            if char.name == target:
-                                target_id_list.append(char.id)
-                                break
+                if target is None or len(target.appeared_scenes) <= 1:
+                    continue
 
-                        # Appends intereraction weigth
-                        weight_list.append(value)
+                if undirected:
+                    pair = (min(source.id, target.id), max(source.id, target.id))
 
-        logger.debug('Mention:Source Name List\n' + ','.join(source_name_list))
-        logger.debug('Mention:Target Name List\n' + ','.join(target_name_list))
-        logger.debug('Mention:Source Id List\n' + ','.join(map(str, source_id_list)))
-        logger.debug('Mention:Target Id List\n' + ','.join(map(str, target_id_list)))
-        logger.debug('Mention:Weight List\n' + ','.join(map(str, weight_list)))
+                    if pair in added_pairs:
+                        continue
+
+                    added_pairs.add(pair)
+
+                source_name_list.append(source.name)
+                target_name_list.append(target.name)
+                source_id_list.append(source.id)
+                target_id_list.append(target.id)
+                weight_list.append(value)
 
         return source_name_list, \
                target_name_list, \
@@ -272,28 +504,66 @@ class MovieData:
         logger.debug('Char Name\n' + ','.join(df_names))
         logger.debug('Char Gender\n' + ','.join(df_gender))
         logger.debug('N. Scenes appeared\n' + ','.join(map(str, df_n_scenes_int)))
-        logger.debug('Scenes appeared\n' + ','.join(map(str, df_scenes_int)))
+        logger.debug('Scenes appeared\n' + ','.join(str(list(scenes)) for scenes in df_scenes_int))
 
         return df_id_1, df_names, df_gender, df_n_scenes_int, df_scenes_int
 
 
-class MovieCharacter:
+
+
+class MovieCharacter(object):
     """
     Class with all the info relevant to the movie char
+    The instances are kept small, a movie has many chars and a catalogue
+    many movies:
+        - No instance dict (__slots__)
+        - The names are interned
+        - The appeared scenes are an array of ints
+        - The interactions and mentions are counted by char id, the names
+        are only looked up when they are read
+    The ids are resolved through the CharacterIndex of the movie the char
+    belongs to
     """
+    __slots__ = ('_id', '_name', '_real_name', '_gender', '_index',
+                 '_interactions', '_mentions', '_appeared_scenes')
+
     def __init__(self, name):
         """
         Iniates all the variables inerent to the movie char
         """
-        self._id = id
+        if isinstance(name, str):
+            name = intern(name)
+
+        self._id = None
         self._name = name
         self._real_name = ""
         self._gender = ""
-        self._characters_interacted_with = {}
-        self._mentioned_characters = {}
-        self._appeared_scenes = []
+        self._index = None
+        self._interactions = {}
+        self._mentions = {}
+        self._appeared_scenes = array.array('i')
         #missing appeared scenes relative to mentions
 
+    def __getstate__(self):
+        """
+        Returns the state to be pickled, the index of the movie is left
+        out, the movie indexes the char again once unpickled
+        """
+        return dict((slot, getattr(self, slot))
+                    for slot in self.__slots__ if slot != '_index')
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled state
+        """
+        if isinstance(state['_name'], str):
+            state['_name'] = intern(state['_name'])
+
+        self._index = None
+
+        for slot, value in state.iteritems():
+            setattr(self, slot, value)
+
     @property
     def id(self):
         """
@@ -325,32 +595,63 @@ class MovieCharacter:
     @property
     def appeared_scenes(self):
         """
-        Returns a list of scenes in which the char appeared
-        ex:[1, 6, 7, 8, 9, 11, 12, 13, 35, 86, 95]
+        Returns the scenes in which the char appeared
+        ex: array('i', [1, 6, 7, 8, 9, 11, 12, 13, 35, 86, 95])
         """
         return self._appeared_scenes
 
     @property
     def characters_interacted_with(self):
         """
-        Returns a list of scenes in which the char appeared
-        ex:[Frodo, Galadriel, Legolas]
+        Returns the chars the char interacted with, by name (by id if
+        the char doesn't belong to a movie)
+        ex: {Frodo: 3, Galadriel: 1, Legolas: 2}
         """
-        return self._characters_interacted_with
+        return self._names_of(self._interactions)
 
     @property
     def mentioned_characters(self):
         """
-        Returns a list of scenes in which the char was mentioned
-        ex:[Frodo, Galadriel, Legolas]
+        Returns the chars the char mentioned, by name (by id if the char
+        doesn't belong to a movie)
+        ex: {Frodo: 3, Galadriel: 1, Legolas: 2}
+        """
+        return self._names_of(self._mentions)
+
+    @property
+    def interaction_counts(self):
+        """
+        Returns the chars the char interacted with, by id
+        ex: {1: 3, 4: 1, 7: 2}
+        """
+        return self._interactions
+
+    @property
+    def mention_counts(self):
+        """
+        Returns the chars the char mentioned, by id
+        ex: {1: 3, 4: 1, 7: 2}
         """
-        return self._mentioned_characters
+        return self._mentions
+
+    @id.setter
+    def id(self, argx):
+        """
+        Sets the char id and updates the index of the movie
+        """
+        if self._index is not None:
+            self._index.rekey(self, 'id', self._id, argx)
+
+        self._id = argx
 
     @real_name.setter
     def real_name(self, argx):
         """
-        Sets the char real name
+        Sets the char real name and updates the index of the movie
         """
+        if self._index is not None:
+            self._index.rekey(self, 'real_name', self._real_name, argx)
+
         self._real_name = argx
 
     @gender.setter
@@ -360,6 +661,24 @@ class MovieCharacter:
         """
         self._gender = argx
 
+    def _names_of(self, counts):
+        """
+        Returns a copy of an id keyed counter keyed by the chars names
+        The chars removed from the movie are left out
+        """
+        if self._index is None:
+            return dict(counts)
+
+        counts_by_name = {}
+
+        for char_id, count in counts.iteritems():
+            character = self._index.get('id', char_id)
+
+            if character is not None:
+                counts_by_name[character.name] = count
+
+        return counts_by_name
+
     def add_characters_interacted_with(self, list_of_names, char_list):
         """
         The function will accept a list of characters that the present
@@ -373,28 +692,39 @@ class MovieCharacter:
         in the whole scene. This scenario also counts as well, so we
         only add the character if it is the only element in the list.
         """
-        logger = logging.getLogger(__name__)
-
         # If the lists of names is empty, terminate the function immediately
         if len(list_of_names) <= 1:
             return False
 
-        # Detect which characters were already added as interactions and
-        # increase the respective counters of interactions
-        for iter1 in set(list_of_names).intersection(self._characters_interacted_with):
-            if iter1 in self._characters_interacted_with and iter1 != self.name:
-                self._characters_interacted_with[iter1] += 1
+        if self._index is None:
+            return False
+
+        for name in set(list_of_names):
+            character = self._index.get('name', name)
+
+            if character is None or character.id is None or name == self.name:
+                continue
 
-        # Detect the characters that weren't added as interaction yet
-        for iter2 in set(list_of_names).difference(self._characters_interacted_with):
-            if iter2 in char_list and iter2 != self.name:
-                added_character = iter2
-                self._characters_interacted_with[iter2] = 1
+            char_id = character.id
 
-        #logger.debug('The character ' + self.name + ' interacted with: ' + added_character)
+            # Increase the counter of the characters already added as
+            # interactions, the others are only added if in the char list
+            if char_id in self._interactions:
+                self._interactions[char_id] += 1
+            elif name in char_list:
+                self._interactions[char_id] = 1
 
         return True
 
+    def set_scene_statistics(self, appeared_scenes, interaction_counts):
+        """
+        Sets the scenes in which the char appeared and the chars it
+        interacted with (by id), both computed for the whole movie at once
+        ex: [1, 6, 7], {4: 2, 7: 1}
+        """
+        self._appeared_scenes = array.array('i', appeared_scenes)
+        self._interactions = interaction_counts
+
     def add_appeared_scene(self, scene_number):
         """
         This function adds an appeared scene to the object movie char
@@ -405,39 +735,35 @@ class MovieCharacter:
         logger.debug('The character ' + self.name + 
                      ' appears in the scene ' + str(scene_number))
 
-        try:
-            self._appeared_scenes.append(scene_number)
-        except NameError:
-            self._appeared_scenes = [scene_number]
+        self._appeared_scenes.append(scene_number)
 
-    def add_mentioned_character(self, name):
+    def add_mentioned_character(self, character):
         """
         This function adds an mentioned scene to the object movie char
         ex: Frodo mentioned Sam
+        character -> the mentioned MovieCharacter
         """
         logger = logging.getLogger(__name__)
 
-        if name == self.name:
+        if character.id == self.id:
             return None
 
-        if name in self.mentioned_characters:
-            self._mentioned_characters[name] = \
-                self._mentioned_characters[name] + 1
-        else:
-            self._mentioned_characters[name] = 1
+        self._mentions[character.id] = self._mentions.get(character.id, 0) + 1
 
-        logger.debug('The character ' + self.name + ' mentioned ' + name)
+        logger.debug('The character ' + self.name + ' mentioned ' + character.name)
 
     def list_characters_interacted_with(self):
         """
         Lists all the chars the char in question interacted with
         """
-        if len(self._characters_interacted_with) > 0:
+        characters_interacted_with = self.characters_interacted_with
+
+        if len(characters_interacted_with) > 0:
             print 'The character ' + self.name + ' interacted with:'
 
-            for char in self._characters_interacted_with:
+            for char in characters_interacted_with:
                 print '    - ' + char + ' ' + \
-                    str(self.characters_interacted_with[char]) + ' times'
+                    str(characters_interacted_with[char]) + ' times'
         else:
             print 'The character ' + self.name + ' did\'t have any interactions'
 
@@ -445,12 +771,14 @@ class MovieCharacter:
         """
         Lists all the chars the char mentioned
         """
-        if len(self.mentioned_characters):
+        mentioned_characters = self.mentioned_characters
+
+        if len(mentioned_characters):
             print 'The character ' + self.name + ' mentioned the following characters:'
 
-            for char in self.mentioned_characters:
+            for char in mentioned_characters:
                 print '    - ' + char + ' ' + \
-                    str(self.mentioned_characters[char]) + ' times'
+                    str(mentioned_characters[char]) + ' times'
         else:
             print 'The character did not mentioned anyone.'
 
@@ -463,7 +791,3 @@ class MovieCharacter:
                 ', '.join(str(i) for i in self.appeared_scenes)
         else:
             print 'The character did not appear in any scenes.'
-
-
-
-
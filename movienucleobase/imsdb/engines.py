@@ -0,0 +1,157 @@
+"""
+.. module:: engines
+    :synopsis: A registry of the database engine shared by all database helpers
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+import os
+import threading
+
+DEFAULT_CREDENTIALS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'pass.txt')
+
+BACKENDS = ['mysql', 'sqlite']
+
+_lock = threading.Lock()
+_settings = {'backend': 'mysql',
+             'credentials_path': DEFAULT_CREDENTIALS,
+             'database': 'movies',
+             'sqlite_path': 'movies.sqlite',
+             'pool_size': 5,
+             'max_overflow': 10,
+             'pool_recycle': 3600}
+_engine = None
+_engine_pid = None
+
+
+def read_credentials(credentials_path):
+    """
+    Grabs the user / password / ip of your MySql database
+    The file has one "key:value" line for each of them, in this order
+    Returns the string "user:password@ip"
+    """
+
+    var_user_pass_ip = []
+
+    with open(credentials_path, 'r') as credentials:
+        for line in credentials:
+            var_user_pass_ip.append(line.split(":", 1)[1].rstrip())
+
+    return var_user_pass_ip[0] + ':' + var_user_pass_ip[1] + var_user_pass_ip[2]
+
+
+def configure(**settings):
+    """
+    Changes the settings of the engine, before it is created
+    The settings are backend, credentials_path, database, sqlite_path,
+    pool_size, max_overflow and pool_recycle
+    The backend is either "mysql", using the credentials file, or "sqlite",
+    using the local database file sqlite_path
+    An engine already created is disposed, the next call to get_engine()
+    creates a new one with the new settings
+    """
+
+    unknown = set(settings) - set(_settings)
+
+    if unknown:
+        raise ValueError('Unknown engine settings: ' + ', '.join(sorted(unknown)))
+
+    if settings.get('backend', _settings['backend']) not in BACKENDS:
+        raise ValueError('Unknown database backend: ' + settings['backend'])
+
+    with _lock:
+        _settings.update(settings)
+        _dispose()
+
+
+def get_engine():
+    """
+    Returns the engine of the process, created on the first call
+    All helpers share its pool of connections
+    A forked process (e.g. a batch worker) gets its own engine, since the
+    connections of the parent can't be shared
+    """
+
+    global _engine, _engine_pid
+
+    logger = logging.getLogger(__name__)
+
+    with _lock:
+        if _engine is None or _engine_pid != os.getpid():
+            if _settings['backend'] == 'sqlite':
+                _engine = _create_sqlite_engine(_settings['sqlite_path'])
+            else:
+                _engine = _create_mysql_engine()
+            _engine_pid = os.getpid()
+
+            logger.info('Created the %s database engine of the process %d' %
+                        (_settings['backend'], _engine_pid))
+
+        return _engine
+
+
+def _create_mysql_engine():
+    """
+    Creates the engine of the MySql server in the credentials file
+    """
+
+    import sqlalchemy as sql
+
+    user_pass_ip = read_credentials(_settings['credentials_path'])
+
+    return sql.create_engine(
+        'mysql://' + user_pass_ip + '/' + _settings['database'] +
+        '?charset=utf8&use_unicode=True',
+        pool_size=_settings['pool_size'],
+        max_overflow=_settings['max_overflow'],
+        pool_recycle=_settings['pool_recycle'])
+
+
+def _create_sqlite_engine(sqlite_path):
+    """
+    Creates the engine of a local SQLite database file
+    The database uses the write-ahead log, so the readers don't block the
+    writer and a transaction only syncs the log once
+    """
+
+    import sqlalchemy as sql
+    import sqlalchemy.event
+
+    # The batch workers write to the same file, so they wait for each other
+    engine = sql.create_engine('sqlite:///' + sqlite_path, connect_args={'timeout': 30})
+
+    @sql.event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+    return engine
+
+
+def dispose():
+    """
+    Closes all connections of the engine, to be called at shutdown
+    """
+
+    with _lock:
+        _dispose()
+
+
+def _dispose():
+    """
+    Disposes the engine, the lock must be held
+    """
+
+    global _engine, _engine_pid
+
+    if _engine is not None and _engine_pid == os.getpid():
+        _engine.dispose()
+
+    _engine = None
+    _engine_pid = None
@@ -0,0 +1,95 @@
+"""
+.. module:: export
+    :synopsis: Writes the tables of a movie to Parquet files partitioned by movie
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+import os
+import re
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MISSING_PYARROW_MESSAGE = 'Exporting the movies needs pyarrow, install it ' + \
+                          '("pip install pyarrow") or leave out --export_dir'
+
+
+def check_available():
+    """Checks that the movies can be exported.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+
+    if pyarrow is None:
+        raise ImportError(MISSING_PYARROW_MESSAGE)
+
+
+def partition_path(output_dir, table_name, movie_key):
+    """Returns the path of the file of a table for a movie.
+
+    The files are laid out as partitions of a dataset, one directory per
+    table and one sub-directory per movie:
+        output_dir/chars/movie=<movie_key>/part-0.parquet
+
+    Args:
+        output_dir (string): Root directory of the exported files
+        table_name (string): Name of the table
+        movie_key (string): Key of the movie
+
+    Returns:
+        string: The path of the file
+    """
+
+    movie_key = re.sub(r'[^\w.-]', '_', movie_key)
+
+    return os.path.join(output_dir, table_name, 'movie=' + movie_key, 'part-0.parquet')
+
+
+def export_movie(output_dir, movie_key, tables):
+    """Writes the tables of a movie to Parquet files.
+
+    Each table is written to its partition (see partition_path()), the
+    readers of the dataset get the movie key from the partition
+    directories. The files of a movie processed again are replaced.
+
+    Args:
+        output_dir (string): Root directory of the exported files
+        movie_key (string): Key of the movie
+        tables (dict of DataFrame): The tables to be written, keyed by name
+        (chars, interactions, mentions, metrics)
+
+    Returns:
+        list of string: The paths of the files written
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+
+    logger = logging.getLogger(__name__)
+
+    check_available()
+
+    paths = []
+
+    for table_name in sorted(tables):
+        df = tables[table_name]
+        path = partition_path(output_dir, table_name, movie_key)
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        pyarrow.parquet.write_table(pyarrow.Table.from_pandas(df, preserve_index=False),
+                                    path)
+
+        logger.info('Exported %d rows of %s to %s' % (len(df), table_name, path))
+
+        paths.append(path)
+
+    return paths
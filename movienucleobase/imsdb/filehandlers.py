@@ -8,20 +8,100 @@
 
 import logging
 import ConfigParser
-import re
+import mmap
+import os
 
 
-def open_movie_script(filename):
-    """Receives the name of a HTML file and returns the contents as a list.
+class MovieScript(object):
+    """A read-only view of the movie script inside a memory-mapped HTML file.
+
+    The view behaves like the string with the movie script: it supports
+    len(), find() and slicing, with every offset relative to the start of
+    the movie script. Only slicing copies data out of the file, so the
+    stages that consume the script only copy the small pieces they need,
+    and view() gives the pieces that are only read without any copy.
+
+    Attributes:
+        start (int): Offset of the movie script in the file
+        end (int): Offset of the end of the movie script in the file
+    """
+
+    def __init__(self, buffer, start, end):
+        """Initializes the view over the range [start, end) of the buffer.
+
+        Args:
+            buffer (mmap): The memory-mapped HTML file
+            start (int): Offset of the movie script in the file
+            end (int): Offset of the end of the movie script in the file
+        """
+
+        self._buffer = buffer
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(len(self))
+
+        return self._buffer[self.start + start:self.start + max(start, stop)]
+
+    def view(self, start, end):
+        """Returns a read-only buffer over a part of the movie script.
+
+        Unlike slicing, nothing is copied out of the file, the buffer can be
+        fed to a hash or compared as it is.
+
+        Args:
+            start (int): Offset of the part in the movie script
+            end (int): Offset of the end of the part in the movie script
+
+        Returns:
+            buffer: The part [start, end) of the movie script
+        """
+
+        start, stop, _ = slice(start, end).indices(len(self))
+
+        return buffer(self._buffer, self.start + start, max(stop - start, 0))
+
+    def find(self, sub, start=0, end=None):
+        """Same as str.find() but without copying the movie script."""
+
+        if end is None or end > len(self):
+            end = len(self)
+
+        index = self._buffer.find(sub, self.start + start, self.start + end)
+
+        if index == -1:
+            return -1
+
+        return index - self.start
+
+    def close(self):
+        """Unmaps the HTML file."""
+
+        self._buffer.close()
+
+
+def open_movie_script(filename, scripts_dir='scripts'):
+    """Receives the name of a HTML file and returns a view of the movie script.
     
     The function attempts to remove the HTML header that comes before the
     movie script in order to avoid any unexpected behavior from the HTML tags.
 
+    The file is memory-mapped instead of read, and the header is skipped by
+    offset, so the movie script is never copied into a new string. The
+    new line chars are kept in the file, the tokenizer removes them from
+    the pieces of text it extracts.
+
     Args:
         filename (string): The name of the HTML file
+        scripts_dir (string): The directory containing the HTML file
 
     Returns:
-        list of strings: Contains the contents of the HTML minus the header.
+        MovieScript: View of the contents of the HTML minus the header.
+        string: The movie title
 
     Raises:
         It raises an exception if the file cannot be found.
@@ -29,37 +109,51 @@ def open_movie_script(filename):
 
     logger = logging.getLogger(__name__)
 
-    path = 'scripts\\' + filename
+    path = os.path.join(scripts_dir, filename)
+
+    # In the HTML page, everything that comes before the
+    # following HTML code is consider an header and useless
+    # for the movie info extraction
+    # TODO: This HTML line is hardcoded in the code, it could be
+    # somehow parameterized
+    html_code = '<br> <table width=\"100%\">'
+
+    with open(path, 'rb') as html_file:
+        if os.fstat(html_file.fileno()).st_size == 0:
+            print "Error: Unable to split file by the following string:" + \
+                    html_code
+            return
+
+        html_buffer = mmap.mmap(html_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header_end = html_buffer.find(html_code)
 
-    try:
-        with open(path, 'r') as html_file:
-            # Remove all new lines char, we don't need them since each line
-            # will represent a new index in the list
-            imsdb_movie_script = html_file.read().replace('\n', '')
+    if header_end == -1:
+        print "Error: Unable to split file by the following string:" + \
+                html_code
+        html_buffer.close()
+        return
 
-            # In the HTML page, everything that comes before the
-            # following HTML code is consider an header and useless
-            # for the movie info extraction
-            # TODO: This HTML line is hardcoded in the code, it could be
-            # somehow parameterized
-            html_code = '<br> <table width=\"100%\">'
+    script_start = header_end + len(html_code)
 
-            if html_code not in imsdb_movie_script:
-                print "Error: Unable to split file by the following string:" + \
-                        html_code
-                return
+    # The movie script ends where the HTML code shows up again, if it does
+    script_end = html_buffer.find(html_code, script_start)
 
-            regex_title = ur'(?<=<title>)(.*)(?=<\/title>)'
+    if script_end == -1:
+        script_end = len(html_buffer)
 
-            movie_title = re.search(regex_title, imsdb_movie_script)
+    title_start = html_buffer.find('<title>', 0, header_end)
 
-            imsdb_movie_script = imsdb_movie_script.split(html_code)[1]
+    if title_start == -1:
+        movie_title = None
+    else:
+        title_start += len('<title>')
+        title_end = html_buffer.find('</title>', title_start, header_end)
+        movie_title = html_buffer[title_start:title_end].replace('\n', '')
 
-            logger.info('File successfully opened: ' + filename)
+    logger.info('File successfully opened: ' + filename)
 
-            return imsdb_movie_script, movie_title.group(1)
-    except:
-        raise
+    return MovieScript(html_buffer, script_start, script_end), movie_title
 
 
 def load_config_file(filename, section):
@@ -0,0 +1,147 @@
+"""
+.. module:: freebase
+    :synopsis: A client of the Freebase API that reuses its HTTP connections
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import httplib
+import json
+import logging
+import Queue
+import socket
+import urllib
+import urlparse
+
+FREEBASE_URL = 'https://www.googleapis.com/freebase/v1'
+
+
+class FreebaseClient(object):
+    """Sends the requests to the Freebase API over a pool of keep-alive
+    connections.
+
+    Opening a connection (and the TLS handshake) costs more than most
+    requests, so the connections are kept open and reused by the following
+    requests. Up to "pool_size" connections are opened, which bounds the
+    number of requests at the same time.
+
+    The base URL can point to a local server which answers like Freebase.
+    """
+
+    def __init__(self, api_key, base_url=FREEBASE_URL, pool_size=4, timeout=30):
+        """Initializes the client, the connections are opened on demand.
+
+        Args:
+            api_key (String): The Google API's key used to access Freebase
+            base_url (String): The URL of the Freebase API
+            pool_size (int): Maximum number of connections
+            timeout (float): Timeout of the connections in seconds
+        """
+
+        url = urlparse.urlsplit(base_url)
+
+        if url.scheme == 'https':
+            self._connection_class = httplib.HTTPSConnection
+        else:
+            self._connection_class = httplib.HTTPConnection
+
+        self.api_key = api_key
+        self.host = url.netloc
+        self.path = url.path.rstrip('/')
+        self.timeout = timeout
+
+        self._pool = Queue.LifoQueue()
+        for _ in range(max(int(pool_size), 1)):
+            self._pool.put(None)
+
+    def search(self, query):
+        """Searches Freebase for a query.
+
+        Args:
+            query (String): The text to be searched
+
+        Returns:
+            dict: The decoded JSON response
+        """
+
+        return self.get_json('/search', {'query': query})
+
+    def topic(self, topic_id, property_filter):
+        """Looks up a property of a Freebase topic.
+
+        Args:
+            topic_id (String): The ID of the topic, for example "/m/0abc"
+            property_filter (String): The property to be looked up
+
+        Returns:
+            dict: The decoded JSON response
+        """
+
+        return self.get_json('/topic' + topic_id, {'filter': property_filter})
+
+    def get_json(self, path, params):
+        """Sends a GET request to the API and decodes the JSON response.
+
+        A request that fails on a reused connection is sent once more on a
+        new connection, since the server might have closed the idle one.
+
+        Args:
+            path (String): The path of the request relative to the base URL
+            params (dict): The query parameters, the API key is added to them
+
+        Returns:
+            dict: The decoded JSON response
+        """
+
+        logger = logging.getLogger(__name__)
+
+        params = dict(params, key=self.api_key)
+        url = self.path + path + '?' + urllib.urlencode(params)
+
+        logger.debug('Freebase request: ' + url)
+
+        connection = self._pool.get()
+
+        try:
+            for attempt in range(2):
+                reused = connection is not None
+
+                if connection is None:
+                    connection = self._connection_class(self.host, timeout=self.timeout)
+
+                try:
+                    connection.request('GET', url, headers={'Connection': 'keep-alive'})
+                    response = connection.getresponse()
+                    body = response.read()
+                except (httplib.HTTPException, socket.error):
+                    connection.close()
+                    connection = None
+
+                    if reused and attempt == 0:
+                        continue
+                    raise
+
+                if response.will_close:
+                    connection.close()
+                    connection = None
+
+                return json.loads(body)
+        finally:
+            self._pool.put(connection)
+
+    def close(self):
+        """Closes the idle connections."""
+
+        connections = []
+
+        while True:
+            try:
+                connections.append(self._pool.get_nowait())
+            except Queue.Empty:
+                break
+
+        for connection in connections:
+            if connection is not None:
+                connection.close()
+            self._pool.put(None)
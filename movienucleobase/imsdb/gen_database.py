@@ -1,24 +1,34 @@
 """
 .. module:: movienucleobase.py
-   :synopsis: Creates a SQLite database
+   :synopsis: Creates the MySql or SQLite database
 
 .. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
 .. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
 """
 
+import time
+
 import sqlalchemy as sql
-import utilities as util
-import os
+
+import imsdb.engines
 
 
 
-def build_database(movie):
+def build_database(movie, replace=False):
     """
-    Builds three mysql tables
+    Builds three tables, in MySql or SQLite (see imsdb.engines)
     movies - info relevant to movies
     chars  - info relevant to chars
     interactions - info relevant to interactions / mentions
     You need to create a your_db_here_.db file for this to work
+    The movies are told apart by their movie script, since several movie
+    scripts can have the same title
+    A movie already inserted from the same movie script is replaced if
+    replace is True, or if it was inserted with another fingerprint (another
+    draft of the movie script, other options), so that the next runs skip it
+    A movie inserted before the movie scripts were stored, with the same
+    title, is only replaced if it has no fingerprint either or the same one
+    A movie inserted from another movie script is never replaced
     """
 
     # Variables for chars table
@@ -27,24 +37,77 @@ def build_database(movie):
     # Variables for interactions table
     df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = movie.build_table_interactions()
 
-    script_dir = os.path.dirname(os.path.dirname(__file__))
-    rel_path = 'pass.txt'
-    abs_file_path = os.path.join(script_dir, rel_path)
+    # The engine is shared by all database helpers
+    # It grabs the user / password / ip of your MySql database from pass.txt
+    engine = imsdb.engines.get_engine()
 
-    # grabs the user / password / ip of your MySql database
-    var_user_pass_ip = []
+    conn = engine.connect()
 
-    for line in open(abs_file_path, 'r'):
-        var_user_pass_ip.append(line.split(":", 1)[1].rstrip())
+    create_tables(conn)
 
-    var_user_pass_ip = var_user_pass_ip[0] + ':' + var_user_pass_ip[1] + var_user_pass_ip[2]
+    # Checking if movie was already inserted, and with which fingerprint
+    stored_movies = find_stored_movies(conn, movie)
+    check_exists = len(stored_movies)
 
-    engine = sql.create_engine(
-        'mysql://' + var_user_pass_ip + '/movies?charset=utf8&use_unicode=True',
-        pool_size=100,
-        pool_recycle=3600)
+    if check_exists == 1 and not replace and \
+            (movie.fingerprint is None or stored_movies[0][1] == movie.fingerprint):
+        print 'Movie "' + movie.title + '" has already been inserted'
 
-    conn = engine.connect()
+        # The movies inserted before the movie scripts were stored get theirs
+        if stored_movies[0][2] is None and movie.script is not None:
+            conn.execute(sql.text('UPDATE movies SET script = :script ' +
+                                  'WHERE id_movie = :id_movie'),
+                         script=movie.script,
+                         id_movie=stored_movies[0][0])
+    elif check_exists > 1:
+        print 'There is a problem with your database'
+    else:
+        if check_exists == 1 and replace:
+            print 'Replacing the movie named..."' + movie.title + '"'
+        elif check_exists == 1:
+            print 'Replacing the movie named..."' + movie.title + '", ' + \
+                'inserted from another draft of the movie script or with other options'
+        else:
+            print 'Inserting a new movie named..."' + movie.title + '"'
+        # If it's a new movie then lets insert it
+        # The whole movie is written in a single transaction
+        start = time.time()
+
+        with conn.begin():
+            if check_exists == 1:
+                delete_movie(conn, stored_movies[0][0])
+
+            n_rows = insert_movie(conn,
+                                  movie.title,
+                                  zip(df_id_1,
+                                      df_names,
+                                      df_gender,
+                                      df_n_scenes_real,
+                                      [','.join(map(str, scenes)) for scenes in df_scenes_real]),
+                                  zip(df_char_1_id, df_char_2_id, df_number),
+                                  movie.fingerprint,
+                                  movie.script)
+
+        elapsed = time.time() - start
+
+        print 'Records for "' + movie.title + '" were created successfully!'
+        print '%d rows in %.2fs (%.0f rows/s)' % (n_rows, elapsed, n_rows / max(elapsed, 1e-6))
+
+    conn.close()
+
+
+def create_tables(conn):
+    """
+    Creates the tables that don't exist yet
+
+    conn -> Connection to the database
+    """
+
+    # MySql and SQLite only differ in the auto increment of the movie id
+    if conn.dialect.name == 'sqlite':
+        id_movie_type = 'INTEGER           PRIMARY KEY AUTOINCREMENT'
+    else:
+        id_movie_type = 'INT               PRIMARY KEY AUTO_INCREMENT'
 
     # Checks if table movies exists
     try:
@@ -53,11 +116,35 @@ def build_database(movie):
         # Creates it
         conn.execute('''CREATE TABLE movies
            (
-            id_movie     INT               PRIMARY KEY AUTO_INCREMENT,
-            dsc_movie    varchar(100)      NOT NULL
+            id_movie     ''' + id_movie_type + ''',
+            dsc_movie    varchar(100)      NOT NULL,
+            fingerprint  varchar(40)       ,
+            script       varchar(255)
             );'''
                      )
 
+    # Movies inserted before the fingerprints and the movie scripts were
+    # stored don't have them
+    for column, column_type in [('fingerprint', 'varchar(40)'), ('script', 'varchar(255)')]:
+        try:
+            conn.execute('select ' + column + ' from movies limit 1')
+        except:
+            conn.execute('ALTER TABLE movies ADD COLUMN ' + column + ' ' + column_type)
+
+    # The chars used to be keyed on their id alone, but the ids start again
+    # at 0 for each movie, so only one movie could be inserted. The chars
+    # and interactions of those databases are moved to new tables keyed on
+    # the movie and the id of the char
+    inspector = sql.inspect(conn)
+    legacy_tables = [table for table in ['interactions', 'chars']
+                     if table in inspector.get_table_names()]
+    legacy_keys = 'chars' in legacy_tables and \
+        inspector.get_pk_constraint('chars')['constrained_columns'] == ['id_char']
+
+    if legacy_keys:
+        for table in legacy_tables:
+            conn.execute('ALTER TABLE ' + table + ' RENAME TO ' + table + '_legacy')
+
     # Checks if table chars exists
     try:
         conn.execute('select 1 from chars')
@@ -65,7 +152,7 @@ def build_database(movie):
         # Data relevant to chars
         conn.execute('''CREATE TABLE chars
            (
-            id_char                  INT   PRIMARY KEY,
+            id_char                  INT   NOT NULL,
             fk_movie                 INT   NOT NULL,
             name                     TEXT  NOT NULL,
             gender                   TEXT  NOT NULL,
@@ -73,11 +160,12 @@ def build_database(movie):
             scenes_appeared          TEXT  NOT NULL,
             n_scenes_mention         TEXT  ,
             scenes_mentioned         TEXT  ,
+            PRIMARY KEY(fk_movie, id_char),
             FOREIGN KEY(fk_movie) REFERENCES movies(id_movie)
             );'''
                      )
 
-    # Checks if table chars exists
+    # Checks if table interactions exists
     try:
         conn.execute('select 1 from interactions')
     except:
@@ -91,57 +179,142 @@ def build_database(movie):
             n_interactions           INT   NOT NULL,
             type                     INT   NOT NULL,
             FOREIGN KEY(fk_movie) REFERENCES movies(id_movie),
-            FOREIGN KEY(fk_char_1) REFERENCES chars(id_char),
-            FOREIGN KEY(fk_char_2) REFERENCES chars(id_char)
+            FOREIGN KEY(fk_movie, fk_char_1) REFERENCES chars(fk_movie, id_char),
+            FOREIGN KEY(fk_movie, fk_char_2) REFERENCES chars(fk_movie, id_char)
             );'''
                      )
 
-    # Checking if movie was already inserted
-    check_exists = util.get_df_from_conn('SELECT count(*) as exist FROM movies WHERE dsc_movie = \'' + movie.title + '\'')
-    check_exists = check_exists['exist'].iloc[0]
+    if legacy_keys:
+        for table in reversed(legacy_tables):
+            columns = ', '.join(column['name'] for column in
+                                inspector.get_columns(table + '_legacy'))
 
-    if check_exists == 1:
-        print 'Movie "' + movie.title + '" has already been inserted'
-    elif check_exists > 1:
-        print 'There is a problem with your database'
-    else:
-        print 'Inserting a new movie named..."' + movie.title + '"'
-        # If it's a new movie then lets insert it
-        # Populating movies table
-        conn.execute(
-                     'insert into movies (dsc_movie) values (%s)',
-                     movie.title
-                     )
+            conn.execute('INSERT INTO ' + table + ' (' + columns + ') ' +
+                         'SELECT ' + columns + ' FROM ' + table + '_legacy')
 
-        # Getting id_movie
-        id_movie = util.get_df_from_conn('SELECT id_movie FROM movies WHERE dsc_movie = \'' + movie.title + '\'')
-
-        # Populating chars table
-        len_chars = len(df_id_1)
-        for i in range(len_chars):
-            conn.execute('insert into chars ' +
-                         '(fk_movie, id_char, name, gender, n_scenes, scenes_appeared)'
-                         'values (%s, %s, %s, %s, %s, %s)',
-                         (id_movie['id_movie'].iloc[0],
-                          df_id_1[i],
-                          df_names[i],
-                          df_gender[i],
-                          df_n_scenes_real[i],
-                          ','.join(map(str, df_scenes_real[i])),
-                          )
-                         )
-
-        # Populating interactions table
-        len_int = len(df_char_1_id)
-        for i in range(len_int):
-            conn.execute(
-                         'insert into interactions' +
-                         '(fk_movie, fk_char_1, fk_char_2, n_interactions, type)' +
-                         'values (%s, %s, %s, %s, %s)',
-                         (id_movie['id_movie'].iloc[0], df_char_1_id[i], df_char_2_id[i], df_number[i], 0)
-                         )
+        for table in legacy_tables:
+            conn.execute('DROP TABLE ' + table + '_legacy')
 
-        print 'Records for "' + movie.title + '" were created successfully!'
+    # Checks if the indexes exist
+    # The interactions are read by movie and by pair of chars, the chars of
+    # a movie are read through their primary key
+    indexes = [('interactions', 'interactions_movie_chars', ['fk_movie', 'fk_char_1', 'fk_char_2'])]
 
-    conn.close()
+    inspector = sql.inspect(conn)
+
+    for table, index_name, columns in indexes:
+        if index_name not in [index['name'] for index in inspector.get_indexes(table)]:
+            conn.execute('CREATE INDEX ' + index_name + ' ON ' + table +
+                         '(' + ', '.join(columns) + ')')
+
+
+def find_stored_movies(conn, movie):
+    """
+    Returns the (id_movie, fingerprint, script) rows of the movies which
+    were inserted from the movie script of the movie
+    The movies inserted before the movie scripts were stored are only
+    returned if they have the same title and, since they might come from
+    another movie script with the same title, no fingerprint or the same one
+
+    conn -> Connection to the database
+    movie -> The MovieData
+    """
+
+    if movie.script is not None:
+        rows = conn.execute(sql.text('SELECT id_movie, fingerprint, script FROM movies ' +
+                                     'WHERE script = :script'),
+                            script=movie.script).fetchall()
+
+        if rows:
+            return rows
+
+    rows = conn.execute(sql.text('SELECT id_movie, fingerprint, script FROM movies ' +
+                                 'WHERE script IS NULL AND dsc_movie = :title'),
+                        title=movie.title).fetchall()
+
+    return [row for row in rows if row[1] is None or row[1] == movie.fingerprint]
+
+
+def movie_already_inserted(fingerprint):
+    """
+    Checks if a movie with the given fingerprint was already inserted
+    Only needs the fingerprint, so it is called before parsing the script
+
+    fingerprint -> Hash of the movie script and of the pipeline configuration
+    """
+
+    conn = imsdb.engines.get_engine().connect()
+
+    try:
+        create_tables(conn)
+
+        check_exists = conn.execute(sql.text('SELECT count(*) FROM movies ' +
+                                             'WHERE fingerprint = :fingerprint'),
+                                    fingerprint=fingerprint).scalar()
+    finally:
+        conn.close()
+
+    return check_exists > 0
+
+
+def delete_movie(conn, id_movie):
+    """
+    Deletes a movie with its chars and interactions
+
+    conn -> Connection, the caller handles the transaction
+    id_movie -> Id of the movie
+    """
+
+    for table, column in [('interactions', 'fk_movie'),
+                          ('chars', 'fk_movie'),
+                          ('movies', 'id_movie')]:
+        conn.execute(sql.text('DELETE FROM ' + table + ' WHERE ' + column + ' = :id_movie'),
+                     id_movie=id_movie)
+
+
+def insert_movie(conn, title, chars_rows, interactions_rows, fingerprint=None, script=None):
+    """
+    Inserts a movie with its chars and interactions
+    Each table is written with a single executemany
+    Returns the number of rows inserted
+
+    conn -> Connection, the caller handles the transaction
+    title -> Title of the movie
+    chars_rows -> (id_char, name, gender, n_scenes, scenes_appeared) tuples
+    interactions_rows -> (fk_char_1, fk_char_2, n_interactions) tuples
+    fingerprint -> Hash of the movie script and of the pipeline configuration
+    script -> Name of the file of the movie script
+    """
+
+    # Populating movies table
+    # The id of the movie is taken from the insert itself
+    id_movie = conn.execute(sql.text('insert into movies (dsc_movie, fingerprint, script) ' +
+                                     'values (:title, :fingerprint, :script)'),
+                            title=title,
+                            fingerprint=fingerprint,
+                            script=script).lastrowid
+
+    # Populating chars table
+    chars_columns = ['id_char', 'name', 'gender', 'n_scenes', 'scenes_appeared']
+    chars_params = [dict(zip(chars_columns, row), fk_movie=id_movie) for row in chars_rows]
+
+    if chars_params:
+        conn.execute(sql.text('insert into chars ' +
+                              '(fk_movie, id_char, name, gender, n_scenes, scenes_appeared) ' +
+                              'values (:fk_movie, :id_char, :name, :gender, :n_scenes, ' +
+                              ':scenes_appeared)'),
+                     chars_params)
+
+    # Populating interactions table
+    # type = 0 - interaction
+    interactions_columns = ['fk_char_1', 'fk_char_2', 'n_interactions']
+    interactions_params = [dict(zip(interactions_columns, row), fk_movie=id_movie, type=0)
+                           for row in interactions_rows]
+
+    if interactions_params:
+        conn.execute(sql.text('insert into interactions ' +
+                              '(fk_movie, fk_char_1, fk_char_2, n_interactions, type) ' +
+                              'values (:fk_movie, :fk_char_1, :fk_char_2, :n_interactions, :type)'),
+                     interactions_params)
 
+    return 1 + len(chars_params) + len(interactions_params)
@@ -1 +1,136 @@
-""".. module:: movienucleobase.py   :synopsis: Writting information to files.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>"""import pandas as pdimport jsonimport imsdb.utilities as utilfrom json import dumpsdef build_df_chars(movie):    """    Builds dataframe with 5 columns    1 - Id    2 - Character name    3 - Character gender    4 - Number of scenes in which he appeared    5 - Character he interacted with    """    df_id_1, df_names, df_gender, df_n_scenes_real, df_scenes_real = movie.build_table_chars()    df_movie = {'id': pd.Series(df_id_1)                , 'name': pd.Series(df_names)                , 'gender': pd.Series(df_gender)                , 'nsceneappearances': pd.Series(df_n_scenes_real)                #, 'Scene_Appearances': pd.Series(df_scenes_real),                }    df = pd.DataFrame(df_movie)    return dfdef build_df_interactions(movie):    """    Builds a dataframe with 5 columns relative to interactions    1 - Character 1 Name    2 - Character 2 Name    3 - Character 1 Id    4 - Character 2 Id    5 - Number of Interactions    """    df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = movie.build_table_interactions()    df_movie = {'source': pd.Series(df_char_1)                , 'target': pd.Series(df_char_2)                , 'sourceid': pd.Series(df_char_1_id)                , 'targetid': pd.Series(df_char_2_id)                , 'ninteractions': pd.Series(df_number),                }    df = pd.DataFrame(df_movie)    return dfdef build_df_mentions(movie):    """    Builds dataframe with 5 columns relative to mentions    1 - Character 1 Name    2 - Character 2 Name    3 - Character 1 Id    4 - Character 2 Id    5 - Number of Interactions    """    df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = movie.build_table_mentions()    df_movie = {'source': pd.Series(df_char_1)                , 'target': pd.Series(df_char_2)                , 'sourceid': pd.Series(df_char_1_id)                , 'targetid': pd.Series(df_char_2_id)                , 'nmentions': pd.Series(df_number),                }    df = pd.DataFrame(df_movie)    return dfdef write_df(i_df, df_name):    # Write to the database    util.write_table_to_my_sql(i_df, df_name, '')    # Create a Pandas Excel writer    writer = pd.ExcelWriter(df_name + '.xlsx')    i_df.to_excel(writer, sheet_name='Sheet1')    writer.save()def write_nodes_edges_to_json(i_df_nodes, i_df_edges, json_name):    output = {"nodes": [], "links": []}    for d in i_df_nodes.to_dict(orient='records'):        output["nodes"].append(d)    for d in i_df_edges.to_dict(orient='records'):        output["links"].append(d)    json_out = dumps(output)    with open(json_name + '.json', 'w') as f:        f.write(str(json_out))
\ No newline at end of file
+"""
+.. module:: movienucleobase.py
+   :synopsis: Writting information to files
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import pandas as pd
+import itertools
+import json
+import imsdb.utilities as util
+
+# The columns are read by name, their order is only the layout of the
+# exported files, which is the alphabetical order of the frames formerly
+# built from dicts
+CHARS_COLUMNS = ['gender', 'id', 'name', 'nsceneappearances']
+INTERACTIONS_COLUMNS = ['ninteractions', 'source', 'sourceid', 'target', 'targetid']
+MENTIONS_COLUMNS = ['nmentions', 'source', 'sourceid', 'target', 'targetid']
+
+
+def build_df_chars(movie):
+    """
+    Builds dataframe with 4 columns
+    1 - Character gender (category)
+    2 - Id (int32)
+    3 - Character name (category)
+    4 - Number of scenes in which he appeared (int32)
+    """
+
+    df_id_1, df_names, df_gender, df_n_scenes_real, df_scenes_real = movie.build_table_chars()
+
+    df_movie = {'gender': pd.Categorical(df_gender),
+                'id': _int_column(df_id_1),
+                'name': pd.Categorical(df_names),
+                'nsceneappearances': _int_column(df_n_scenes_real)}
+
+    return pd.DataFrame(df_movie, columns=CHARS_COLUMNS)
+
+
+def build_df_interactions(movie):
+    """
+    Builds a dataframe with 5 columns relative to interactions
+    1 - Number of Interactions (int32)
+    2 - Character 1 Name (category)
+    3 - Character 1 Id (int32)
+    4 - Character 2 Name (category)
+    5 - Character 2 Id (int32)
+    """
+
+    df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = movie.build_table_interactions()
+
+    df_movie = _edges_columns(df_char_1, df_char_2, df_char_1_id, df_char_2_id)
+    df_movie['ninteractions'] = _int_column(df_number)
+
+    return pd.DataFrame(df_movie, columns=INTERACTIONS_COLUMNS)
+
+
+def build_df_mentions(movie):
+    """
+    Builds dataframe with 5 columns relative to mentions
+    1 - Number of Mentions (int32)
+    2 - Character 1 Name (category)
+    3 - Character 1 Id (int32)
+    4 - Character 2 Name (category)
+    5 - Character 2 Id (int32)
+    """
+
+    df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = movie.build_table_mentions()
+
+    df_movie = _edges_columns(df_char_1, df_char_2, df_char_1_id, df_char_2_id)
+    df_movie['nmentions'] = _int_column(df_number)
+
+    return pd.DataFrame(df_movie, columns=MENTIONS_COLUMNS)
+
+
+def _int_column(values):
+    """
+    Returns a typed array for a list of integers
+    """
+    return pd.Series(values, dtype='int32').values
+
+
+def _edges_columns(df_char_1, df_char_2, df_char_1_id, df_char_2_id):
+    """
+    Returns the source and target columns of an edges dataframe
+    Both name columns share the same categories
+    """
+    categories = sorted(set(df_char_1) | set(df_char_2))
+
+    return {'source': pd.Categorical(df_char_1, categories=categories),
+            'sourceid': _int_column(df_char_1_id),
+            'target': pd.Categorical(df_char_2, categories=categories),
+            'targetid': _int_column(df_char_2_id)}
+
+
+def write_df(i_df, df_name):
+
+    # Write to the database
+    util.write_table_to_my_sql(i_df, df_name, '')
+
+    # Create a Pandas Excel writer
+    writer = pd.ExcelWriter(df_name + '.xlsx')
+    i_df.to_excel(writer, sheet_name='Sheet1')
+    writer.save()
+
+
+def write_nodes_edges_to_json(i_df_nodes, i_df_edges, json_name):
+    """
+    Writes the nodes and the links of the social network to a JSON file
+    The document is encoded and written one record at a time
+    """
+    encoder = json.JSONEncoder()
+
+    with open(json_name + '.json', 'w') as f:
+        f.write('{"nodes": [')
+        _write_records(f, encoder, i_df_nodes)
+        f.write('], "links": [')
+        _write_records(f, encoder, i_df_edges)
+        f.write(']}')
+
+
+def _write_records(f, encoder, df):
+    """
+    Writes the rows of a dataframe as JSON objects separated by commas
+    The values are converted column by column to Python types
+    """
+    columns = list(df.columns)
+    values = [df[column].tolist() for column in columns]
+
+    for i, row in enumerate(itertools.izip(*values)):
+        if i:
+            f.write(', ')
+
+        for chunk in encoder.iterencode(dict(zip(columns, row))):
+            f.write(chunk)
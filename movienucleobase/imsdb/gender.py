@@ -0,0 +1,158 @@
+"""
+.. module:: gender
+    :synopsis: A module that resolves the gender of all characters of a movie at once
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import httplib
+import logging
+import os
+import threading
+import multiprocessing.pool
+
+import imsdb.dataadjustment
+import imsdb.filehandlers
+import imsdb.freebase
+
+
+class GenderResolver(object):
+    """Resolves the gender of the movie characters.
+
+    The gender comes either from the section "gender" of the configuration
+    file, which is parsed only once, or from Freebase. The Freebase lookups
+    of a movie are sent as a batch over the pooled connections of a single
+    FreebaseClient, and the genders already resolved are cached by real
+    name.
+
+    Without the file of the Google API key, the genders are not looked up
+    on Freebase and the characters keep an empty gender. A lookup that
+    fails gives "nogender", so Freebase being down doesn't stop the movie.
+    """
+
+    def __init__(self, config=None, bypass_gender_retrieval=False, api_key_path='api_key',
+                 freebase_url=imsdb.freebase.FREEBASE_URL, concurrency=4):
+        """Initializes the resolver, nothing is loaded until it is used.
+
+        Args:
+            config (String): Name of the configuration file
+            bypass_gender_retrieval (Bool): Read the genders from the
+            configuration file instead of Freebase
+            api_key_path (String): The path to the text file containing the
+            Google API's key
+            freebase_url (String): The URL of the Freebase API
+            concurrency (int): Maximum number of Freebase lookups at the same
+            time, which is also the number of pooled connections
+        """
+
+        self.config = config
+        self.bypass_gender_retrieval = bypass_gender_retrieval
+        self.api_key_path = api_key_path
+        self.freebase_url = freebase_url
+        self.concurrency = max(int(concurrency), 1)
+
+        self._config_genders = None
+        self._freebase_client = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def config_genders(self):
+        """
+        Returns the genders of the configuration file, keyed by lower case name
+        """
+        if self._config_genders is None:
+            self._config_genders = imsdb.filehandlers.load_config_file(self.config, 'gender')
+
+        return self._config_genders
+
+    @property
+    def freebase_client(self):
+        """
+        Returns the Freebase client, the API key is read on the first call
+        """
+        if self._freebase_client is None:
+            with open(self.api_key_path) as api_key_file:
+                api_key = api_key_file.read().strip()
+
+            self._freebase_client = imsdb.freebase.FreebaseClient(api_key,
+                                                                  self.freebase_url,
+                                                                  self.concurrency)
+
+        return self._freebase_client
+
+    def resolve(self, characters):
+        """Sets the gender of each character.
+
+        Args:
+            characters (list of MovieCharacter): The characters of the movie
+        """
+
+        logger = logging.getLogger(__name__)
+
+        if self.bypass_gender_retrieval:
+            for character in characters:
+                character.gender = self.config_genders[character.name.lower()]
+        elif not os.path.exists(self.api_key_path):
+            logger.warning('No Google API key in ' + self.api_key_path +
+                           ', the genders are not retrieved from Freebase')
+        else:
+            genders = self.retrieve_genders([character.real_name for character in characters])
+
+            for character, gender in zip(characters, genders):
+                character.gender = gender
+
+    def retrieve_genders(self, real_names):
+        """Retrieves the gender of each real name from Freebase.
+
+        Only the real names missing in the cache are looked up, each one
+        once.
+
+        Args:
+            real_names (list of String): The characters' real names
+
+        Returns:
+            list of String: The gender of each real name, in the same order
+        """
+
+        logger = logging.getLogger(__name__)
+
+        with self._lock:
+            missing = sorted(set(name for name in real_names
+                                 if name is not None and name not in self._cache))
+
+        if missing:
+            logger.info('Retrieving the gender of %d characters' % len(missing))
+
+            client = self.freebase_client
+            pool = multiprocessing.pool.ThreadPool(min(self.concurrency, len(missing)))
+
+            try:
+                genders = pool.map(lambda name: _retrieve_gender(name, client), missing)
+            finally:
+                pool.close()
+                pool.join()
+
+            with self._lock:
+                self._cache.update(zip(missing, genders))
+
+        return [self._cache[name] if name is not None else 'nogender' for name in real_names]
+
+    def close(self):
+        """Closes the connections to Freebase."""
+
+        if self._freebase_client is not None:
+            self._freebase_client.close()
+
+
+def _retrieve_gender(real_name, freebase_client):
+    """Retrieves the gender of a real name, "nogender" if the lookup fails."""
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        return imsdb.dataadjustment.retrieve_character_gender(real_name, freebase_client)
+    except (EnvironmentError, httplib.HTTPException, ValueError) as error:
+        logger.warning('Unable to retrieve the gender of ' + real_name + ': ' + str(error))
+        return 'nogender'
@@ -0,0 +1,143 @@
+"""
+.. module:: interactions
+    :synopsis: A module that counts the interactions between characters from a scene x character matrix
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+import numpy as np
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+
+class SceneIncidence(object):
+    """Records the characters that speak in each scene and counts their
+    interactions in a single batched computation.
+
+    Each scene is a row and each character a column of the incidence matrix
+    A, where A[scene, character] = 1 if the character speaks in the scene.
+    The rows are kept in the CSR format (column ids of each row plus the
+    offsets of the rows), so recording a scene only appends integers.
+
+    Once all scenes are recorded:
+        - The product A^T * A gives, outside of the diagonal, the number of
+        scenes in which two characters speak together, which is the number
+        of interactions between them
+        - The diagonal gives the number of scenes of each character
+        - The columns of A give the scenes in which each character appears
+
+    SciPy sparse matrices are used if SciPy is installed, otherwise the
+    matrix is built as a dense NumPy array.
+    """
+
+    def __init__(self, characters):
+        """Initializes the matrix for a list of characters.
+
+        Args:
+            characters (list of MovieCharacter): List of all characters in
+            the movie, each one becomes a column of the matrix
+        """
+
+        self._characters = characters
+        self._columns = {}
+
+        for column, character in enumerate(characters):
+            self._columns.setdefault(character.name, column)
+
+        self._scene_numbers = []
+        self._indices = []
+        self._indptr = [0]
+
+    @property
+    def n_scenes(self):
+        """
+        Returns the number of scenes recorded
+        """
+        return len(self._scene_numbers)
+
+    def add_scene(self, scene_number, names):
+        """Records the characters that speak in a scene.
+
+        The names that don't belong to any character are ignored.
+
+        Args:
+            scene_number (int): The number of the scene
+            names (list of str): Names of the characters speaking in the scene
+        """
+
+        columns = set(self._columns[name] for name in names if name in self._columns)
+
+        self._scene_numbers.append(scene_number)
+        self._indices.extend(sorted(columns))
+        self._indptr.append(len(self._indices))
+
+    def incidence_matrix(self):
+        """Returns the scene x character incidence matrix.
+
+        Returns:
+            scipy.sparse.csr_matrix or numpy.ndarray: The incidence matrix
+        """
+
+        shape = (len(self._scene_numbers), len(self._characters))
+        data = np.ones(len(self._indices), dtype=np.int32)
+        indices = np.array(self._indices, dtype=np.int32)
+        indptr = np.array(self._indptr, dtype=np.int32)
+
+        if scipy is not None:
+            return scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)
+
+        matrix = np.zeros(shape, dtype=np.int32)
+        matrix[np.repeat(np.arange(shape[0]), np.diff(indptr)), indices] = 1
+
+        return matrix
+
+    def update_characters(self):
+        """Sets the appeared scenes and the interactions of every character.
+
+        A character interacts with every other character that speaks in the
+        same scene, once per scene. The interactions are keyed by the ids of
+        the characters.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        matrix = self.incidence_matrix()
+        scene_numbers = np.array(self._scene_numbers, dtype=np.int32)
+
+        if scipy is not None:
+            cooccurrences = (matrix.T * matrix).tocsr()
+            by_character = matrix.tocsc()
+
+            appeared = [scene_numbers[by_character.indices[by_character.indptr[column]:
+                                                           by_character.indptr[column + 1]]]
+                        for column in range(len(self._characters))]
+            interacted = [zip(cooccurrences.indices[cooccurrences.indptr[column]:
+                                                    cooccurrences.indptr[column + 1]],
+                              cooccurrences.data[cooccurrences.indptr[column]:
+                                                 cooccurrences.indptr[column + 1]])
+                          for column in range(len(self._characters))]
+        else:
+            cooccurrences = matrix.T.dot(matrix)
+
+            appeared = [scene_numbers[np.flatnonzero(matrix[:, column])]
+                        for column in range(len(self._characters))]
+            interacted = [[(other, cooccurrences[column, other])
+                           for other in np.flatnonzero(cooccurrences[column])]
+                          for column in range(len(self._characters))]
+
+        for column, character in enumerate(self._characters):
+            interaction_counts = {}
+
+            for other, n_interactions in interacted[column]:
+                if other != column:
+                    interaction_counts[self._characters[other].id] = int(n_interactions)
+
+            character.set_scene_statistics(appeared[column], interaction_counts)
+
+            logger.debug('The character ' + character.name + ' appears in ' +
+                         str(len(appeared[column])) + ' scenes')
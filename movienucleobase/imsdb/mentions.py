@@ -0,0 +1,134 @@
+"""
+.. module:: mentions
+    :synopsis: A module that detects the characters mentioned in the movie lines
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import re
+
+
+class MentionDetector(object):
+    """Finds every character mentioned in a movie line in a single pass.
+
+    A character is mentioned in a movie line if its name shows up anywhere
+    in the line, ignoring the case. The detector is built once per movie:
+    all names are lowercased and compiled into one regex shaped like a trie
+    (for example "SAM" and "SAMWISE" become "sam(?:wise)?"), so that the
+    regex engine walks the trie at each position of the line instead of
+    trying every name, and finds the longest name that starts there.
+
+    The shorter names that start at the same position are prefixes of the
+    longest one, so they are added through a precomputed table. This way
+    names inside other names, like "SAM" in "SAMWISE", are still detected.
+
+    The speaking characters are resolved through a dictionary.
+    """
+
+    def __init__(self, characters):
+        """Builds the detector for a list of characters.
+
+        Args:
+            characters (list of MovieCharacter): List of all characters in
+            the movie
+        """
+
+        self._characters = characters
+        self._speakers = {}
+
+        # Lowercased name -> positions of the characters in the list
+        positions = {}
+
+        for position, character in enumerate(characters):
+            self._speakers.setdefault(character.name, character)
+
+            if character.name:
+                positions.setdefault(character.name.lower(), []).append(position)
+
+        # Lowercased name -> positions of the characters whose names are
+        # prefixes of that name, including the name itself
+        self._prefix_positions = {}
+
+        for name in positions:
+            self._prefix_positions[name] = [p for i in range(1, len(name) + 1)
+                                            for p in positions.get(name[:i], ())]
+
+        if positions:
+            self._regex = re.compile('(?=(' + _trie_pattern(_build_trie(positions)) + '))')
+        else:
+            self._regex = None
+
+    def speaker(self, name):
+        """Returns the character with the given name, None if there isn't one.
+
+        Args:
+            name (string): The name of the character in the movie script
+
+        Returns:
+            MovieCharacter: The character with the given name
+        """
+
+        return self._speakers.get(name)
+
+    def find_mentioned(self, movie_line):
+        """Returns the characters mentioned in a movie line.
+
+        Args:
+            movie_line (string): The movie line
+
+        Returns:
+            list of MovieCharacter: The mentioned characters, in the same
+            order as the list of characters of the movie
+        """
+
+        if self._regex is None:
+            return []
+
+        positions = set()
+
+        for match in self._regex.finditer(movie_line.lower()):
+            positions.update(self._prefix_positions[match.group(1)])
+
+        return [self._characters[position] for position in sorted(positions)]
+
+
+def _build_trie(names):
+    """Builds a trie of nested dictionaries, '' marks the end of a name."""
+
+    trie = {}
+
+    for name in names:
+        node = trie
+
+        for char in name:
+            node = node.setdefault(char, {})
+
+        node[''] = {}
+
+    return trie
+
+
+def _trie_pattern(trie):
+    """Turns a trie into a regex that matches the longest name in it.
+
+    Every branch of a node starts with a different char, so at most one of
+    them matches, and the greedy '?' tries to continue a name before ending
+    it, which makes the first match found the longest one.
+    """
+
+    branches = [re.escape(char) + _trie_pattern(node)
+                for char, node in sorted(trie.iteritems()) if char]
+
+    if not branches:
+        return ''
+
+    if len(branches) == 1:
+        pattern = branches[0]
+    else:
+        pattern = '(?:' + '|'.join(branches) + ')'
+
+    if '' in trie:
+        pattern = '(?:' + pattern + ')?'
+
+    return pattern
@@ -0,0 +1,172 @@
+"""
+.. module:: metricscache
+    :synopsis: A module that keeps the metrics of the social networks already computed
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+# Changing the metrics computed by social_net changes the keys, so the
+# metrics cached by the older versions are not used
+METRICS_VERSION = 1
+
+
+class MetricsCache(object):
+    """On-disk cache of the metrics dataframes returned by
+    social_net.return_metrics().
+
+    The key of an entry is a hash of the nodes, of the weighted edges and of
+    the parameters of the metrics, so a movie whose social network didn't
+    change gets its metrics back without computing them again. Each entry is
+    a pickled dataframe in the cache directory.
+
+    The total size of the entries is bounded, once the bound is exceeded the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, directory, max_size=256 * 1024 * 1024):
+        """Opens the cache, creating the directory if it doesn't exist.
+
+        Args:
+            directory (string): Directory of the cache
+            max_size (int): Maximum size of the entries in bytes
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def key(nodes, edges, **params):
+        """Computes the key of a social network.
+
+        The key doesn't depend on the order of the rows, nor on the
+        direction of the edges.
+
+        Args:
+            nodes (DataFrame): The nodes, as built by gen_dataframe.build_df_chars()
+            edges (DataFrame): The edges, as built by
+            gen_dataframe.build_df_interactions()
+            params: The parameters of the metrics
+
+        Returns:
+            String: The SHA-1 hex digest of the social network
+        """
+
+        canonical_nodes = sorted(zip(nodes['id'].tolist(),
+                                     nodes['name'].tolist(),
+                                     nodes['gender'].tolist(),
+                                     nodes['nsceneappearances'].tolist()))
+
+        canonical_edges = sorted((min(source, target), max(source, target), weight)
+                                 for source, target, weight in zip(edges['sourceid'].tolist(),
+                                                                   edges['targetid'].tolist(),
+                                                                   edges['ninteractions'].tolist()))
+
+        digest = hashlib.sha1('version:%d\n' % METRICS_VERSION)
+        digest.update('nodes:%r\n' % canonical_nodes)
+        digest.update('edges:%r\n' % canonical_edges)
+        digest.update('params:%r\n' % sorted(params.items()))
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Looks up the metrics of a social network.
+
+        Args:
+            key (String): The key of the social network
+
+        Returns:
+            DataFrame: The metrics, None if not found
+        """
+
+        import pandas as pd
+
+        logger = logging.getLogger(__name__)
+
+        path = self._path(key)
+
+        try:
+            df_metrics = pd.read_pickle(path)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            logger.warning('Discarding the unreadable metrics cache entry: ' + path)
+            self._remove(path)
+            return None
+
+        # The access time is not reliable on every file system, so the last
+        # use is recorded in the modification time
+        os.utime(path, None)
+
+        return df_metrics
+
+    def set(self, key, df_metrics):
+        """Stores the metrics of a social network.
+
+        Args:
+            key (String): The key of the social network
+            df_metrics (DataFrame): The metrics
+        """
+
+        # The entry is written to a temporary file and then renamed, so
+        # another process never reads a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(handle)
+
+        try:
+            df_metrics.to_pickle(temp_path)
+            os.rename(temp_path, self._path(key))
+        except:
+            self._remove(temp_path)
+            raise
+
+        self._evict()
+
+    def _path(self, key):
+        """Returns the path of the entry of a key."""
+
+        return os.path.join(self.directory, key + '.pkl')
+
+    @staticmethod
+    def _remove(path):
+        """Removes a file, ignoring the files already removed."""
+
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Removes the least recently used entries above the size bound."""
+
+        logger = logging.getLogger(__name__)
+
+        entries = []
+
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, filename))
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, filename))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, filename in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            self._remove(os.path.join(self.directory, filename))
+            total_size -= size
+
+            logger.info('Evicted the metrics cache entry: ' + filename)
@@ -0,0 +1,197 @@
+"""
+.. module:: nameindex
+    :synopsis: A module that finds similar or contained character names without comparing every pair
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import collections
+import difflib
+import math
+
+
+class SimilarNameIndex(object):
+    """Index of names that answers if a similar name was already added.
+
+    Two names are similar if the ratio of difflib.SequenceMatcher between
+    them is strictly above the threshold, the same ratio computed by
+    comparing a name against every other name. The index only computes that
+    ratio for the names that pass two cheap bounds:
+
+        (1) Length bound
+        The ratio is 2 * M / T, where M is the number of matching chars
+        and T the sum of both lengths. Since M can't be bigger than the
+        shortest name, names with very different lengths are never similar.
+
+        (2) Bigram bound
+        The matching chars come in blocks, and two consecutive blocks are
+        always separated by at least one unmatched char, so there are at
+        most T - 2 * M + 1 blocks. A block of length k has k - 1 bigrams
+        in common with the other name, so both names share at least
+        3 * M - T - 1 bigrams. If the ratio is above the threshold t, M is
+        above t * T / 2 and the shared bigrams are above (1.5 * t - 1) * T - 1.
+
+    The names that share bigrams with the query are found through an
+    inverted index, so a query only visits the names it has something in
+    common with.
+
+    Attributes:
+        threshold (float): Ratio above which two names are similar
+    """
+
+    def __init__(self, threshold=0.9):
+        """Initializes an empty index.
+
+        Args:
+            threshold (float): Ratio above which two names are similar
+        """
+
+        self.threshold = threshold
+
+        self._names = []
+        self._matchers = []
+        self._name_ids = {}
+        self._names_by_length = collections.defaultdict(list)
+        self._bigram_postings = collections.defaultdict(list)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._name_ids
+
+    def add(self, name):
+        """Adds a name to the index.
+
+        Args:
+            name (string): The name to be added
+        """
+
+        if name in self._name_ids:
+            return
+
+        name_id = len(self._names)
+
+        self._names.append(name)
+        self._name_ids[name] = name_id
+        self._names_by_length[len(name)].append(name_id)
+
+        # The matcher keeps the name as its second sequence, which is the
+        # one difflib preprocesses
+        self._matchers.append(difflib.SequenceMatcher(None, '', name))
+
+        for bigram, count in _bigrams(name).iteritems():
+            self._bigram_postings[bigram].append((name_id, count))
+
+    def has_similar(self, name):
+        """Checks if any name in the index is similar to the given name.
+
+        The name is always the first sequence of difflib.SequenceMatcher and
+        the names in the index the second one.
+
+        Args:
+            name (string): The name to be checked
+
+        Returns:
+            Bool: True if there is a similar name in the index, False otherwise
+        """
+
+        if name in self._name_ids:
+            return 1.0 > self.threshold
+
+        threshold = self.threshold
+        length = len(name)
+
+        # (1) Length bound: the other length must lie within this range
+        min_length = int(length * threshold / (2 - threshold)) + 1
+        max_length = length * (2 - threshold) / threshold
+
+        # (2) Bigram bound
+        shared_bigrams = collections.defaultdict(int)
+
+        for bigram, count in _bigrams(name).iteritems():
+            for name_id, other_count in self._bigram_postings.get(bigram, ()):
+                shared_bigrams[name_id] += min(count, other_count)
+
+        candidates = []
+
+        for name_id, shared in shared_bigrams.iteritems():
+            other_length = len(self._names[name_id])
+
+            if min_length <= other_length < max_length and \
+                    shared > self._min_shared_bigrams(length + other_length):
+                candidates.append(name_id)
+
+        # Only very short names can be similar without any common bigram
+        for other_length in range(min_length, int(math.ceil(max_length))):
+            if self._min_shared_bigrams(length + other_length) < 0:
+                candidates.extend(name_id for name_id in self._names_by_length.get(other_length, ())
+                                  if name_id not in shared_bigrams)
+
+        for name_id in candidates:
+            matcher = self._matchers[name_id]
+            matcher.set_seq1(name)
+
+            if matcher.ratio() > threshold:
+                return True
+
+        return False
+
+    def _min_shared_bigrams(self, total_length):
+        """Returns the bigrams two similar names must share above this value."""
+
+        return (1.5 * self.threshold - 1) * total_length - 1
+
+
+class SubstringIndex(object):
+    """Index of names that answers if a name is part of a name already added.
+
+    Every substring of the names added is kept in a set, so a query is a
+    single lookup instead of a scan of all names. The names of the movie
+    characters are short, a name of n chars only has n * (n + 1) / 2
+    substrings.
+    """
+
+    def __init__(self):
+        """Initializes an empty index."""
+
+        self._substrings = set()
+
+    def __contains__(self, name):
+        """Checks if the name is part of any name in the index.
+
+        Args:
+            name (string): The name to be checked
+
+        Returns:
+            Bool: True if the name is a substring of a name in the index,
+            False otherwise
+        """
+
+        return name in self._substrings
+
+    def add(self, name):
+        """Adds a name to the index.
+
+        Args:
+            name (string): The name to be added
+        """
+
+        if name in self._substrings:
+            return
+
+        for start in range(len(name)):
+            for end in range(start + 1, len(name) + 1):
+                self._substrings.add(name[start:end])
+
+
+def _bigrams(name):
+    """Returns the number of occurrences of each bigram of the name."""
+
+    bigrams = collections.defaultdict(int)
+
+    for i in range(len(name) - 1):
+        bigrams[name[i:i + 2]] += 1
+
+    return bigrams
@@ -0,0 +1,553 @@
+"""
+.. module:: pipeline
+    :synopsis: Runs the whole analysis of a single movie script
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import hashlib
+import logging
+import os
+import re
+
+# The modules which pull in heavy dependencies (pandas, numpy, networkx,
+# sqlalchemy, pyarrow) are imported by the functions that use them, so that
+# parsing the command line and skipping the movies already inserted is fast
+import imsdb.filehandlers
+import imsdb.dataextraction
+import imsdb.datastructures
+import imsdb.engines
+import imsdb.freebase
+import imsdb.mentions
+import imsdb.metricscache
+import imsdb.realnames
+import imsdb.scenecache
+import imsdb.snapshot
+import imsdb.tokenizer
+import imsdb.wikiacache
+
+# Changing the analysis done by the pipeline changes the fingerprints, so the
+# movies inserted by the older versions are processed again
+FINGERPRINT_VERSION = 1
+
+# The options of the command line which change the analysis of a movie
+FINGERPRINT_OPTIONS = ['sub_wikia', 'nscenes', 'bypass_gender_retrieval']
+
+
+def add_pipeline_arguments(parser):
+    """Adds the options of the pipeline to a command line parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The command line parser
+    """
+
+    parser.add_argument('--scripts_dir',
+                        help='Directory containing the movie scripts',
+                        default='scripts')
+
+    parser.add_argument('--config',
+                        help='Name of the configuration file')
+
+    parser.add_argument('--nscenes',
+                        help='Number of scenes to process')
+
+    parser.add_argument('--sub_wikia',
+                        help='The subwikia associated to the movie')
+
+    parser.add_argument('--bypass_gender_retrieval',
+                        help='Bypass the retrieval of gender from freebase, the genders ' +
+                             'are read from the section "gender" of the configuration file',
+                        action='store_true')
+
+    parser.add_argument('--freebase_url',
+                        help='URL of the Freebase API used to retrieve the gender',
+                        default=imsdb.freebase.FREEBASE_URL)
+
+    parser.add_argument('--database',
+                        help='Database backend where the movies are stored',
+                        choices=imsdb.engines.BACKENDS,
+                        default='mysql')
+
+    parser.add_argument('--sqlite_path',
+                        help='File of the SQLite database',
+                        default='movies.sqlite')
+
+    parser.add_argument('--betweenness_k',
+                        help='Estimate the betweenness centrality from k sampled nodes ' +
+                             'instead of computing it exactly',
+                        type=int)
+
+    parser.add_argument('--metrics_seed',
+                        help='Seed of the sampling of the betweenness centrality',
+                        type=int,
+                        default=0)
+
+    parser.add_argument('--metrics_cache',
+                        help='Directory caching the metrics of the social networks, ' +
+                             'an empty string disables the cache',
+                        default='metrics_cache')
+
+    parser.add_argument('--metrics_cache_size',
+                        help='Maximum size of the metrics cache in MB',
+                        type=float,
+                        default=256)
+
+    parser.add_argument('--export_dir',
+                        help='Directory where the chars, interactions, mentions and metrics ' +
+                             'are exported as Parquet files, partitioned by movie (needs pyarrow)')
+
+    parser.add_argument('--force',
+                        help='Process the movie even if it was already inserted in the database',
+                        action='store_true')
+
+    parser.add_argument('--scene_cache',
+                        help='SQLite file caching the speakers and mentions of each scene, ' +
+                             'so that only the scenes edited since a previous run are ' +
+                             'processed again, an empty string disables the cache',
+                        default='scene_cache.sqlite')
+
+    parser.add_argument('--scene_cache_size',
+                        help='Maximum number of scenes in the scene cache',
+                        type=int,
+                        default=100000)
+
+    parser.add_argument('--snapshot_dir',
+                        help='Directory where the parsed movies are saved as snapshots, ' +
+                             'which can be given instead of the movie scripts, ' +
+                             'an empty string disables the snapshots',
+                        default='snapshots')
+
+    parser.add_argument('--wikia_cache',
+                        help='SQLite file caching the real names resolved through ' +
+                             'the wikia, an empty string disables the cache',
+                        default='wikia_cache.sqlite')
+
+    parser.add_argument('--wikia_cache_ttl',
+                        help='Days after which the cached real names expire, the ' +
+                             'characters not resolved by the wikia expire after ' +
+                             'one day or less',
+                        type=float,
+                        default=30)
+
+    parser.add_argument('--wikia_workers',
+                        help='Maximum number of wikia lookups at the same time',
+                        type=int,
+                        default=8)
+
+    parser.add_argument('--wikia_rate',
+                        help='Maximum number of wikia lookups per second, 0 for no limit',
+                        type=float,
+                        default=10)
+
+
+def check_pipeline_arguments(parser, args):
+    """Checks the options of the pipeline once the command line is parsed.
+
+    The options which can't be honored stop the command line with an error
+    before any movie is processed.
+
+    Args:
+        parser (argparse.ArgumentParser): The command line parser
+        args (argparse.Namespace): The options of the command line
+    """
+
+    if getattr(args, 'bypass_gender_retrieval', False) and not getattr(args, 'config', None):
+        parser.error('--bypass_gender_retrieval reads the genders from the ' +
+                     'configuration file, give it with --config')
+
+    if getattr(args, 'export_dir', None):
+        import imsdb.export
+
+        try:
+            imsdb.export.check_available()
+        except ImportError as error:
+            parser.error(str(error))
+
+
+def movie_fingerprint(filename, args):
+    """Computes the fingerprint of a movie script and of the pipeline options.
+
+    The fingerprint is stored with the movie in the database, a movie with
+    the same fingerprint can be skipped before parsing its script. It is
+    computed once per movie and handed over to process_movie().
+
+    The fingerprint of a snapshot is the one of the movie script it was
+    parsed from, it is read from the header of the snapshot.
+
+    Args:
+        filename (string): Name of the file containing the movie script,
+        or path of a snapshot
+        args (argparse.Namespace): The options of the command line
+
+    Returns:
+        String: The SHA-1 hex digest of the movie script, the configuration
+        file and the options that change the analysis
+    """
+
+    if imsdb.snapshot.is_snapshot(filename):
+        return imsdb.snapshot.snapshot_fingerprint(filename)
+
+    fingerprint = hashlib.sha1('version:%d\n' % FINGERPRINT_VERSION)
+
+    path = os.path.join(getattr(args, 'scripts_dir', 'scripts'), filename)
+
+    with open(path, 'rb') as script_file:
+        for chunk in iter(lambda: script_file.read(1 << 16), ''):
+            fingerprint.update(chunk)
+
+    for option in FINGERPRINT_OPTIONS:
+        fingerprint.update('\n%s:%r' % (option, getattr(args, option, None)))
+
+    if getattr(args, 'config', None):
+        with open(args.config, 'rb') as config_file:
+            fingerprint.update('\nconfig:' + config_file.read())
+
+    return fingerprint.hexdigest()
+
+
+def movie_already_inserted(fingerprint, args):
+    """Checks if the movie was inserted in the database with the same fingerprint.
+
+    Args:
+        fingerprint (String): The fingerprint of the movie, see
+        movie_fingerprint()
+        args (argparse.Namespace): The options of the command line
+
+    The check is skipped for the runs which only sample a few scenes
+    (option "nscenes"), so they don't need the database. If the database
+    can't be reached or isn't configured, the movie is processed.
+
+    Returns:
+        Bool: True if the movie can be skipped, always False with the options
+        "force" and "nscenes"
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if getattr(args, 'force', False) or getattr(args, 'nscenes', None):
+        return False
+
+    try:
+        import sqlalchemy.exc
+        import imsdb.gen_database
+    except ImportError as error:
+        logger.warning('Unable to check if the movie was already inserted: ' + str(error))
+        return False
+
+    try:
+        return imsdb.gen_database.movie_already_inserted(fingerprint)
+    except (ImportError, EnvironmentError, IndexError, sqlalchemy.exc.SQLAlchemyError) as error:
+        # ImportError: missing database driver
+        # EnvironmentError and IndexError: missing or malformed credentials
+        logger.warning('Unable to check if the movie was already inserted: ' + str(error))
+        return False
+
+
+def process_movie(filename, args, fingerprint=None):
+    """Runs the whole pipeline for a single movie script.
+
+    The movie script is parsed, the characters are resolved, the
+    interactions are counted and the results are written to the JSON file
+    of the social network and to the database.
+
+    The parsed movie is saved as a snapshot named after the movie script.
+    If a snapshot is given instead of a movie script, the movie is
+    reloaded from it and only the stages after the parsing are run, with
+    no network lookups.
+
+    Args:
+        filename (string): Name of the file containing the movie script,
+        or path of a snapshot
+        args (argparse.Namespace): The options of the command line:
+            - config: Name of the configuration file
+            - nscenes: Number of scenes to process
+            - sub_wikia: The subwikia associated to the movie
+            - bypass_gender_retrieval: Bypass the retrieval of gender
+            - freebase_url: The URL of the Freebase API
+            - scripts_dir: Directory containing the movie script
+            - force: Replace the movie if it was already inserted
+            - export_dir: Directory of the exported Parquet files
+            - betweenness_k: Number of nodes sampled for the betweenness
+            - metrics_seed: Seed of the sampling of the betweenness
+            - metrics_cache: Directory caching the metrics
+            - metrics_cache_size: Maximum size of the metrics cache in MB
+            - wikia_cache: SQLite file caching the real names
+            - wikia_cache_ttl: Days after which the cached real names expire
+            - wikia_workers: Maximum number of wikia lookups at the same time
+            - wikia_rate: Maximum number of wikia lookups per second
+            - scene_cache: SQLite file caching the results of the scenes
+            - scene_cache_size: Maximum number of scenes in the scene cache
+            - snapshot_dir: Directory of the snapshots of the parsed movies
+        fingerprint (String): The fingerprint of the movie, computed from
+        the movie script if not given
+
+    Returns:
+        MovieData: The analyzed movie, None if the movie script is empty
+    """
+
+    logger = logging.getLogger(__name__)
+
+    # The JSON file, the exported files and the snapshot are named after
+    # the movie script
+    movie_name = os.path.splitext(os.path.basename(filename))[0]
+
+    if imsdb.snapshot.is_snapshot(filename):
+        movie = imsdb.snapshot.load_snapshot(filename)
+
+        logger.info('Movie loaded from the snapshot: ' + filename)
+    else:
+        movie = parse_movie(filename, args, fingerprint)
+
+        if movie is None:
+            return
+
+        if getattr(args, 'snapshot_dir', None):
+            imsdb.snapshot.save_snapshot(movie,
+                                         os.path.join(args.snapshot_dir,
+                                                      movie_name +
+                                                      imsdb.snapshot.SNAPSHOT_EXTENSION))
+
+    analyze_movie(movie, movie_name, args)
+
+    return movie
+
+
+def parse_movie(filename, args, fingerprint=None):
+    """Parses a movie script, resolves its characters and counts their
+    interactions and mentions.
+
+    Args:
+        filename (string): Name of the file containing the movie script
+        args (argparse.Namespace): The options of the command line, see
+        process_movie()
+        fingerprint (String): The fingerprint of the movie, computed from
+        the movie script if not given
+
+    Returns:
+        MovieData: The parsed movie, None if the movie script is empty
+    """
+
+    import imsdb.interactions
+
+    logger = logging.getLogger(__name__)
+
+    if args.nscenes:
+        nscenes = int(args.nscenes)
+    else:
+        nscenes = 0
+
+    movie = imsdb.datastructures.MovieData(args.sub_wikia)
+    movie.fingerprint = fingerprint or movie_fingerprint(filename, args)
+    movie.script = os.path.basename(filename)
+
+    # Maps the IMSDb movie script into memory
+    # The pipeline terminates if the script is empty
+    opened_script = imsdb.filehandlers.open_movie_script(filename,
+                                                         getattr(args, 'scripts_dir', 'scripts'))
+
+    if opened_script is None:
+        print "Error: Empty movie script."
+        return
+
+    imsdb_movie_script, movie.title = opened_script
+
+    # The movie script is unmapped whatever happens, so a batch doesn't
+    # leak a file descriptor for each movie that fails
+    try:
+        if not imsdb_movie_script:
+            print "Error: Empty movie script."
+            return
+
+        # Walk the movie script only once, every stage consumes the same events
+        # The loop below processes the scenes 0 to nscenes, so the walk stops
+        # right after the scene nscenes
+        if nscenes > 0:
+            max_scenes = nscenes + 1
+        else:
+            max_scenes = None
+
+        script_events = list(imsdb.tokenizer.tokenize(imsdb_movie_script, max_scenes))
+
+        # Extract the movie characters
+        movie.characters = imsdb.dataextraction.extract_characters(script_events)
+
+        # Retrieve each character's real name and adding id
+        if getattr(args, 'wikia_cache', None):
+            real_name_cache = imsdb.wikiacache.RealNameCache(
+                args.wikia_cache,
+                ttl=args.wikia_cache_ttl * imsdb.wikiacache.DAY)
+        else:
+            real_name_cache = None
+
+        resolver = imsdb.realnames.RealNameResolver(getattr(args, 'wikia_workers', 8),
+                                                    getattr(args, 'wikia_rate', 10),
+                                                    real_name_cache)
+
+        try:
+            imsdb.dataextraction.get_real_name_and_id(movie.characters, movie, resolver)
+        finally:
+            if real_name_cache is not None:
+                real_name_cache.close()
+
+        # Clean up list
+        movie.clean_up_character_list()
+
+        # Identify the gender of each character, from the configuration file
+        # with the option "bypass_gender_retrieval", from Freebase otherwise
+        imsdb.dataextraction.get_gender(movie.characters, args)
+
+        # The mentions of the characters are detected with a single regex
+        mention_detector = imsdb.mentions.MentionDetector(movie.characters)
+
+        # The characters speaking in each scene are recorded in a matrix
+        scene_incidence = imsdb.interactions.SceneIncidence(movie.characters)
+
+        # The scenes are only offsets into the movie script
+        movie.scenes = list(imsdb.dataextraction.extract_scenes(imsdb_movie_script, script_events))
+
+        # The results of the scenes left untouched since a previous run, in
+        # this draft of the movie script or in another one, are found in the
+        # scene cache and only applied again
+        if getattr(args, 'scene_cache', None):
+            scene_cache = imsdb.scenecache.SceneCache(args.scene_cache,
+                                                      getattr(args, 'scene_cache_size', 100000))
+            characters_version = imsdb.scenecache.characters_version(movie.characters)
+            scene_keys = [scene_cache.key(imsdb_movie_script.view(scene.start, scene.end),
+                                          characters_version)
+                          for scene in movie.scenes]
+        else:
+            scene_cache = None
+            scene_keys = [None] * len(movie.scenes)
+
+        try:
+            if scene_cache is not None:
+                cached_results = scene_cache.get_many(scene_keys)
+            else:
+                cached_results = {}
+
+            new_results = {}
+
+            # Draw the interactions
+            for i, scene in enumerate(movie.scenes):
+                # The scene text is only copied out of the script to be logged
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('\nNew scene: ' + str(i))
+                    logger.debug(re.sub('\s{2,}', '\n', scene.text(imsdb_movie_script)))
+
+                if scene_keys[i] in cached_results:
+                    scene_result = imsdb.datastructures.SceneResult(*cached_results[scene_keys[i]])
+                else:
+                    scene_result = imsdb.dataextraction.extract_scene_result(imsdb_movie_script,
+                                                                             scene,
+                                                                             mention_detector)
+                    new_results[scene_keys[i]] = tuple(scene_result)
+
+                imsdb.dataextraction.apply_scene_result(scene_result,
+                                                        scene_incidence,
+                                                        i,
+                                                        mention_detector)
+
+                logger.debug(scene_result.speakers)
+
+            if scene_cache is not None:
+                scene_cache.set_many(new_results)
+
+                logger.info('%d of %d scenes found in the scene cache'
+                            % (len(movie.scenes) - len(new_results), len(movie.scenes)))
+        finally:
+            if scene_cache is not None:
+                scene_cache.close()
+
+    finally:
+        imsdb_movie_script.close()
+
+    # Count the interactions of all scenes at once
+    scene_incidence.update_characters()
+
+    return movie
+
+
+def analyze_movie(movie, movie_name, args):
+    """Computes the social network of a parsed movie and writes the results
+    to the JSON file, to the exported files and to the database.
+
+    Args:
+        movie (MovieData): The parsed movie
+        movie_name (string): Name of the JSON file and key of the exported
+        files
+        args (argparse.Namespace): The options of the command line, see
+        process_movie()
+    """
+
+    import imsdb.gen_database
+    import imsdb.gen_dataframe
+    import imsdb.social_net as social_net
+
+    logger = logging.getLogger(__name__)
+
+    # List all info
+    #movie.print_info()
+
+    #for character in movie.characters:
+        #character.list_characters_interacted_with()
+        #character.list_mentioned_characters()
+        #character.list_appeared_scenes()
+
+    # --- This part of the pipeline is for data purposes ---
+
+    # Builds dataframes
+    df_chars = imsdb.gen_dataframe.build_df_chars(movie)
+    df_interactions = imsdb.gen_dataframe.build_df_interactions(movie)
+    df_mentions = imsdb.gen_dataframe.build_df_mentions(movie)
+
+    # Outputting to excel / database
+    # wdata.write_df(df_chars, 'chars')
+    # wdata.write_df(df_interactions, 'interactions')
+    # wdata.write_df(df_chars, 'mentions')
+
+    # The metrics are only computed if the social network changed
+    metrics_params = {'betweenness_k': getattr(args, 'betweenness_k', None),
+                      'seed': getattr(args, 'metrics_seed', None)}
+
+    if getattr(args, 'metrics_cache', None):
+        metrics_cache = imsdb.metricscache.MetricsCache(
+            args.metrics_cache,
+            int(args.metrics_cache_size * 1024 * 1024))
+        metrics_key = metrics_cache.key(df_chars, df_interactions, **metrics_params)
+        df_metrics = metrics_cache.get(metrics_key)
+    else:
+        metrics_cache = None
+        df_metrics = None
+
+    if df_metrics is None:
+        df_metrics = social_net.return_metrics(df_chars,
+                                               df_interactions,
+                                               metrics_params['betweenness_k'],
+                                               metrics_params['seed'])
+
+        if metrics_cache is not None:
+            metrics_cache.set(metrics_key, df_metrics)
+    else:
+        logger.info('Metrics of the social network found in the cache')
+
+    # Creating a JSON for the social network, named after the movie script
+    imsdb.gen_dataframe.write_nodes_edges_to_json(df_metrics, df_interactions, movie_name)
+
+    # Exporting the tables to Parquet files, keyed by the movie script
+    if getattr(args, 'bypass_gender_retrieval', False) and not getattr(args, 'config', None):
+        parser.error('--bypass_gender_retrieval reads the genders from the ' +
+                     'configuration file, give it with --config')
+
+    if getattr(args, 'export_dir', None):
+        import imsdb.export
+
+        imsdb.export.export_movie(args.export_dir,
+                                  movie_name,
+                                  {'chars': df_chars,
+                                   'interactions': df_interactions,
+                                   'mentions': df_mentions,
+                                   'metrics': df_metrics})
+
+    #Builds database
+    imsdb.gen_database.build_database(movie, getattr(args, 'force', False))
@@ -0,0 +1,155 @@
+"""
+.. module:: realnames
+    :synopsis: A module that resolves the real names of many characters concurrently
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+import threading
+import time
+import multiprocessing.pool
+
+import imsdb.dataadjustment
+
+
+class RateLimiter(object):
+    """Spaces out the requests sent to each host.
+
+    Every host gets at most "rate" requests per second, the requests above
+    that rate wait for their turn. The limiter can be used by several
+    threads at the same time.
+    """
+
+    def __init__(self, rate):
+        """Initializes the limiter.
+
+        Args:
+            rate (float): Maximum number of requests per second for each
+            host, no limit if 0 or None
+        """
+
+        if rate:
+            self.interval = 1.0 / rate
+        else:
+            self.interval = 0.0
+
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, host):
+        """Blocks until a request can be sent to the host.
+
+        Args:
+            host (String): The host of the request
+        """
+
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RateLimitedClient(object):
+    """Wraps a wikia client so that the searches respect a rate limiter.
+
+    Each sub-wikia is a different host, so the limit applies per sub-wikia.
+    """
+
+    def __init__(self, wikia_client, rate_limiter):
+        self.wikia_client = wikia_client
+        self.rate_limiter = rate_limiter
+
+    def search(self, sub_wikia, query):
+        if self.wikia_client is None:
+            import wikia
+            self.wikia_client = wikia
+
+        self.rate_limiter.wait(sub_wikia)
+
+        return self.wikia_client.search(sub_wikia, query)
+
+
+class RealNameResolver(object):
+    """Resolves the real names of the characters with a pool of threads.
+
+    The lookups of the wikia are mostly waiting on the network, so they are
+    sent concurrently, up to "concurrency" at a time and no more than
+    "rate" per second for each sub-wikia. The cached characters don't count
+    for the rate limit.
+
+    The real names are returned in the same order as the character names,
+    whatever the order in which the lookups finish.
+    """
+
+    def __init__(self, concurrency=8, rate=10, cache=None, wikia_client=None):
+        """Initializes the resolver.
+
+        Args:
+            concurrency (int): Maximum number of lookups at the same time
+            rate (float): Maximum number of lookups per second for each
+            sub-wikia, no limit if 0 or None
+            cache (RealNameCache): Cache of the real names already resolved
+            wikia_client (module): Client of the wikia API, it must provide
+            the function search(sub_wikia, query), defaults to the wikia
+            module
+        """
+
+        self.concurrency = max(int(concurrency), 1)
+        self.cache = cache
+        self.wikia_client = RateLimitedClient(wikia_client, RateLimiter(rate))
+
+    def resolve(self, sub_wikia, movie_character_names):
+        """Retrieves the real name of each movie character.
+
+        Each distinct name is only looked up once.
+
+        Args:
+            sub_wikia (String): The sub-wikia to be queried
+            movie_character_names (list of String): The characters' names
+
+        Returns:
+            list of String: The real name of each character, in the same
+            order as the names
+        """
+
+        logger = logging.getLogger(__name__)
+
+        distinct_names = []
+        seen_names = set()
+
+        for name in movie_character_names:
+            if name not in seen_names:
+                seen_names.add(name)
+                distinct_names.append(name)
+
+        if not distinct_names:
+            return []
+
+        start = time.time()
+
+        def lookup(name):
+            return imsdb.dataadjustment.retrieve_character_real_name(sub_wikia,
+                                                                     name,
+                                                                     self.cache,
+                                                                     self.wikia_client)
+
+        pool = multiprocessing.pool.ThreadPool(min(self.concurrency, len(distinct_names)))
+
+        try:
+            real_names = dict(zip(distinct_names, pool.map(lookup, distinct_names)))
+        finally:
+            pool.close()
+            pool.join()
+
+        logger.info('Resolved %d characters in %.2fs' % (len(distinct_names),
+                                                         time.time() - start))
+
+        return [real_names[name] for name in movie_character_names]
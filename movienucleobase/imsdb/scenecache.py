@@ -0,0 +1,190 @@
+"""
+.. module:: scenecache
+    :synopsis: A module that keeps the results of the scenes already processed across runs
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import cPickle
+import hashlib
+import logging
+import sqlite3
+import time
+
+# Changing the processing of the scenes changes the keys, so the results
+# cached by the older versions are not used
+SCENE_CACHE_VERSION = 1
+
+# Maximum number of variables of a SQLite statement
+_MAX_VARIABLES = 500
+
+
+def characters_version(characters):
+    """Computes the version of a list of characters.
+
+    The speakers and the mentions found in a scene depend on the names of
+    the characters of the movie, so the results of a scene can only be
+    reused with the same names.
+
+    Args:
+        characters (list of MovieCharacter): The characters of the movie
+
+    Returns:
+        String: The SHA-1 hex digest of the names of the characters
+    """
+
+    digest = hashlib.sha1()
+
+    for character in characters:
+        digest.update(character.name + '\n')
+
+    return digest.hexdigest()
+
+
+class SceneCache(object):
+    """Persistent cache of the speakers and mentions of each movie scene.
+
+    The key of an entry is a hash of the scene text and of the version of
+    the list of characters, so a scene left untouched between two drafts of
+    a movie script is found again whatever its position in the script.
+
+    The cache is a SQLite database, so it can be shared by several runs and
+    several processes. The entries are read and written in batches, one
+    batch per movie.
+
+    The number of entries is bounded, once the bound is exceeded the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path, max_entries=100000):
+        """Opens the cache, creating the database if it doesn't exist.
+
+        Args:
+            path (string): Path of the SQLite database
+            max_entries (int): Maximum number of entries
+        """
+
+        self.max_entries = max_entries
+
+        self._conn = sqlite3.connect(path, timeout=30)
+
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS scenes
+           (
+            key                      TEXT  NOT NULL PRIMARY KEY,
+            result                   BLOB  NOT NULL,
+            last_used                REAL  NOT NULL
+            );'''
+                           )
+
+        self._conn.execute('CREATE INDEX IF NOT EXISTS scenes_last_used ' +
+                           'ON scenes(last_used)')
+        self._conn.commit()
+
+    @staticmethod
+    def key(scene_text, version):
+        """Computes the key of a scene.
+
+        Args:
+            scene_text (String or buffer): The scene as it appears in the
+            movie script, a buffer over the script avoids copying it
+            version (String): The version of the list of characters, see
+            characters_version()
+
+        Returns:
+            String: The SHA-1 hex digest of the scene
+        """
+
+        digest = hashlib.sha1('version:%d\n' % SCENE_CACHE_VERSION)
+        digest.update('characters:%s\n' % version)
+        digest.update(scene_text)
+
+        return digest.hexdigest()
+
+    def get_many(self, keys):
+        """Looks up the results of several scenes.
+
+        Args:
+            keys (list of String): The keys of the scenes
+
+        Returns:
+            dict: The results found, keyed by the keys of the scenes
+        """
+
+        logger = logging.getLogger(__name__)
+
+        keys = list(set(keys))
+        results = {}
+
+        for i in range(0, len(keys), _MAX_VARIABLES):
+            chunk = keys[i:i + _MAX_VARIABLES]
+            rows = self._conn.execute('SELECT key, result FROM scenes WHERE key IN (' +
+                                      ','.join('?' * len(chunk)) + ')',
+                                      chunk)
+
+            for key, result in rows:
+                try:
+                    results[key] = cPickle.loads(str(result))
+                except Exception:
+                    logger.warning('Discarding the unreadable scene cache entry: ' + key)
+
+        if results:
+            now = time.time()
+
+            with self._conn:
+                self._conn.executemany('UPDATE scenes SET last_used = ? WHERE key = ?',
+                                       [(now, key) for key in results])
+
+        return results
+
+    def set_many(self, results):
+        """Stores the results of several scenes.
+
+        Args:
+            results (dict): The results of the scenes, keyed by the keys of
+            the scenes
+        """
+
+        if not results:
+            return
+
+        now = time.time()
+
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO scenes (key, result, last_used) ' +
+                                   'VALUES (?, ?, ?)',
+                                   [(key, sqlite3.Binary(cPickle.dumps(result,
+                                                                       cPickle.HIGHEST_PROTOCOL)),
+                                     now)
+                                    for key, result in results.iteritems()])
+
+        self._evict()
+
+    def close(self):
+        """Closes the database."""
+
+        self._conn.close()
+
+    def _evict(self):
+        """Removes the least recently used entries above the bound.
+
+        A tenth of the bound is evicted in advance to avoid evicting on every
+        new batch.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        excess = self._conn.execute('SELECT count(*) FROM scenes').fetchone()[0] - \
+            self.max_entries
+
+        if excess <= 0:
+            return
+
+        excess += self.max_entries // 10
+
+        with self._conn:
+            self._conn.execute('DELETE FROM scenes WHERE rowid IN ' +
+                               '(SELECT rowid FROM scenes ORDER BY last_used LIMIT ?)',
+                               (excess,))
+
+        logger.info('Evicted %d entries from the scene cache' % excess)
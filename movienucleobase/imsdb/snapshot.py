@@ -0,0 +1,143 @@
+"""
+.. module:: snapshot
+    :synopsis: A module that saves and reloads the movies already parsed and resolved
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import cPickle
+import logging
+import os
+import tempfile
+
+SNAPSHOT_FORMAT = 'movienucleobase-snapshot'
+
+# Changing the attributes of MovieData, MovieCharacter or MovieScene changes
+# the version, the snapshots of the older versions are then refused
+SNAPSHOT_VERSION = 2
+
+SNAPSHOT_EXTENSION = '.snapshot'
+
+
+def is_snapshot(filename):
+    """Checks if a file name is the name of a snapshot.
+
+    Args:
+        filename (string): Name of the file
+
+    Returns:
+        Bool: True if the file is a snapshot, False if it is a movie script
+    """
+
+    return filename.lower().endswith(SNAPSHOT_EXTENSION)
+
+
+def save_snapshot(movie, path):
+    """Saves a movie to a snapshot file.
+
+    The file holds two pickles (protocol 2): a small header with the format,
+    the version and the fingerprint of the movie, and the movie itself. The
+    scenes are saved as offsets, so their text can't be read from the
+    reloaded movie.
+
+    The snapshot is written to a temporary file and then renamed, so another
+    process never reads a partial snapshot.
+
+    Args:
+        movie (MovieData): The movie, after the characters were resolved and
+        the interactions counted
+        path (string): Path of the snapshot file
+    """
+
+    logger = logging.getLogger(__name__)
+
+    directory = os.path.dirname(path) or '.'
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    header = {'format': SNAPSHOT_FORMAT,
+              'version': SNAPSHOT_VERSION,
+              'fingerprint': movie.fingerprint}
+
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+    try:
+        with os.fdopen(handle, 'wb') as snapshot_file:
+            cPickle.dump(header, snapshot_file, cPickle.HIGHEST_PROTOCOL)
+            cPickle.dump(movie, snapshot_file, cPickle.HIGHEST_PROTOCOL)
+
+        os.rename(temp_path, path)
+    except:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    logger.info('Snapshot saved: ' + path)
+
+
+def read_header(snapshot_file):
+    """Reads and checks the header of a snapshot.
+
+    Args:
+        snapshot_file (file): The snapshot file, opened in binary mode
+
+    Returns:
+        dict: The header, with the keys format, version and fingerprint
+
+    Raises:
+        ValueError: If the file isn't a snapshot or if it was saved by
+        another version
+    """
+
+    try:
+        header = cPickle.load(snapshot_file)
+    except Exception:
+        header = None
+
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError('Not a movie snapshot: ' + snapshot_file.name)
+
+    if header['version'] != SNAPSHOT_VERSION:
+        raise ValueError('The snapshot %s has the version %d instead of %d, '
+                         'the movie script must be processed again'
+                         % (snapshot_file.name, header['version'], SNAPSHOT_VERSION))
+
+    return header
+
+
+def snapshot_fingerprint(path):
+    """Returns the fingerprint of the movie of a snapshot without loading it.
+
+    Args:
+        path (string): Path of the snapshot file
+
+    Returns:
+        String: The fingerprint of the movie
+    """
+
+    with open(path, 'rb') as snapshot_file:
+        return read_header(snapshot_file)['fingerprint']
+
+
+def load_snapshot(path):
+    """Loads a movie from a snapshot file.
+
+    Args:
+        path (string): Path of the snapshot file
+
+    Returns:
+        MovieData: The movie as it was saved
+
+    Raises:
+        ValueError: If the file isn't a snapshot or if it was saved by
+        another version
+    """
+
+    with open(path, 'rb') as snapshot_file:
+        read_header(snapshot_file)
+
+        return cPickle.load(snapshot_file)
@@ -6,80 +6,60 @@
 .. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
 """
 
-import networkx as nx
-import pandas as pd
-import community
 
-
-try:
-    import pygraphviz
-    from networkx.drawing.nx_agraph import graphviz_layout
-except ImportError:
-    try:
-        import pydotplus
-        from networkx.drawing.nx_pydot import graphviz_layout
-    except ImportError:
-        raise ImportError("This example needs Graphviz and either "
-                          "PyGraphviz or PyDotPlus")
-
-
-def return_metrics(nodes, edges):
+def return_metrics(nodes, edges, betweenness_k=None, seed=None):
     """"
     This function build a social netwrok using networkx and
     calculates the degree and betweeness centrailty for each node.
+
+    The graph is built from the id and weight columns in bulk.
+    The betweenness centrality is exact by default, which is O(V*E). With
+    betweenness_k, it is estimated from k sampled pivot nodes instead, the
+    larger k the more accurate and the slower. The seed makes the sampling
+    reproducible.
+
+    Returns a dataframe with the columns name, degree_centrality,
+    betweenness_centrality, community, gender, id and nsceneappearances,
+    sorted by degree centrality
     """
 
-    graph = nx.Graph()
+    import networkx as nx
+    import pandas as pd
+    import community
 
-    labels = {}
-    a = 0
+    graph = nx.Graph()
 
     # Adding the nodes
-    for index, row in nodes.iterrows():
-        b = row[1]
-        graph.add_node(row[1], label=row[2])
-        graph.node[b]['state'] = row[2]
-        labels[a] = row[1]
-        a += 1
+    node_ids = nodes['id'].tolist()
+    graph.add_nodes_from(node_ids)
 
     # Adding the edges
-    for index, row in edges.iterrows():
-        graph.add_edge(row[2], row[4], weight=row[0])
-
-    node_labels = nx.get_node_attributes(graph, 'state')
-
-    dict_degree_centrality = {}
-    dict_betweenness_centrality = {}
-    dict_communities = {}
-
-    # Getting the labels to the dictionary
-    for i, k in nx.degree_centrality(graph).iteritems():
-        dict_degree_centrality[node_labels[i]] = k
-
-    for i, k in nx.betweenness_centrality(graph).iteritems():
-        dict_betweenness_centrality[node_labels[i]] = k
-
-    parts = community.best_partition(graph)
-
-    for node in graph.nodes():
-        dict_communities[node_labels[node]] = parts.get(node)
+    graph.add_weighted_edges_from(zip(edges['sourceid'].tolist(),
+                                      edges['targetid'].tolist(),
+                                      edges['ninteractions'].tolist()))
 
     # Calculating metrics
-    df_degree_centrality = pd.DataFrame(dict_degree_centrality.items(),
-                                        columns=['name', 'degree_centrality'])\
-        .sort_values(by='degree_centrality', ascending=False)
+    degree_centrality = nx.degree_centrality(graph)
 
-    df_betweenness_centrality = pd.DataFrame(dict_betweenness_centrality.items(),
-                                             columns=['name', 'betweenness_centrality'])\
-        .sort_values(by='betweenness_centrality', ascending=False)
+    if betweenness_k and betweenness_k < graph.number_of_nodes():
+        betweenness_centrality = nx.betweenness_centrality(graph, k=betweenness_k, seed=seed)
+    else:
+        betweenness_centrality = nx.betweenness_centrality(graph)
 
-    df_communities = pd.DataFrame(dict_communities.items(),
-                                  columns=['name', 'community']) \
-        .sort_values(by='community', ascending=False)
-
-    # Joining both dataframes using the char name
-    df_metrics = pd.merge(df_degree_centrality, df_betweenness_centrality, on='name', how='inner')
-    df_metrics = pd.merge(df_metrics, df_communities, on='name', how='inner')
-    df_metrics = pd.merge(df_metrics, nodes, on='name', how='inner')
+    parts = community.best_partition(graph)
 
-    return df_metrics
+    # All metrics are assembled in a single frame, aligned to the nodes
+    df_metrics = pd.DataFrame({'name': nodes['name'].values,
+                               'degree_centrality': [degree_centrality[i] for i in node_ids],
+                               'betweenness_centrality': [betweenness_centrality[i]
+                                                          for i in node_ids],
+                               'community': [parts.get(i) for i in node_ids],
+                               'gender': nodes['gender'].values,
+                               'id': nodes['id'].values,
+                               'nsceneappearances': nodes['nsceneappearances'].values},
+                              columns=['name', 'degree_centrality', 'betweenness_centrality',
+                                       'community', 'gender', 'id', 'nsceneappearances'])
+
+    df_metrics = df_metrics.sort_values(by='degree_centrality', ascending=False, kind='mergesort')
+
+    return df_metrics.reset_index(drop=True)
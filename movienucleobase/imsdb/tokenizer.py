@@ -0,0 +1,166 @@
+"""
+.. module:: tokenizer
+    :synopsis: A module that walks the IMSDb movie script once and emits its structure
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import collections
+
+# Kinds of events emitted by the tokenizer
+SCENE_HEADING = 'scene_heading'
+SPEAKER = 'speaker'
+DIALOGUE = 'dialogue'
+
+# Text of the scene heading events
+BLACK_SCREEN_HEADING = 'BLACK SCREEN'
+SCENE_HEADING_PREFIXES = ('EXT.', 'INT.')
+
+BLACK_SCREEN_MARKER = '<pre>' + BLACK_SCREEN_HEADING
+
+ScriptEvent = collections.namedtuple('ScriptEvent', ['kind', 'text', 'start', 'end'])
+
+
+def tokenize(imsdb_movie_script, max_scenes=None):
+    """Walk the movie script once and yield its scene headings, speakers and lines.
+
+    The script is scanned from left to right jumping from one "<b>" tag to
+    the next one, so every character of the script is visited only once no
+    matter how many stages consume the result. Each bold tag is classified
+    as follows:
+        - "<b>EXT." or "<b>INT.": a SCENE_HEADING event
+        - "<b>SUPER": ignored, but it still ends the previous line
+        - Anything else: a SPEAKER event, followed by a DIALOGUE event with
+        all text until the next "<b>" tag
+
+    A speaker is only emitted once the tag that ends its line is found, so
+    the last bold tag of the script never produces a SPEAKER event.
+
+    The string "<pre>BLACK SCREEN" usually marks the very beginning of the
+    movie script. It is only relevant before the first "EXT."/"INT." heading,
+    so the events found until that heading are held back and a SCENE_HEADING
+    event is placed among them if the marker is present.
+
+    The start and end offsets of each event point into the movie script.
+    A SCENE_HEADING event covers the heading marker only ("<b>EXT."), the
+    scene itself starts right after it. The new line chars are removed from
+    the text of the events, since the script is handed over as it is in
+    the HTML file. The text of the DIALOGUE events is not copied out of the
+    script, it is None and can be read on demand through text_span().
+
+    If 'max_scenes' is given, the walk stops right after the heading that
+    ends that number of scenes, so the cost of the tokenizer is proportional
+    to the scenes requested instead of the whole movie script.
+
+    Args:
+        imsdb_movie_script (string or MovieScript): The IMSDb HTML page
+        minus the header
+        max_scenes (int): Number of scenes after which the walk stops
+
+    Yields:
+        ScriptEvent: The events of the movie script in order
+    """
+
+    script = imsdb_movie_script
+
+    events = []
+    first_heading_found = False
+    speaker = None
+
+    # Every "EXT."/"INT." heading ends the scene opened before it, the first
+    # one only does so if the "BLACK SCREEN" heading opened a scene
+    ended_scenes = -1
+
+    tag = script.find('<b>')
+
+    while tag != -1:
+        if speaker is not None:
+            events.append(speaker)
+            events.append(ScriptEvent(DIALOGUE, None, speaker.end, tag))
+            speaker = None
+
+        head = script[tag + 3:tag + 8]
+
+        if head.startswith(SCENE_HEADING_PREFIXES):
+            if not first_heading_found:
+                if _place_black_screen(script, events, tag):
+                    ended_scenes += 1
+                first_heading_found = True
+
+            events.append(ScriptEvent(SCENE_HEADING, head[:4], tag, tag + 7))
+            tag = script.find('<b>', tag + 3)
+
+            ended_scenes += 1
+
+            if max_scenes is not None and ended_scenes >= max_scenes:
+                tag = -1
+        elif head.startswith('SUPER'):
+            tag = script.find('<b>', tag + 3)
+        else:
+            close = script.find('</b>', tag + 3)
+
+            if close == -1:
+                tag = script.find('<b>', tag + 3)
+            else:
+                speaker = ScriptEvent(SPEAKER,
+                                      script[tag + 3:close].replace('\n', ''),
+                                      tag,
+                                      close + 4)
+                tag = script.find('<b>', close + 4)
+
+        if first_heading_found:
+            for event in events:
+                yield event
+            del events[:]
+
+    if not first_heading_found:
+        _place_black_screen(script, events, len(script))
+
+    for event in events:
+        yield event
+
+
+def text_span(event):
+    """Return the offsets of the text of an event in the movie script.
+
+    The text of a SPEAKER event is inside its bold tag, the text of the
+    other events is the whole event.
+
+    Args:
+        event (ScriptEvent): An event returned by tokenize()
+
+    Returns:
+        tuple of int: The start and end offsets of the text
+    """
+
+    if event.kind == SPEAKER:
+        return event.start + len('<b>'), event.end - len('</b>')
+
+    return event.start, event.end
+
+
+def _place_black_screen(script, events, end):
+    """Insert the "BLACK SCREEN" heading among the events found before 'end'.
+
+    Returns True if the heading was found, False otherwise.
+    """
+
+    marker = script.find(BLACK_SCREEN_MARKER, 0, end)
+
+    if marker == -1:
+        return False
+
+    heading = ScriptEvent(SCENE_HEADING,
+                          BLACK_SCREEN_HEADING,
+                          marker,
+                          marker + len(BLACK_SCREEN_MARKER))
+
+    for index, event in enumerate(events):
+        if event.start > marker:
+            events.insert(index, heading)
+            break
+    else:
+        events.append(heading)
+
+    return True
@@ -0,0 +1,175 @@
+"""
+.. module:: wikiacache
+    :synopsis: A module that keeps the real names resolved through the wikia across runs
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+
+class RealNameCache(object):
+    """Persistent cache of the real names resolved through the wikia.
+
+    The cache is a SQLite database keyed by (sub_wikia, movie character
+    name), so it can be shared by several runs and several processes.
+
+    Each entry expires after a time to live. The negative results, like
+    the rejected "List of" search results and the characters that raised a
+    ValueError, are cached as well but with a shorter time to live, since
+    the wikia might get a proper page for them. The time to live of the
+    negative entries never exceeds the one of the other entries.
+
+    The number of entries is bounded, once the bound is exceeded the least
+    recently used entries are evicted.
+
+    The cache can be used by several threads at the same time.
+    """
+
+    def __init__(self, path, ttl=30 * DAY, negative_ttl=DAY, max_entries=100000):
+        """Opens the cache, creating the database if it doesn't exist.
+
+        Args:
+            path (string): Path of the SQLite database
+            ttl (float): Time to live of the entries in seconds
+            negative_ttl (float): Time to live of the negative entries in
+            seconds, capped at ttl
+            max_entries (int): Maximum number of entries
+        """
+
+        self.ttl = ttl
+        self.negative_ttl = min(negative_ttl, ttl)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path,
+                                     timeout=30,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.text_factory = str
+
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS real_names
+           (
+            sub_wikia                TEXT  NOT NULL,
+            name                     TEXT  NOT NULL,
+            real_name                TEXT  ,
+            negative                 INT   NOT NULL,
+            created                  REAL  NOT NULL,
+            last_used                REAL  NOT NULL,
+            PRIMARY KEY(sub_wikia, name)
+            );'''
+                           )
+
+        self._conn.execute('CREATE INDEX IF NOT EXISTS real_names_last_used ' +
+                           'ON real_names(last_used)')
+
+        self._size = self._count()
+
+    def get(self, sub_wikia, movie_character_name):
+        """Looks up the real name of a movie character.
+
+        Args:
+            sub_wikia (String): The sub-wikia of the movie
+            movie_character_name (String): The character's name
+
+        Returns:
+            Bool: True if the cache has a valid entry, False otherwise
+            String: The character's real name, None if not found
+        """
+
+        logger = logging.getLogger(__name__)
+
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute('SELECT real_name, negative, created FROM real_names ' +
+                                     'WHERE sub_wikia = ? AND name = ?',
+                                     (sub_wikia, movie_character_name)).fetchone()
+
+            if row is None:
+                return False, None
+
+            real_name, negative, created = row
+
+            if now - created > (self.negative_ttl if negative else self.ttl):
+                logger.debug('Expired cache entry: ' + movie_character_name)
+                return False, None
+
+            self._conn.execute('UPDATE real_names SET last_used = ? ' +
+                               'WHERE sub_wikia = ? AND name = ?',
+                               (now, sub_wikia, movie_character_name))
+
+        return True, real_name
+
+    def set(self, sub_wikia, movie_character_name, real_name, negative=False):
+        """Stores the real name of a movie character.
+
+        Args:
+            sub_wikia (String): The sub-wikia of the movie
+            movie_character_name (String): The character's name
+            real_name (String): The character's real name
+            negative (Bool): True if the wikia didn't resolve the character
+        """
+
+        now = time.time()
+
+        with self._lock:
+            updated = self._conn.execute('UPDATE real_names ' +
+                                         'SET real_name = ?, negative = ?, created = ?, last_used = ? ' +
+                                         'WHERE sub_wikia = ? AND name = ?',
+                                         (real_name, int(negative), now, now,
+                                          sub_wikia, movie_character_name)).rowcount
+
+            if not updated:
+                self._conn.execute('INSERT OR REPLACE INTO real_names ' +
+                                   '(sub_wikia, name, real_name, negative, created, last_used) ' +
+                                   'VALUES (?, ?, ?, ?, ?, ?)',
+                                   (sub_wikia, movie_character_name, real_name,
+                                    int(negative), now, now))
+                self._size += 1
+
+            if self._size > self.max_entries:
+                self._evict()
+
+    def close(self):
+        """Closes the database."""
+
+        with self._lock:
+            self._conn.close()
+
+    def _count(self):
+        """Returns the number of entries in the database."""
+
+        return self._conn.execute('SELECT count(*) FROM real_names').fetchone()[0]
+
+    def _evict(self):
+        """Removes the least recently used entries above the bound.
+
+        Other processes might have added entries, so they are counted again.
+        A tenth of the bound is evicted in advance to avoid evicting on every
+        new entry.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        self._size = self._count()
+        excess = self._size - self.max_entries
+
+        if excess <= 0:
+            return
+
+        excess += self.max_entries // 10
+
+        self._conn.execute('DELETE FROM real_names WHERE rowid IN ' +
+                           '(SELECT rowid FROM real_names ORDER BY last_used LIMIT ?)',
+                           (excess,))
+
+        self._size = self._count()
+
+        logger.info('Evicted %d entries from the real name cache' % excess)
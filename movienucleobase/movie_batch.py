@@ -0,0 +1,52 @@
+"""
+.. module:: movie_batch.py
+   :synopsis: Processes a whole catalogue of movie scripts
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import time
+
+import logging
+import logging.config
+
+import imsdb.batch
+import imsdb.engines
+import imsdb.pipeline
+
+if __name__ == '__main__':
+    # Process arguments from the command line
+    PARSER = argparse.ArgumentParser()
+
+    PARSER.add_argument('source',
+                        help='Directory containing the movie scripts (or snapshots) or ' +
+                             'manifest file with one "filename[,sub_wikia[,config]]" per line')
+
+    PARSER.add_argument('--workers',
+                        help='Number of worker processes (default: number of CPUs)',
+                        type=int)
+
+    imsdb.pipeline.add_pipeline_arguments(PARSER)
+
+    ARGS = PARSER.parse_args()
+
+    imsdb.pipeline.check_pipeline_arguments(PARSER, ARGS)
+
+    # Setup the logging system
+    LOGCONFIG = 'logging_config.ini'
+    LOGFILE = 'movienucleobase.log'
+
+    logging.config.fileConfig(LOGCONFIG, defaults={'logfilename': LOGFILE})
+
+    # Setup the database where the movies are stored
+    imsdb.engines.configure(backend=ARGS.database, sqlite_path=ARGS.sqlite_path)
+
+    JOBS = imsdb.batch.list_movie_jobs(ARGS.source, ARGS)
+
+    START = time.time()
+
+    RESULTS = imsdb.batch.run_batch(JOBS, ARGS.workers, LOGCONFIG)
+
+    imsdb.batch.print_summary(RESULTS, time.time() - START)
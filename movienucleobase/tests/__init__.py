@@ -0,0 +1,9 @@
+"""
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import logging
+
+# The modules log through the logging system, which the tests don't set up
+logging.getLogger('imsdb').addHandler(logging.NullHandler())
@@ -0,0 +1,34 @@
+"""
+.. module:: scripts
+    :synopsis: Small movie scripts shared by the tests
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+# The speakers are centered, see imsdb.utilities.valid_movie_character()
+INDENT = ' ' * 25
+
+# The movie script, without the HTML header:
+#   - The line of FRODO before the first heading is ended by the heading
+#   - The line of GANDALF is ended by a "SUPER" tag
+#   - The text after the last heading is not a scene
+SCRIPT = ('<pre>BLACK SCREEN\n'
+          '<b>' + INDENT + 'FRODO</b>\nHello Sam.\n'
+          '<b>INT. BAG END</b>\n'
+          '<b>' + INDENT + 'SAM</b>\nMr. Frodo!\n'
+          '<b>' + INDENT + 'FRODO (V.O.)</b>\nSam, Gandalf\nis here.\n'
+          '<b>' + INDENT + 'SAMWISE</b>\nFrodo?\n'
+          '<b>EXT. SHIRE</b>\n'
+          '<b>' + INDENT + 'GANDALF</b>\nFool of a Took! Frodo, Sam!\n'
+          '<b>SUPER: THE SHIRE</b>\n'
+          '<b>' + INDENT + 'PIPPIN</b>\nSorry.\n'
+          '<b>INT. INN</b>\n'
+          '<b>' + INDENT + 'ARAGORN</b>\nThe last bold tag.\n')
+
+HTML_HEADER = ('<html><head><title>Synthetic\nMovie</title></head>\n'
+               '<body>IMSDb menus<br> <table width="100%">')
+
+HTML_FOOTER = '<br> <table width="100%">IMSDb footer</body></html>'
+
+HTML = HTML_HEADER + SCRIPT + HTML_FOOTER
@@ -0,0 +1,113 @@
+"""
+.. module:: test_batch
+    :synopsis: Tests of the jobs of the batch of movie scripts
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.batch
+import imsdb.engines
+import imsdb.gen_database
+import imsdb.pipeline
+from tests.test_pipeline import parse_args
+
+
+class ListMovieJobsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        for filename in ['b.html', 'a.HTM', 'c.snapshot', 'notes.txt']:
+            open(os.path.join(self.directory, filename), 'w').close()
+
+        self.args = parse_args(['--sub_wikia', 'lotr'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_directory(self):
+        jobs = imsdb.batch.list_movie_jobs(self.directory, self.args)
+
+        self.assertEqual([(job.filename, job.scripts_dir) for job in jobs],
+                         [('a.HTM', self.directory),
+                          ('b.html', self.directory),
+                          (os.path.join(self.directory, 'c.snapshot'), 'scripts')])
+        self.assertEqual(set(job.sub_wikia for job in jobs), set(['lotr']))
+
+        # The options of the command line are copied, not shared
+        self.assertEqual(self.args.scripts_dir, 'scripts')
+        self.assertFalse(hasattr(self.args, 'filename'))
+
+    def test_manifest(self):
+        manifest = os.path.join(self.directory, 'manifest.txt')
+
+        with open(manifest, 'w') as manifest_file:
+            manifest_file.write('# movies\n'
+                                'a.html\n'
+                                '\n'
+                                ' b.html , hobbit \n'
+                                'c.html,,c.ini\n'
+                                'd.html,starwars,d.ini\n')
+
+        jobs = imsdb.batch.list_movie_jobs(manifest, self.args)
+
+        self.assertEqual([(job.filename, job.sub_wikia, job.config) for job in jobs],
+                         [('a.html', 'lotr', None),
+                          ('b.html', 'hobbit', None),
+                          ('c.html', 'lotr', 'c.ini'),
+                          ('d.html', 'starwars', 'd.ini')])
+
+
+class ProcessMovieJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saved_settings = dict(imsdb.engines._settings)
+
+        imsdb.engines.configure(backend='sqlite',
+                                sqlite_path=os.path.join(self.directory, 'movies.sqlite'))
+
+        with open(os.path.join(self.directory, 'movie.html'), 'wb') as script_file:
+            script_file.write('<html>Movie</html>')
+
+    def tearDown(self):
+        imsdb.engines.configure(**self.saved_settings)
+        shutil.rmtree(self.directory)
+
+    def job(self, filename, arguments=()):
+        job = parse_args(['--scripts_dir', self.directory] + list(arguments))
+        job.filename = filename
+
+        return job
+
+    def test_inserted_movie_is_skipped(self):
+        job = self.job('movie.html')
+
+        conn = imsdb.engines.get_engine().connect()
+        imsdb.gen_database.create_tables(conn)
+        imsdb.gen_database.insert_movie(conn, 'Movie', [], [],
+                                        imsdb.pipeline.movie_fingerprint('movie.html', job),
+                                        'movie.html')
+        conn.close()
+
+        result = imsdb.batch.process_movie_job(job)
+
+        self.assertEqual(result['status'], 'skipped')
+        self.assertEqual(result['filename'], 'movie.html')
+        self.assertIsNone(result['error'])
+
+    def test_error_does_not_escape(self):
+        result = imsdb.batch.process_movie_job(self.job('missing.html'))
+
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('missing.html', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+.. module:: test_dataextraction
+    :synopsis: Tests of the extraction of the characters and scenes from the tokenized movie script
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import types
+import unittest
+
+import imsdb.dataextraction
+import imsdb.interactions
+import imsdb.mentions
+import imsdb.tokenizer
+from imsdb.datastructures import MovieCharacter, MovieData
+from tests.scripts import INDENT, SCRIPT
+
+
+class ExtractCharactersTest(unittest.TestCase):
+
+    def test_characters(self):
+        events = list(imsdb.tokenizer.tokenize(SCRIPT))
+
+        characters = imsdb.dataextraction.extract_characters(events)
+
+        # "FRODO (V.O.)" is FRODO, the last bold tag is not a speaker
+        self.assertEqual([character.name for character in characters],
+                         ['FRODO', 'SAM', 'SAMWISE', 'GANDALF', 'PIPPIN'])
+
+    def test_rejected_candidates(self):
+        events = [imsdb.tokenizer.ScriptEvent(imsdb.tokenizer.SPEAKER, name, 0, 0)
+                  for name in [INDENT + 'GANDALF', 'GANDALF', INDENT + 'GANDALFF', INDENT + 'ALF',
+                               INDENT + 'GANDALF',
+                               INDENT + 'ARAGORN', INDENT + 'ARAGORN.']]
+
+        characters = imsdb.dataextraction.extract_characters(events)
+
+        # Not centered, misspelled, part of another name
+        self.assertEqual([character.name for character in characters], ['GANDALF', 'ARAGORN'])
+
+
+class ExtractScenesTest(unittest.TestCase):
+
+    def scenes(self, max_scenes=None):
+        events = imsdb.tokenizer.tokenize(SCRIPT, max_scenes)
+
+        return imsdb.dataextraction.extract_scenes(SCRIPT, events)
+
+    def test_scenes_are_pulled_lazily(self):
+        self.assertIsInstance(self.scenes(), types.GeneratorType)
+
+    def test_scenes(self):
+        scenes = list(self.scenes())
+
+        self.assertEqual(len(scenes), 3)
+
+        self.assertEqual(scenes[0].start, len('<pre>BLACK SCREEN'))
+        self.assertEqual(scenes[0].end, SCRIPT.index('<b>INT.'))
+        self.assertEqual(scenes[1].start, SCRIPT.index('<b>INT.') + len('<b>INT.'))
+        self.assertEqual(scenes[1].text(SCRIPT)[:8], ' BAG END')
+
+        # The lines ended by a scene heading are left out
+        self.assertEqual([list(scene.lines(SCRIPT)) for scene in scenes],
+                         [[],
+                          [(INDENT + 'SAM', 'Mr. Frodo!'),
+                           (INDENT + 'FRODO (V.O.)', 'Sam, Gandalfis here.')],
+                          [(INDENT + 'GANDALF', 'Fool of a Took! Frodo, Sam!')]])
+
+    def test_max_scenes(self):
+        scenes = list(self.scenes())
+
+        for max_scenes in range(1, 5):
+            self.assertEqual(list(self.scenes(max_scenes)), scenes[:max_scenes])
+
+
+class SceneResultTest(unittest.TestCase):
+
+    def setUp(self):
+        events = list(imsdb.tokenizer.tokenize(SCRIPT))
+
+        self.characters = imsdb.dataextraction.extract_characters(events)
+
+        for character_id, character in enumerate(self.characters):
+            character.id = character_id
+
+        self.scenes = list(imsdb.dataextraction.extract_scenes(SCRIPT, events))
+        self.detector = imsdb.mentions.MentionDetector(self.characters)
+
+    def test_speakers_and_mentions(self):
+        results = [imsdb.dataextraction.extract_scene_result(SCRIPT, scene, self.detector)
+                   for scene in self.scenes]
+
+        self.assertEqual(results[1].speakers, ['SAM', 'FRODO'])
+        self.assertEqual(results[1].mentions, [('FRODO', 'GANDALF', 1),
+                                               ('FRODO', 'SAM', 1),
+                                               ('SAM', 'FRODO', 1)])
+        self.assertEqual(results[2].speakers, ['GANDALF'])
+        self.assertEqual(results[2].mentions, [('GANDALF', 'FRODO', 1), ('GANDALF', 'SAM', 1)])
+        self.assertEqual(results[0], ([], []))
+
+    def test_results_are_applied_to_the_characters(self):
+        incidence = imsdb.interactions.SceneIncidence(self.characters)
+
+        for scene_number, scene in enumerate(self.scenes):
+            speakers = imsdb.dataextraction.process_movie_single_scene(SCRIPT, scene, incidence,
+                                                                       scene_number,
+                                                                       self.detector)
+            self.assertEqual(speakers,
+                             imsdb.dataextraction.extract_scene_result(SCRIPT, scene,
+                                                                       self.detector).speakers)
+
+        incidence.update_characters()
+
+        frodo, sam, _, gandalf, _ = self.characters
+
+        self.assertEqual(list(frodo.appeared_scenes), [1])
+        self.assertEqual(list(gandalf.appeared_scenes), [2])
+        self.assertEqual(frodo.interaction_counts, {sam.id: 1})
+        self.assertEqual(frodo.mention_counts, {sam.id: 1, gandalf.id: 1})
+        self.assertEqual(gandalf.mention_counts, {frodo.id: 1, sam.id: 1})
+
+
+class RealNameAndIdTest(unittest.TestCase):
+
+    def test_ids_follow_the_list_and_real_names_are_unique(self):
+        class Resolver(object):
+            def resolve(self, sub_wikia, names):
+                real_names = {'FRODO': 'Frodo Baggins', 'MR FRODO': 'Frodo Baggins',
+                              'SAM': 'Samwise Gamgee', 'ORC': None}
+                return [real_names[name] for name in names]
+
+        movie = MovieData('lotr')
+        movie.characters = [MovieCharacter(name) for name in ['FRODO', 'SAM', 'MR FRODO', 'ORC']]
+
+        imsdb.dataextraction.get_real_name_and_id(movie.characters, movie, Resolver())
+
+        self.assertEqual([(character.id, character.name, character.real_name)
+                          for character in movie.characters],
+                         [(0, 'FRODO', 'Frodo Baggins'), (1, 'SAM', 'Samwise Gamgee'),
+                          (3, 'ORC', None)])
+        self.assertIs(movie.character_by_real_name('Frodo Baggins'), movie.characters[0])
+        self.assertIsNone(movie.character_by_name('MR FRODO'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+"""
+.. module:: test_datastructures
+    :synopsis: Tests of the indexes of the characters and of the tables built from them
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import array
+import cPickle
+import random
+import unittest
+
+from imsdb.datastructures import MovieCharacter, MovieData, MovieScene
+
+
+def build_movie(n_characters=8, seed=3):
+    """Returns a movie with random scenes, interactions and mentions."""
+
+    generator = random.Random(seed)
+
+    movie = MovieData('lotr')
+    movie.title = 'The Fellowship of the Ring'
+    movie.characters = [MovieCharacter('CHAR' + str(i)) for i in range(n_characters)]
+
+    for character in movie.characters:
+        character.id = 5 * movie.characters.index(character)
+        character.real_name = character.name.capitalize()
+
+    for character in movie.characters:
+        others = [other for other in movie.characters if other is not character]
+
+        character.set_scene_statistics(
+            sorted(generator.sample(range(50), generator.randint(1, 4))),
+            dict((other.id, generator.randint(1, 5))
+                 for other in generator.sample(others, generator.randint(0, 4))))
+
+        for other in generator.sample(others, generator.randint(0, 4)):
+            character.add_mentioned_character(other)
+
+    return movie
+
+
+def build_edges_naively(movie, counts_of, undirected):
+    """Builds the edges by looking the targets up by name in the list."""
+
+    edges = []
+    added_pairs = set()
+
+    for source in movie.characters:
+        if len(source.appeared_scenes) <= 1:
+            continue
+
+        for target_name, value in sorted(counts_of(source).iteritems(),
+                                         key=lambda (name, _): movie.character_by_name(name).id):
+            target = [character for character in movie.characters
+                      if character.name == target_name][0]
+
+            if len(target.appeared_scenes) <= 1:
+                continue
+
+            if undirected:
+                pair = frozenset([source.name, target.name])
+
+                if pair in added_pairs:
+                    continue
+
+                added_pairs.add(pair)
+
+            edges.append((source.name, target.name, source.id, target.id, value))
+
+    return edges
+
+
+class CharacterIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.movie = MovieData('lotr')
+        self.movie.characters = [MovieCharacter(name) for name in ['FRODO', 'SAM', 'MR FRODO']]
+
+        self.frodo, self.sam, self.mr_frodo = self.movie.characters
+
+    def test_lookups_follow_the_setters(self):
+        self.assertIs(self.movie.character_by_name('SAM'), self.sam)
+        self.assertIsNone(self.movie.character_by_id(1))
+
+        self.sam.id = 1
+        self.sam.real_name = 'Samwise Gamgee'
+
+        self.assertIs(self.movie.character_by_id(1), self.sam)
+        self.assertIs(self.movie.character_by_real_name('Samwise Gamgee'), self.sam)
+
+        self.sam.id = 2
+        self.sam.real_name = 'Sam'
+
+        self.assertIsNone(self.movie.character_by_id(1))
+        self.assertIsNone(self.movie.character_by_real_name('Samwise Gamgee'))
+        self.assertIs(self.movie.character_by_id(2), self.sam)
+
+    def test_duplicated_real_names_are_kept_in_order(self):
+        self.mr_frodo.real_name = 'Frodo Baggins'
+        self.frodo.real_name = 'Frodo Baggins'
+
+        self.assertIs(self.movie.character_by_real_name('Frodo Baggins'), self.mr_frodo)
+
+        self.movie.clean_up_character_list()
+
+        self.assertEqual(self.movie.characters, [self.frodo, self.sam])
+        self.assertIs(self.movie.character_by_real_name('Frodo Baggins'), self.frodo)
+        self.assertIsNone(self.movie.character_by_name('MR FRODO'))
+
+    def test_add_and_remove_characters(self):
+        pippin = MovieCharacter('PIPPIN')
+        self.movie.add_character(pippin)
+        pippin.id = 7
+
+        self.assertIs(self.movie.character_by_id(7), pippin)
+
+        self.movie.remove_character(pippin)
+        pippin.id = 8
+
+        self.assertNotIn(pippin, self.movie.characters)
+        self.assertIsNone(self.movie.character_by_name('PIPPIN'))
+        self.assertIsNone(self.movie.character_by_id(8))
+
+    def test_replaced_characters_leave_the_index(self):
+        self.movie.characters = [self.sam]
+        self.frodo.id = 0
+
+        self.assertIsNone(self.movie.character_by_name('FRODO'))
+        self.assertIsNone(self.movie.character_by_id(0))
+        self.assertIs(self.movie.character_by_name('SAM'), self.sam)
+
+
+class CharacterCountsTest(unittest.TestCase):
+
+    def test_counts_are_keyed_by_id_and_read_by_name(self):
+        movie = MovieData('lotr')
+        movie.characters = [MovieCharacter(name) for name in ['FRODO', 'SAM', 'GANDALF']]
+
+        for character_id, character in enumerate(movie.characters):
+            character.id = character_id
+
+        frodo, sam, gandalf = movie.characters
+
+        frodo.add_mentioned_character(sam)
+        frodo.add_mentioned_character(sam)
+        frodo.add_mentioned_character(frodo)
+        frodo.add_characters_interacted_with(['FRODO', 'GANDALF', 'NARRATOR'], ['GANDALF'])
+        frodo.add_characters_interacted_with(['FRODO', 'GANDALF'], [])
+
+        self.assertEqual(frodo.mention_counts, {1: 2})
+        self.assertEqual(frodo.mentioned_characters, {'SAM': 2})
+        self.assertEqual(frodo.interaction_counts, {2: 2})
+        self.assertEqual(frodo.characters_interacted_with, {'GANDALF': 2})
+
+        # The chars removed from the movie are left out of the names
+        movie.remove_character(gandalf)
+
+        self.assertEqual(frodo.interaction_counts, {2: 2})
+        self.assertEqual(frodo.characters_interacted_with, {})
+
+
+class TableEdgesTest(unittest.TestCase):
+
+    def check_edges(self, movie):
+        interactions = zip(*movie.build_table_interactions())
+        mentions = zip(*movie.build_table_mentions())
+
+        self.assertEqual(interactions, build_edges_naively(
+            movie, lambda character: character.characters_interacted_with, True))
+        self.assertEqual(mentions, build_edges_naively(
+            movie, lambda character: character.mentioned_characters, False))
+
+    def test_edges(self):
+        for seed in range(10):
+            self.check_edges(build_movie(seed=seed))
+
+    def test_each_pair_of_interactions_once(self):
+        movie = build_movie()
+
+        pairs = [frozenset(edge[2:4]) for edge in zip(*movie.build_table_interactions())]
+
+        self.assertEqual(len(pairs), len(set(pairs)))
+
+    def test_chars_table(self):
+        movie = build_movie()
+
+        chars = zip(*movie.build_table_chars())
+
+        self.assertEqual(chars, [(character.id, character.name, character.gender,
+                                  len(character.appeared_scenes), character.appeared_scenes)
+                                 for character in movie.characters
+                                 if len(character.appeared_scenes) > 1])
+
+
+class PickleTest(unittest.TestCase):
+
+    def test_movie_round_trip(self):
+        movie = build_movie()
+        movie.fingerprint = 'abc'
+        movie.script = 'lotr.html'
+        movie.scenes = [MovieScene(0, 10, array.array('i', [1, 2, 3, 4]))]
+
+        loaded = cPickle.loads(cPickle.dumps(movie, cPickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual((loaded.title, loaded.sub_wikia, loaded.fingerprint, loaded.script),
+                         (movie.title, movie.sub_wikia, movie.fingerprint, movie.script))
+        self.assertEqual(loaded.scenes, movie.scenes)
+
+        for original, character in zip(movie.characters, loaded.characters):
+            self.assertEqual((character.id, character.name, character.real_name,
+                              character.gender, character.appeared_scenes,
+                              character.interaction_counts, character.mention_counts),
+                             (original.id, original.name, original.real_name,
+                              original.gender, original.appeared_scenes,
+                              original.interaction_counts, original.mention_counts))
+
+            # The names are interned again and the indexes rebuilt
+            self.assertIs(character.name, original.name)
+            self.assertIs(loaded.character_by_id(character.id), character)
+
+        self.assertEqual(loaded.build_table_interactions(), movie.build_table_interactions())
+
+    def test_character_round_trip(self):
+        character = MovieCharacter('FRODO')
+        character.id = 3
+        character.add_appeared_scene(4)
+
+        loaded = cPickle.loads(cPickle.dumps(character, cPickle.HIGHEST_PROTOCOL))
+
+        self.assertFalse(hasattr(loaded, '__dict__'))
+        self.assertEqual((loaded.id, loaded.name, list(loaded.appeared_scenes)), (3, 'FRODO', [4]))
+
+        # A char out of any movie is keyed on nothing
+        loaded.id = 4
+
+        self.assertEqual(loaded.id, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+.. module:: test_engines
+    :synopsis: Tests of the registry of the database engine
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.engines
+
+
+class EngineRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saved_settings = dict(imsdb.engines._settings)
+
+        imsdb.engines.configure(backend='sqlite',
+                                sqlite_path=os.path.join(self.directory, 'movies.sqlite'))
+
+    def tearDown(self):
+        imsdb.engines.configure(**self.saved_settings)
+        shutil.rmtree(self.directory)
+
+    def test_engine_is_shared(self):
+        self.assertIs(imsdb.engines.get_engine(), imsdb.engines.get_engine())
+
+    def test_configure_creates_another_engine(self):
+        engine = imsdb.engines.get_engine()
+
+        imsdb.engines.configure(sqlite_path=os.path.join(self.directory, 'other.sqlite'))
+
+        self.assertIsNot(imsdb.engines.get_engine(), engine)
+        self.assertEqual(imsdb.engines.get_engine().url.database,
+                         os.path.join(self.directory, 'other.sqlite'))
+
+    def test_sqlite_pragmas(self):
+        conn = imsdb.engines.get_engine().connect()
+
+        try:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').scalar(), 'wal')
+            self.assertEqual(conn.execute('PRAGMA foreign_keys').scalar(), 1)
+        finally:
+            conn.close()
+
+    def test_unknown_settings_are_refused(self):
+        self.assertRaises(ValueError, imsdb.engines.configure, pool=3)
+        self.assertRaises(ValueError, imsdb.engines.configure, backend='postgresql')
+
+        self.assertEqual(imsdb.engines._settings['backend'], 'sqlite')
+
+
+class ReadCredentialsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_credentials(self):
+        path = os.path.join(self.directory, 'pass.txt')
+
+        with open(path, 'w') as credentials:
+            credentials.write('user:frodo\npassword:mell:on\nip:@127.0.0.1\n')
+
+        self.assertEqual(imsdb.engines.read_credentials(path), 'frodo:mell:on@127.0.0.1')
+
+    def test_missing_credentials(self):
+        self.assertRaises(EnvironmentError, imsdb.engines.read_credentials,
+                          os.path.join(self.directory, 'pass.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+.. module:: test_export
+    :synopsis: Tests of the export of the tables of a movie to Parquet files
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+import imsdb.export
+import imsdb.pipeline
+
+
+def _tables():
+    """Returns a small chars and interactions table."""
+
+    return {'chars': pd.DataFrame({'id': [0, 1], 'name': ['FRODO', 'SAM']}),
+            'interactions': pd.DataFrame({'ninteractions': [3],
+                                          'sourceid': [0],
+                                          'targetid': [1]})}
+
+
+class ExportWithPyarrowTest(unittest.TestCase):
+    """The tables are written to one Parquet file per table and movie."""
+
+    def setUp(self):
+        if imsdb.export.pyarrow is None:
+            self.skipTest('pyarrow is not installed')
+
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_tables_are_written_to_partitions(self):
+        tables = _tables()
+
+        paths = imsdb.export.export_movie(self.output_dir, 'lotr 1', tables)
+
+        self.assertEqual(paths,
+                         [os.path.join(self.output_dir, 'chars', 'movie=lotr_1', 'part-0.parquet'),
+                          os.path.join(self.output_dir, 'interactions', 'movie=lotr_1',
+                                       'part-0.parquet')])
+
+        for table_name, path in zip(sorted(tables), paths):
+            df = imsdb.export.pyarrow.parquet.read_table(path).to_pandas()
+
+            self.assertTrue(df.equals(tables[table_name]))
+
+    def test_arguments_are_accepted(self):
+        parser = argparse.ArgumentParser()
+        imsdb.pipeline.add_pipeline_arguments(parser)
+
+        args = parser.parse_args(['--export_dir', self.output_dir])
+
+        imsdb.pipeline.check_pipeline_arguments(parser, args)
+
+
+class ExportWithoutPyarrowTest(unittest.TestCase):
+    """Without pyarrow the export fails with a clear message, before any
+    movie is processed."""
+
+    def setUp(self):
+        self.saved_modules = dict((name, module) for name, module in sys.modules.items()
+                                  if name == 'pyarrow' or name.startswith('pyarrow.'))
+
+        # A None entry makes the import of pyarrow fail
+        for name in self.saved_modules:
+            del sys.modules[name]
+
+        sys.modules['pyarrow'] = None
+        reload(imsdb.export)
+
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        del sys.modules['pyarrow']
+        sys.modules.update(self.saved_modules)
+        reload(imsdb.export)
+
+        shutil.rmtree(self.output_dir)
+
+    def test_export_raises_import_error(self):
+        self.assertIsNone(imsdb.export.pyarrow)
+
+        with self.assertRaises(ImportError) as context:
+            imsdb.export.export_movie(self.output_dir, 'lotr', _tables())
+
+        self.assertIn('pyarrow', str(context.exception))
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_arguments_are_refused(self):
+        parser = argparse.ArgumentParser()
+        imsdb.pipeline.add_pipeline_arguments(parser)
+
+        args = parser.parse_args(['--export_dir', self.output_dir])
+
+        # parser.error() prints the message and exits
+        stderr = sys.stderr
+        sys.stderr = open(os.devnull, 'w')
+
+        try:
+            with self.assertRaises(SystemExit):
+                imsdb.pipeline.check_pipeline_arguments(parser, args)
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+
+    def test_arguments_without_export_are_accepted(self):
+        parser = argparse.ArgumentParser()
+        imsdb.pipeline.add_pipeline_arguments(parser)
+
+        imsdb.pipeline.check_pipeline_arguments(parser, parser.parse_args([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+.. module:: test_filehandlers
+    :synopsis: Tests of the memory-mapped movie scripts
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import imsdb.filehandlers
+from tests.scripts import HTML, HTML_HEADER, SCRIPT
+
+
+class OpenMovieScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        # open_movie_script() prints the errors
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+        shutil.rmtree(self.directory)
+
+    def open_script(self, html):
+        with open(os.path.join(self.directory, 'movie.html'), 'wb') as html_file:
+            html_file.write(html)
+
+        return imsdb.filehandlers.open_movie_script('movie.html', self.directory)
+
+    def test_script_and_title(self):
+        script, title = self.open_script(HTML)
+
+        self.assertEqual(title, 'SyntheticMovie')
+        self.assertEqual(len(script), len(SCRIPT))
+        self.assertEqual(script[:], SCRIPT)
+        self.assertEqual(script.start, len(HTML_HEADER))
+
+        script.close()
+
+    def test_offsets_are_relative_to_the_script(self):
+        script, _ = self.open_script(HTML)
+
+        for sub in ['<b>', '<b>EXT.', 'SUPER', 'BLACK SCREEN']:
+            self.assertEqual(script.find(sub), SCRIPT.find(sub))
+            self.assertEqual(script.find(sub, 40), SCRIPT.find(sub, 40))
+            self.assertEqual(script.find(sub, 40, 120), SCRIPT.find(sub, 40, 120))
+
+        # The footer isn't part of the script
+        self.assertEqual(script.find('IMSDb footer'), -1)
+
+        self.assertEqual(script[10:20], SCRIPT[10:20])
+        self.assertEqual(script[len(SCRIPT) - 5:len(SCRIPT) + 50], SCRIPT[-5:])
+        self.assertEqual(script[30:10], '')
+        self.assertEqual(str(script.view(10, 20)), SCRIPT[10:20])
+
+        script.close()
+
+    def test_script_without_footer_ends_with_the_file(self):
+        script, _ = self.open_script(HTML_HEADER + SCRIPT)
+
+        self.assertEqual(script[:], SCRIPT)
+
+        script.close()
+
+    def test_script_without_title(self):
+        _, title = self.open_script(HTML.replace('<title>', '<TITLE>'))
+
+        self.assertIsNone(title)
+
+    def test_file_without_header(self):
+        self.assertIsNone(self.open_script(SCRIPT))
+
+    def test_empty_file(self):
+        self.assertIsNone(self.open_script(''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+"""
+.. module:: test_freebase
+    :synopsis: Tests of the Freebase client and of the gender resolver against a local server
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import BaseHTTPServer
+import json
+import os
+import shutil
+import SocketServer
+import tempfile
+import threading
+import unittest
+import urlparse
+
+import imsdb.dataextraction
+import imsdb.filehandlers
+import imsdb.freebase
+import imsdb.gender
+from imsdb.datastructures import MovieCharacter
+
+GENDER_PROPERTY = '/fictional_universe/fictional_character/gender'
+
+# Real name -> (Freebase ID, gender)
+CHARACTERS = {'Frodo Baggins': ('/m/frodo', 'Male'),
+              'Arwen': ('/m/arwen', 'Female'),
+              'Gollum': ('/m/gollum', None)}
+
+
+class FreebaseHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers the search and topic requests like Freebase and records
+    each request with the port of the client connection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse.urlsplit(self.path)
+        params = dict(urlparse.parse_qsl(url.query))
+
+        self.server.requests.append((self.client_address[1], url.path, params))
+
+        if self.server.broken:
+            self.send_error(503)
+            return
+
+        if url.path == '/freebase/search':
+            if params['query'] in CHARACTERS:
+                body = {'result': [{'id': CHARACTERS[params['query']][0]}]}
+            else:
+                body = {'result': []}
+        else:
+            genders = dict((topic_id, gender) for topic_id, gender in CHARACTERS.values())
+            gender = genders[url.path[len('/freebase/topic'):]]
+
+            if gender is None:
+                body = {'property': {}}
+            else:
+                body = {'property': {params['filter']: {'values': [{'text': gender}]}}}
+
+        body = json.dumps(body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+
+        if self.server.close_connections:
+            self.send_header('Connection', 'close')
+            self.close_connection = 1
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FreebaseServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), FreebaseHandler)
+
+        self.requests = []
+        self.close_connections = False
+        self.broken = False
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/freebase' % self.server_address[1]
+
+
+class LocalServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FreebaseServer()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+        shutil.rmtree(self.directory)
+
+    def connection_ports(self):
+        return set(port for port, _, _ in self.server.requests)
+
+
+class FreebaseClientTest(LocalServerTestCase):
+
+    def test_connection_is_reused(self):
+        client = imsdb.freebase.FreebaseClient('secret', self.server.url, pool_size=2)
+
+        for name in ['Frodo Baggins', 'Arwen', 'Gollum', 'Sauron']:
+            client.search(name)
+
+        client.close()
+
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(len(self.connection_ports()), 1)
+
+    def test_requests_carry_the_key_and_the_parameters(self):
+        client = imsdb.freebase.FreebaseClient('secret', self.server.url)
+
+        self.assertEqual(client.search('Arwen'), {'result': [{'id': '/m/arwen'}]})
+        self.assertEqual(client.topic('/m/arwen', GENDER_PROPERTY),
+                         {'property': {GENDER_PROPERTY: {'values': [{'text': 'Female'}]}}})
+
+        client.close()
+
+        self.assertEqual([(path, params) for _, path, params in self.server.requests],
+                         [('/freebase/search', {'query': 'Arwen', 'key': 'secret'}),
+                          ('/freebase/topic/m/arwen', {'filter': GENDER_PROPERTY,
+                                                       'key': 'secret'})])
+
+    def test_connection_closed_by_the_server_is_replaced(self):
+        self.server.close_connections = True
+
+        client = imsdb.freebase.FreebaseClient('secret', self.server.url)
+
+        for name in ['Frodo Baggins', 'Arwen', 'Gollum']:
+            self.assertIn('result', client.search(name))
+
+        client.close()
+
+        self.assertEqual(len(self.connection_ports()), 3)
+
+
+class GenderResolverTest(LocalServerTestCase):
+
+    def setUp(self):
+        LocalServerTestCase.setUp(self)
+
+        self.api_key_path = os.path.join(self.directory, 'api_key')
+
+        with open(self.api_key_path, 'w') as api_key_file:
+            api_key_file.write('secret\n')
+
+        self.config_path = os.path.join(self.directory, 'config.ini')
+
+        with open(self.config_path, 'w') as config_file:
+            config_file.write('[gender]\nfrodo = male\nsam = male\narwen = female\n')
+
+        self.config_loads = []
+        self.saved_load_config_file = imsdb.filehandlers.load_config_file
+
+        def load_config_file(filename, section):
+            self.config_loads.append((filename, section))
+            return self.saved_load_config_file(filename, section)
+
+        imsdb.filehandlers.load_config_file = load_config_file
+
+    def tearDown(self):
+        imsdb.filehandlers.load_config_file = self.saved_load_config_file
+
+        LocalServerTestCase.tearDown(self)
+
+    def characters(self, names):
+        characters = []
+
+        for name, real_name in names:
+            character = MovieCharacter(name)
+            character.real_name = real_name
+            characters.append(character)
+
+        return characters
+
+    def test_config_is_parsed_once(self):
+        resolver = imsdb.gender.GenderResolver(self.config_path, bypass_gender_retrieval=True)
+
+        first = self.characters([('FRODO', 'Frodo Baggins'), ('ARWEN', 'Arwen')])
+        second = self.characters([('SAM', 'Samwise Gamgee'), ('FRODO', 'Frodo Baggins')])
+
+        resolver.resolve(first)
+        resolver.resolve(second)
+        resolver.close()
+
+        self.assertEqual(self.config_loads, [(self.config_path, 'gender')])
+        self.assertEqual([character.gender for character in first + second],
+                         ['male', 'female', 'male', 'male'])
+        self.assertEqual(self.server.requests, [])
+
+    def test_genders_are_cached_by_real_name(self):
+        resolver = imsdb.gender.GenderResolver(api_key_path=self.api_key_path,
+                                               freebase_url=self.server.url)
+
+        first = self.characters([('FRODO', 'Frodo Baggins'),
+                                 ('MR. FRODO', 'Frodo Baggins'),
+                                 ('ARWEN', 'Arwen'),
+                                 ('SMEAGOL', 'Gollum'),
+                                 ('ORC', None)])
+        second = self.characters([('FRODO', 'Frodo Baggins'), ('GOLLUM', 'Gollum')])
+
+        resolver.resolve(first)
+        resolver.resolve(second)
+        resolver.close()
+
+        searches = sorted(params['query'] for _, path, params in self.server.requests
+                          if path == '/freebase/search')
+
+        self.assertEqual(searches, ['Arwen', 'Frodo Baggins', 'Gollum'])
+        self.assertEqual([character.gender for character in first + second],
+                         ['male', 'male', 'female', 'nogender', 'nogender',
+                          'male', 'nogender'])
+        self.assertEqual(self.config_loads, [])
+
+    def test_genders_are_left_out_without_api_key(self):
+        resolver = imsdb.gender.GenderResolver(api_key_path=os.path.join(self.directory, 'none'),
+                                               freebase_url=self.server.url)
+        characters = self.characters([('FRODO', 'Frodo Baggins')])
+
+        resolver.resolve(characters)
+        resolver.close()
+
+        self.assertEqual(characters[0].gender, '')
+        self.assertEqual(self.server.requests, [])
+
+    def test_failed_lookups_give_nogender(self):
+        self.server.broken = True
+
+        resolver = imsdb.gender.GenderResolver(api_key_path=self.api_key_path,
+                                               freebase_url=self.server.url)
+        characters = self.characters([('FRODO', 'Frodo Baggins'), ('ARWEN', 'Arwen')])
+
+        resolver.resolve(characters)
+        resolver.close()
+
+        self.assertEqual([character.gender for character in characters],
+                         ['nogender', 'nogender'])
+
+    def test_gender_does_not_replace_the_real_name(self):
+        args = argparse.Namespace(config=self.config_path,
+                                  bypass_gender_retrieval=False,
+                                  freebase_url=self.server.url)
+
+        resolver = imsdb.gender.GenderResolver(api_key_path=self.api_key_path,
+                                               freebase_url=self.server.url)
+        characters = self.characters([('FRODO', 'Frodo Baggins'), ('ARWEN', 'Arwen')])
+
+        imsdb.dataextraction.get_gender(characters, args, resolver)
+
+        self.assertEqual([(character.real_name, character.gender) for character in characters],
+                         [('Frodo Baggins', 'male'), ('Arwen', 'female')])
+
+
+if __name__ == '__main__':
+    unittest.main()
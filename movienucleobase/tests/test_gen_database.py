@@ -0,0 +1,238 @@
+"""
+.. module:: test_gen_database
+    :synopsis: Tests of the tables of the movies in a SQLite database
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import sqlalchemy as sql
+
+import imsdb.engines
+import imsdb.gen_database
+from imsdb.datastructures import MovieCharacter, MovieData
+
+CHARS = [(0, 'FRODO', 'male', 2, '1,2'),
+         (1, 'SAM', 'male', 1, '2')]
+INTERACTIONS = [(0, 1, 1), (1, 0, 1)]
+
+
+def build_movie(title, script, fingerprint, names=('FRODO', 'SAM')):
+    """Returns a movie whose chars all speak together in two scenes."""
+
+    movie = MovieData('lotr')
+    movie.title = title
+    movie.script = script
+    movie.fingerprint = fingerprint
+    movie.characters = [MovieCharacter(name) for name in names]
+
+    for character_id, character in enumerate(movie.characters):
+        character.id = character_id
+
+    for character in movie.characters:
+        character.set_scene_statistics([1, 2], dict((other.id, 2) for other in movie.characters
+                                                    if other is not character))
+
+    return movie
+
+
+class SQLiteDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'movies.sqlite')
+
+        self.saved_settings = dict(imsdb.engines._settings)
+        imsdb.engines.configure(backend='sqlite', sqlite_path=self.path)
+
+    def tearDown(self):
+        imsdb.engines.configure(**self.saved_settings)
+        shutil.rmtree(self.directory)
+
+    def insert(self, title):
+        conn = imsdb.engines.get_engine().connect()
+
+        try:
+            imsdb.gen_database.create_tables(conn)
+
+            with conn.begin():
+                imsdb.gen_database.insert_movie(conn, title, CHARS, INTERACTIONS)
+        finally:
+            conn.close()
+
+    def rows(self, query):
+        conn = sqlite3.connect(self.path)
+
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_movies_share_the_char_ids(self):
+        self.insert('The Fellowship of the Ring')
+        self.insert('The Two Towers')
+
+        self.assertEqual(self.rows('SELECT fk_movie, id_char, name FROM chars ' +
+                                   'ORDER BY fk_movie, id_char'),
+                         [(1, 0, 'FRODO'), (1, 1, 'SAM'), (2, 0, 'FRODO'), (2, 1, 'SAM')])
+        self.assertEqual(len(self.rows('SELECT * FROM interactions')), 4)
+
+    def test_char_ids_are_unique_in_a_movie(self):
+        conn = imsdb.engines.get_engine().connect()
+
+        try:
+            imsdb.gen_database.create_tables(conn)
+
+            with self.assertRaises(sql.exc.IntegrityError):
+                with conn.begin():
+                    imsdb.gen_database.insert_movie(conn, 'The Return of the King',
+                                                    CHARS + CHARS[:1], [])
+        finally:
+            conn.close()
+
+    def test_chars_keyed_on_their_id_alone_are_moved(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript('''
+            CREATE TABLE movies (id_movie INTEGER PRIMARY KEY AUTOINCREMENT,
+                                 dsc_movie varchar(100) NOT NULL);
+            CREATE TABLE chars (id_char INT PRIMARY KEY, fk_movie INT NOT NULL,
+                                name TEXT NOT NULL, gender TEXT NOT NULL,
+                                n_scenes INT NOT NULL, scenes_appeared TEXT NOT NULL,
+                                n_scenes_mention TEXT, scenes_mentioned TEXT,
+                                FOREIGN KEY(fk_movie) REFERENCES movies(id_movie));
+            CREATE TABLE interactions (fk_movie INT NOT NULL, fk_char_1 INT NOT NULL,
+                                       fk_char_2 INT NOT NULL, n_interactions INT NOT NULL,
+                                       type INT NOT NULL,
+                                       FOREIGN KEY(fk_movie) REFERENCES movies(id_movie),
+                                       FOREIGN KEY(fk_char_1) REFERENCES chars(id_char),
+                                       FOREIGN KEY(fk_char_2) REFERENCES chars(id_char));
+            CREATE INDEX interactions_movie_chars ON interactions(fk_movie, fk_char_1, fk_char_2);
+            INSERT INTO movies (dsc_movie) VALUES ('The Fellowship of the Ring');
+            INSERT INTO chars VALUES (0, 1, 'FRODO', 'male', 2, '1,2', NULL, NULL);
+            INSERT INTO chars VALUES (1, 1, 'SAM', 'male', 1, '2', NULL, NULL);
+            INSERT INTO interactions VALUES (1, 0, 1, 1, 0);
+            INSERT INTO interactions VALUES (1, 1, 0, 1, 0);
+        ''')
+        conn.close()
+
+        self.insert('The Two Towers')
+
+        self.assertEqual(self.rows('SELECT fk_movie, id_char, name FROM chars ' +
+                                   'ORDER BY fk_movie, id_char'),
+                         [(1, 0, 'FRODO'), (1, 1, 'SAM'), (2, 0, 'FRODO'), (2, 1, 'SAM')])
+        self.assertEqual(self.rows('SELECT * FROM interactions ORDER BY fk_movie, fk_char_1'),
+                         [(1, 0, 1, 1, 0), (1, 1, 0, 1, 0), (2, 0, 1, 1, 0), (2, 1, 0, 1, 0)])
+        self.assertEqual(self.rows("SELECT name FROM sqlite_master WHERE name LIKE '%legacy%'"),
+                         [])
+
+        inspector = sql.inspect(imsdb.engines.get_engine())
+
+        self.assertEqual(inspector.get_pk_constraint('chars')['constrained_columns'],
+                         ['fk_movie', 'id_char'])
+        self.assertEqual([index['name'] for index in inspector.get_indexes('interactions')],
+                         ['interactions_movie_chars'])
+
+
+
+class BuildDatabaseTest(SQLiteDatabaseTest):
+
+    def setUp(self):
+        SQLiteDatabaseTest.setUp(self)
+
+        # build_database() prints its progress
+        self.saved_stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.saved_stdout
+
+        SQLiteDatabaseTest.tearDown(self)
+
+    def movies(self):
+        return self.rows('SELECT id_movie, dsc_movie, script, fingerprint FROM movies ' +
+                         'ORDER BY id_movie')
+
+    def test_scripts_with_the_same_title_are_both_kept(self):
+        first = build_movie('Synthetic Movie', 'm1.html', 'a' * 40)
+        second = build_movie('Synthetic Movie', 'm2.html', 'b' * 40, ('GANDALF', 'PIPPIN', 'MERRY'))
+
+        for _ in range(2):
+            imsdb.gen_database.build_database(first)
+            imsdb.gen_database.build_database(second)
+
+        self.assertEqual(self.movies(),
+                         [(1, 'Synthetic Movie', 'm1.html', 'a' * 40),
+                          (2, 'Synthetic Movie', 'm2.html', 'b' * 40)])
+        self.assertEqual(self.rows('SELECT fk_movie, name FROM chars ORDER BY fk_movie, id_char'),
+                         [(1, 'FRODO'), (1, 'SAM'), (2, 'GANDALF'), (2, 'PIPPIN'), (2, 'MERRY')])
+
+        self.assertTrue(imsdb.gen_database.movie_already_inserted('a' * 40))
+        self.assertTrue(imsdb.gen_database.movie_already_inserted('b' * 40))
+        self.assertFalse(imsdb.gen_database.movie_already_inserted('c' * 40))
+
+    def test_another_draft_replaces_the_movie(self):
+        imsdb.gen_database.build_database(build_movie('Synthetic Movie', 'm1.html', 'a' * 40))
+        imsdb.gen_database.build_database(build_movie('Synthetic Movie', 'm1.html', 'b' * 40,
+                                                      ('GANDALF', 'PIPPIN')))
+
+        self.assertEqual(self.movies(), [(2, 'Synthetic Movie', 'm1.html', 'b' * 40)])
+        self.assertEqual(self.rows('SELECT fk_movie, name FROM chars ORDER BY id_char'),
+                         [(2, 'GANDALF'), (2, 'PIPPIN')])
+        self.assertEqual(self.rows('SELECT DISTINCT fk_movie FROM interactions'), [(2,)])
+
+    def test_replace_forces_the_same_draft(self):
+        movie = build_movie('Synthetic Movie', 'm1.html', 'a' * 40)
+
+        imsdb.gen_database.build_database(movie)
+        imsdb.gen_database.build_database(movie)
+        self.assertEqual([row[0] for row in self.movies()], [1])
+
+        imsdb.gen_database.build_database(movie, replace=True)
+        self.assertEqual([row[0] for row in self.movies()], [2])
+
+    def test_movies_without_script_are_claimed_once(self):
+        conn = imsdb.engines.get_engine().connect()
+        imsdb.gen_database.create_tables(conn)
+
+        with conn.begin():
+            imsdb.gen_database.insert_movie(conn, 'Synthetic Movie', CHARS, INTERACTIONS)
+            imsdb.gen_database.insert_movie(conn, 'Other Movie', CHARS, INTERACTIONS, 'c' * 40)
+
+        conn.close()
+
+        imsdb.gen_database.build_database(build_movie('Synthetic Movie', 'm1.html', 'a' * 40))
+        imsdb.gen_database.build_database(build_movie('Synthetic Movie', 'm2.html', 'b' * 40))
+
+        # The movie with another fingerprint might come from another script
+        imsdb.gen_database.build_database(build_movie('Other Movie', 'm3.html', 'd' * 40))
+
+        self.assertEqual(self.movies(),
+                         [(2, 'Other Movie', None, 'c' * 40),
+                          (3, 'Synthetic Movie', 'm1.html', 'a' * 40),
+                          (4, 'Synthetic Movie', 'm2.html', 'b' * 40),
+                          (5, 'Other Movie', 'm3.html', 'd' * 40)])
+
+    def test_same_fingerprint_without_script_gets_the_script(self):
+        conn = imsdb.engines.get_engine().connect()
+        imsdb.gen_database.create_tables(conn)
+
+        with conn.begin():
+            imsdb.gen_database.insert_movie(conn, 'Synthetic Movie', CHARS, INTERACTIONS, 'a' * 40)
+
+        conn.close()
+
+        imsdb.gen_database.build_database(build_movie('Synthetic Movie', 'm1.html', 'a' * 40))
+
+        self.assertEqual(self.movies(), [(1, 'Synthetic Movie', 'm1.html', 'a' * 40)])
+
+
+if __name__ == '__main__':
+    unittest.main()
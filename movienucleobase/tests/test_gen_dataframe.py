@@ -0,0 +1,102 @@
+"""
+.. module:: test_gen_dataframe
+    :synopsis: Tests of the dataframes of the chars, interactions and mentions
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.gen_dataframe
+from tests.test_datastructures import build_movie
+
+
+class BuildDataFrameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.movie = build_movie()
+
+    def test_chars(self):
+        df_chars = imsdb.gen_dataframe.build_df_chars(self.movie)
+
+        self.assertEqual(list(df_chars.columns), imsdb.gen_dataframe.CHARS_COLUMNS)
+        self.assertEqual([str(dtype) for dtype in df_chars.dtypes],
+                         ['category', 'int32', 'category', 'int32'])
+
+        df_id_1, df_names, df_gender, df_n_scenes, _ = self.movie.build_table_chars()
+
+        self.assertEqual(df_chars['id'].tolist(), df_id_1)
+        self.assertEqual(df_chars['name'].tolist(), df_names)
+        self.assertEqual(df_chars['gender'].tolist(), df_gender)
+        self.assertEqual(df_chars['nsceneappearances'].tolist(), df_n_scenes)
+
+    def check_edges(self, df_edges, columns, rows):
+        self.assertEqual(list(df_edges.columns), columns)
+        self.assertEqual([str(df_edges[column].dtype) for column in columns],
+                         ['int32', 'category', 'int32', 'category', 'int32'])
+
+        # Both name columns share the categories, so they can be compared
+        self.assertEqual(list(df_edges['source'].cat.categories),
+                         list(df_edges['target'].cat.categories))
+
+        df_char_1, df_char_2, df_char_1_id, df_char_2_id, df_number = rows
+
+        self.assertEqual(df_edges['source'].tolist(), df_char_1)
+        self.assertEqual(df_edges['target'].tolist(), df_char_2)
+        self.assertEqual(df_edges['sourceid'].tolist(), df_char_1_id)
+        self.assertEqual(df_edges['targetid'].tolist(), df_char_2_id)
+        self.assertEqual(df_edges[columns[0]].tolist(), df_number)
+
+    def test_interactions(self):
+        self.check_edges(imsdb.gen_dataframe.build_df_interactions(self.movie),
+                         imsdb.gen_dataframe.INTERACTIONS_COLUMNS,
+                         self.movie.build_table_interactions())
+
+    def test_mentions(self):
+        self.check_edges(imsdb.gen_dataframe.build_df_mentions(self.movie),
+                         imsdb.gen_dataframe.MENTIONS_COLUMNS,
+                         self.movie.build_table_mentions())
+
+
+class WriteJsonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records(self):
+        movie = build_movie()
+        df_chars = imsdb.gen_dataframe.build_df_chars(movie)
+        df_interactions = imsdb.gen_dataframe.build_df_interactions(movie)
+
+        json_name = os.path.join(self.directory, 'lotr')
+        imsdb.gen_dataframe.write_nodes_edges_to_json(df_chars, df_interactions, json_name)
+
+        with open(json_name + '.json') as json_file:
+            document = json.load(json_file)
+
+        self.assertEqual(document['nodes'], df_chars.to_dict('records'))
+        self.assertEqual(document['links'], df_interactions.to_dict('records'))
+
+    def test_empty_frames(self):
+        movie = build_movie()
+        movie.characters = []
+
+        json_name = os.path.join(self.directory, 'empty')
+        imsdb.gen_dataframe.write_nodes_edges_to_json(imsdb.gen_dataframe.build_df_chars(movie),
+                                                      imsdb.gen_dataframe.build_df_interactions(movie),
+                                                      json_name)
+
+        with open(json_name + '.json') as json_file:
+            self.assertEqual(json.load(json_file), {'nodes': [], 'links': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+.. module:: test_interactions
+    :synopsis: Tests of the interactions counted from the scene x character matrix
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import random
+import unittest
+
+import imsdb.interactions
+from imsdb.datastructures import MovieCharacter
+
+NAMES = ['FRODO', 'SAM', 'GANDALF', 'PIPPIN', 'MERRY', 'GOLLUM']
+
+
+def count_naively(scenes):
+    """Counts the scenes and interactions of each name scene by scene."""
+
+    appeared = dict((name, []) for name in NAMES)
+    interactions = dict((name, {}) for name in NAMES)
+
+    for scene_number, names in scenes:
+        speakers = set(name for name in names if name in appeared)
+
+        for name in speakers:
+            appeared[name].append(scene_number)
+
+            for other in speakers - set([name]):
+                interactions[name][other] = interactions[name].get(other, 0) + 1
+
+    return appeared, interactions
+
+
+class SceneIncidenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scipy = imsdb.interactions.scipy
+
+    def tearDown(self):
+        imsdb.interactions.scipy = self.scipy
+
+    def check_against_naive_counts(self, scenes):
+        characters = [MovieCharacter(name) for name in NAMES]
+
+        for character_id, character in enumerate(characters):
+            character.id = 10 * character_id
+
+        incidence = imsdb.interactions.SceneIncidence(characters)
+
+        for scene_number, names in scenes:
+            incidence.add_scene(scene_number, names)
+
+        self.assertEqual(incidence.n_scenes, len(scenes))
+
+        incidence.update_characters()
+
+        appeared, interactions = count_naively(scenes)
+        ids = dict((character.name, character.id) for character in characters)
+
+        for character in characters:
+            self.assertEqual(list(character.appeared_scenes), appeared[character.name])
+            self.assertEqual(character.interaction_counts,
+                             dict((ids[other], count)
+                                  for other, count in interactions[character.name].iteritems()))
+
+    def random_scenes(self):
+        generator = random.Random(7)
+
+        # Repeated and unknown speakers, empty scenes and gaps in the numbers
+        return [(2 * scene_number,
+                 [generator.choice(NAMES + ['NARRATOR']) for _ in range(generator.randint(0, 5))])
+                for scene_number in range(200)]
+
+    def test_counts(self):
+        self.check_against_naive_counts([(0, ['FRODO', 'SAM', 'FRODO']),
+                                         (1, []),
+                                         (2, ['GANDALF', 'FRODO', 'NARRATOR']),
+                                         (3, ['SAM', 'FRODO'])])
+
+    def test_random_scenes(self):
+        self.check_against_naive_counts(self.random_scenes())
+
+    def test_random_scenes_without_scipy(self):
+        imsdb.interactions.scipy = None
+
+        self.check_against_naive_counts(self.random_scenes())
+
+    def test_no_scenes(self):
+        self.check_against_naive_counts([])
+
+    def test_incidence_matrix(self):
+        characters = [MovieCharacter(name) for name in NAMES[:3]]
+        incidence = imsdb.interactions.SceneIncidence(characters)
+
+        incidence.add_scene(0, ['SAM'])
+        incidence.add_scene(1, ['GANDALF', 'FRODO', 'GANDALF'])
+
+        expected = [[0, 1, 0], [1, 0, 1]]
+
+        if self.scipy is not None:
+            self.assertEqual(incidence.incidence_matrix().toarray().tolist(), expected)
+
+        imsdb.interactions.scipy = None
+
+        self.assertEqual(incidence.incidence_matrix().tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+.. module:: test_mentions
+    :synopsis: Tests of the detection of the characters mentioned in the movie lines
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import unittest
+
+import imsdb.utilities
+from imsdb.datastructures import MovieCharacter
+from imsdb.mentions import MentionDetector
+
+
+class MentionDetectorTest(unittest.TestCase):
+
+    NAMES = ['SAM', 'SAMWISE', 'FRODO', 'MR. FRODO', 'GOLLUM', 'SMEAGOL', 'SAM', 'O']
+
+    def setUp(self):
+        self.characters = [MovieCharacter(name) for name in self.NAMES]
+        self.detector = MentionDetector(self.characters)
+
+    def find_naively(self, movie_line):
+        return [character for character in self.characters
+                if character.name.lower() in movie_line.lower()]
+
+    def test_same_mentions_as_a_scan_of_the_names(self):
+        for movie_line in ['Samwise! Mr. Frodo, wait for me.',
+                           'sMeAgOl, GOLLUM!',
+                           'Po-tay-toes. Boil em, mash em, stick em in a stew.',
+                           'mr. frodo mr. frodo',
+                           '']:
+            self.assertEqual(self.detector.find_mentioned(movie_line),
+                             self.find_naively(movie_line))
+
+    def test_regex_chars_in_the_names(self):
+        detector = MentionDetector([MovieCharacter(name) for name in ['DR. (WHO)', 'DR']])
+
+        self.assertEqual([character.name for character in
+                          detector.find_mentioned('Ask dr. (who) about it')], ['DR. (WHO)', 'DR'])
+        self.assertEqual(detector.find_mentioned('Ask dr. who about it')[0].name, 'DR')
+
+    def test_speaker_is_the_first_character_with_the_name(self):
+        self.assertIs(self.detector.speaker('SAM'), self.characters[0])
+        self.assertIsNone(self.detector.speaker('sam'))
+
+    def test_no_characters(self):
+        self.assertEqual(MentionDetector([]).find_mentioned('Frodo'), [])
+
+
+class FindMentionedCharactersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.characters = [MovieCharacter(name) for name in ['SAM', 'SAMWISE', 'FRODO', 'GOLLUM']]
+        self.detector = MentionDetector(self.characters)
+
+    def names(self, characters):
+        return [character.name for character in characters]
+
+    def test_mentioned_characters_are_found(self):
+        speaker, mentioned = imsdb.utilities.find_mentioned_characters(
+            'FRODO', 'Samwise, where is Gollum?', self.detector)
+
+        self.assertIs(speaker, self.characters[2])
+        self.assertEqual(self.names(mentioned), ['SAM', 'SAMWISE', 'GOLLUM'])
+
+    def test_character_does_not_mention_itself(self):
+        speaker, mentioned = imsdb.utilities.find_mentioned_characters(
+            'FRODO', 'Frodo is tired, Sam.', self.detector)
+
+        self.assertIs(speaker, self.characters[2])
+        self.assertEqual(self.names(mentioned), ['SAM'])
+
+    def test_unknown_speaker_mentions_nobody(self):
+        self.assertEqual(imsdb.utilities.find_mentioned_characters(
+            'NARRATOR', 'Frodo and Sam walk on.', self.detector), (None, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
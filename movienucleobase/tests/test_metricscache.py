@@ -0,0 +1,112 @@
+"""
+.. module:: test_metricscache
+    :synopsis: Tests of the on-disk cache of the metrics of the social networks
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import imsdb.gen_dataframe
+from imsdb.metricscache import MetricsCache
+from tests.test_datastructures import build_movie
+
+
+def build_network(seed=3):
+    """Returns the nodes and edges dataframes of a random movie."""
+
+    movie = build_movie(seed=seed)
+
+    return imsdb.gen_dataframe.build_df_chars(movie), \
+        imsdb.gen_dataframe.build_df_interactions(movie)
+
+
+def build_metrics(n_rows):
+    """Returns a metrics dataframe of n_rows rows."""
+
+    return pd.DataFrame({'id': range(n_rows), 'degree_centrality': [0.5] * n_rows},
+                        columns=['id', 'degree_centrality'])
+
+
+class MetricsKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes, self.edges = build_network()
+
+    def test_key_ignores_the_order_and_the_direction(self):
+        key = MetricsCache.key(self.nodes, self.edges, betweenness_k=None)
+
+        shuffled_nodes = self.nodes.iloc[::-1]
+        flipped_edges = self.edges.iloc[::-1].rename(columns={'source': 'target',
+                                                              'sourceid': 'targetid',
+                                                              'target': 'source',
+                                                              'targetid': 'sourceid'})
+
+        self.assertEqual(MetricsCache.key(shuffled_nodes, flipped_edges, betweenness_k=None), key)
+
+    def test_key_depends_on_the_network_and_the_params(self):
+        key = MetricsCache.key(self.nodes, self.edges, betweenness_k=None)
+
+        heavier_edges = self.edges.copy()
+        heavier_edges['ninteractions'] += 1
+
+        self.assertNotEqual(MetricsCache.key(self.nodes, heavier_edges, betweenness_k=None), key)
+        self.assertNotEqual(MetricsCache.key(self.nodes, self.edges, betweenness_k=4), key)
+        self.assertNotEqual(MetricsCache.key(*build_network(seed=4), betweenness_k=None), key)
+
+
+class MetricsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        cache = MetricsCache(os.path.join(self.directory, 'metrics'))
+        df_metrics = build_metrics(5)
+
+        self.assertIsNone(cache.get('a'))
+
+        cache.set('a', df_metrics)
+
+        self.assertTrue(cache.get('a').equals(df_metrics))
+        self.assertEqual(os.listdir(cache.directory), ['a.pkl'])
+
+    def test_unreadable_entry_is_discarded(self):
+        cache = MetricsCache(self.directory)
+
+        with open(os.path.join(self.directory, 'a.pkl'), 'wb') as entry:
+            entry.write('not a pickle')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'a.pkl')))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = MetricsCache(self.directory)
+
+        cache.set('a', build_metrics(100))
+        entry_size = os.path.getsize(os.path.join(self.directory, 'a.pkl'))
+        cache.max_size = 2 * entry_size
+
+        cache.set('b', build_metrics(100))
+
+        # 'a' is used after 'b', so 'b' is the least recently used
+        for key, mtime in [('a', 2000), ('b', 1000)]:
+            os.utime(os.path.join(self.directory, key + '.pkl'), (mtime, mtime))
+
+        cache.get('a')
+        cache.set('c', build_metrics(100))
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ['a.pkl', 'c.pkl'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+.. module:: test_nameindex
+    :synopsis: Tests of the indexes of the character names against comparing every pair
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import difflib
+import random
+import unittest
+
+from imsdb.nameindex import SimilarNameIndex, SubstringIndex
+
+NAMES = ['FRODO', 'FRODDO', 'SAM', 'SAMWISE', 'GANDALF', 'GANDALF THE GREY', 'ARAGORN',
+         'ARAGON', 'LEGOLAS', 'GIMLI', 'GIMLY', 'BOROMIR', 'ORC OVERSEER', 'ORC', 'A', 'AB']
+
+
+def random_names(count, seed):
+    """Returns random names made of a few letters, so that many are similar."""
+
+    generator = random.Random(seed)
+
+    return [''.join(generator.choice('ABRDO ') for _ in range(generator.randint(1, 9)))
+            for _ in range(count)]
+
+
+class SimilarNameIndexTest(unittest.TestCase):
+
+    def check_against_every_pair(self, names, threshold=0.9):
+        index = SimilarNameIndex(threshold)
+        added = []
+
+        for name in names:
+            expected = any(difflib.SequenceMatcher(None, name, other).ratio() > threshold
+                           for other in added)
+
+            self.assertEqual(index.has_similar(name), expected, name)
+
+            index.add(name)
+            added.append(name)
+
+    def test_character_names(self):
+        self.check_against_every_pair(NAMES)
+
+    def test_random_names(self):
+        for seed in range(5):
+            self.check_against_every_pair(random_names(200, seed))
+            self.check_against_every_pair(random_names(200, seed), 0.6)
+
+
+class SubstringIndexTest(unittest.TestCase):
+
+    def test_against_every_name(self):
+        for names in [NAMES, random_names(300, 1)]:
+            index = SubstringIndex()
+            added = []
+
+            for name in names:
+                self.assertEqual(name in index, any(name in other for other in added), name)
+
+                index.add(name)
+                added.append(name)
+
+    def test_parts_of_a_name(self):
+        index = SubstringIndex()
+        index.add('GANDALF THE GREY')
+
+        for name in ['GANDALF THE GREY', 'GANDALF', 'THE GREY', 'F T', 'Y']:
+            self.assertIn(name, index)
+
+        for name in ['GANDALF THE WHITE', 'gandalf', 'GREY GANDALF']:
+            self.assertNotIn(name, index)
+
+
+if __name__ == '__main__':
+    unittest.main()
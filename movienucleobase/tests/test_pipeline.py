@@ -0,0 +1,213 @@
+"""
+.. module:: test_pipeline
+    :synopsis: Tests of the checks run by the pipeline before parsing a movie script
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import imsdb.dataextraction
+import imsdb.engines
+import imsdb.filehandlers
+import imsdb.gen_database
+import imsdb.pipeline
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(arguments):
+    parser = argparse.ArgumentParser()
+    imsdb.pipeline.add_pipeline_arguments(parser)
+
+    return parser.parse_args(arguments)
+
+
+class MovieFingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = os.path.join(self.directory, 'config.ini')
+
+        self.write(os.path.join(self.directory, 'movie.html'), '<html>Movie</html>')
+        self.write(self.config, '[gender]\nFRODO = male\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, path, content):
+        with open(path, 'wb') as written_file:
+            written_file.write(content)
+
+    def fingerprint(self, arguments):
+        return imsdb.pipeline.movie_fingerprint(
+            'movie.html', parse_args(['--scripts_dir', self.directory] + arguments))
+
+    def test_fingerprint_is_stable(self):
+        self.assertEqual(self.fingerprint([]), self.fingerprint([]))
+        self.assertEqual(len(self.fingerprint([])), 40)
+
+        # The options which don't change the analysis don't change it
+        self.assertEqual(self.fingerprint(['--force', '--database', 'sqlite']),
+                         self.fingerprint([]))
+
+    def test_fingerprint_follows_the_script_the_options_and_the_config(self):
+        fingerprint = self.fingerprint(['--config', self.config])
+
+        self.assertNotEqual(self.fingerprint([]), fingerprint)
+        self.assertNotEqual(self.fingerprint(['--config', self.config, '--nscenes', '5']),
+                            fingerprint)
+        self.assertNotEqual(self.fingerprint(['--config', self.config, '--sub_wikia', 'lotr']),
+                            fingerprint)
+
+        self.write(self.config, '[gender]\nFRODO = female\n')
+        self.assertNotEqual(self.fingerprint(['--config', self.config]), fingerprint)
+
+        fingerprint = self.fingerprint([])
+        self.write(os.path.join(self.directory, 'movie.html'), '<html>Another draft</html>')
+        self.assertNotEqual(self.fingerprint([]), fingerprint)
+
+
+class MovieAlreadyInsertedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saved_settings = dict(imsdb.engines._settings)
+
+    def tearDown(self):
+        imsdb.engines.configure(**self.saved_settings)
+        shutil.rmtree(self.directory)
+
+    def test_inserted_fingerprint_is_skipped(self):
+        imsdb.engines.configure(backend='sqlite',
+                                sqlite_path=os.path.join(self.directory, 'movies.sqlite'))
+
+        conn = imsdb.engines.get_engine().connect()
+        imsdb.gen_database.create_tables(conn)
+        imsdb.gen_database.insert_movie(conn, 'Synthetic Movie', [], [], 'a' * 40, 'm1.html')
+        conn.close()
+
+        self.assertTrue(imsdb.pipeline.movie_already_inserted('a' * 40, parse_args([])))
+        self.assertFalse(imsdb.pipeline.movie_already_inserted('b' * 40, parse_args([])))
+        self.assertFalse(imsdb.pipeline.movie_already_inserted('a' * 40,
+                                                               parse_args(['--force'])))
+        self.assertFalse(imsdb.pipeline.movie_already_inserted('a' * 40,
+                                                               parse_args(['--nscenes', '5'])))
+
+    def test_missing_credentials_process_the_movie(self):
+        imsdb.engines.configure(backend='mysql',
+                                credentials_path=os.path.join(self.directory, 'pass.txt'))
+
+        self.assertFalse(imsdb.pipeline.movie_already_inserted('a' * 40, parse_args([])))
+
+    def test_unreachable_database_processes_the_movie(self):
+        imsdb.engines.configure(backend='sqlite',
+                                sqlite_path=os.path.join(self.directory, 'missing', 'movies.sqlite'))
+
+        self.assertFalse(imsdb.pipeline.movie_already_inserted('a' * 40, parse_args([])))
+
+    def test_sampling_does_not_import_sqlalchemy(self):
+        code = ('import sys, argparse, imsdb.pipeline\n'
+                'parser = argparse.ArgumentParser()\n'
+                'imsdb.pipeline.add_pipeline_arguments(parser)\n'
+                'args = parser.parse_args(["--nscenes", "5"])\n'
+                'assert not imsdb.pipeline.movie_already_inserted("a" * 40, args)\n'
+                'print "sqlalchemy" in sys.modules\n')
+
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=PACKAGE_DIR)
+
+        self.assertEqual(output.strip(), 'False')
+
+
+
+class CheckPipelineArgumentsTest(unittest.TestCase):
+
+    def check(self, arguments):
+        parser = argparse.ArgumentParser()
+        imsdb.pipeline.add_pipeline_arguments(parser)
+
+        imsdb.pipeline.check_pipeline_arguments(parser, parser.parse_args(arguments))
+
+    def test_config_genders_need_the_config(self):
+        # parser.error() prints the message and exits
+        stderr = sys.stderr
+        sys.stderr = open(os.devnull, 'w')
+
+        try:
+            with self.assertRaises(SystemExit):
+                self.check(['--bypass_gender_retrieval'])
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+
+        self.check(['--bypass_gender_retrieval', '--config', 'config.ini'])
+
+
+
+class ParseMovieTest(unittest.TestCase):
+    """The memory-mapped movie script is closed even if the parsing fails."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.opened_scripts = []
+        self.saved_open_movie_script = imsdb.filehandlers.open_movie_script
+        self.saved_extract_characters = imsdb.dataextraction.extract_characters
+
+        def open_movie_script(filename, scripts_dir):
+            opened_script = self.saved_open_movie_script(filename, scripts_dir)
+            self.opened_scripts.append(opened_script[0])
+            return opened_script
+
+        imsdb.filehandlers.open_movie_script = open_movie_script
+
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        imsdb.filehandlers.open_movie_script = self.saved_open_movie_script
+        imsdb.dataextraction.extract_characters = self.saved_extract_characters
+
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+        shutil.rmtree(self.directory)
+
+    def parse(self, script):
+        with open(os.path.join(self.directory, 'movie.html'), 'wb') as script_file:
+            script_file.write('<title>Synthetic Movie</title><br> <table width="100%">' + script)
+
+        args = parse_args(['--scripts_dir', self.directory, '--scene_cache', '',
+                           '--wikia_cache', ''])
+
+        return imsdb.pipeline.parse_movie('movie.html', args, 'a' * 40)
+
+    def assertClosed(self, movie_script):
+        with self.assertRaises(ValueError):
+            movie_script.find('<b>')
+
+    def test_script_is_closed_when_the_parsing_fails(self):
+        def extract_characters(script_events):
+            raise RuntimeError('parsing failed')
+
+        imsdb.dataextraction.extract_characters = extract_characters
+
+        with self.assertRaises(RuntimeError):
+            self.parse('<b>INT. BAG END</b>\n')
+
+        self.assertClosed(self.opened_scripts[0])
+
+    def test_empty_script_is_closed(self):
+        self.assertIsNone(self.parse(''))
+        self.assertClosed(self.opened_scripts[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+.. module:: test_realnames
+    :synopsis: Tests of the concurrent resolution of the real names
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import threading
+import time
+import unittest
+
+import imsdb.realnames
+
+# Margin of the timings, the clock and the scheduler are not exact
+TOLERANCE = 0.01
+
+
+class SlowWikia(object):
+    """Client of the wikia API that takes some time to answer each query
+    and records when each query is sent."""
+
+    def __init__(self, latencies):
+        """Args:
+            latencies (dict): Latency in seconds of each query, 0.01 if not
+            given
+        """
+
+        self.latencies = latencies
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self._lock = threading.Lock()
+
+    def search(self, sub_wikia, query):
+        with self._lock:
+            self.queries.append((sub_wikia, query, time.time()))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.latencies.get(query, 0.01))
+
+        with self._lock:
+            self.in_flight -= 1
+
+        return [query.title() + ' (' + sub_wikia + ')']
+
+    def times(self, sub_wikia):
+        return sorted(sent for queried_wikia, _, sent in self.queries
+                      if queried_wikia == sub_wikia)
+
+
+class RealNameResolverTest(unittest.TestCase):
+
+    def test_real_names_are_in_the_order_of_the_names(self):
+        names = ['SAM', 'FRODO', 'GANDALF', 'ARWEN', 'GOLLUM']
+
+        # The first names answer last
+        wikia = SlowWikia(dict((name, 0.02 * (len(names) - i)) for i, name in enumerate(names)))
+        resolver = imsdb.realnames.RealNameResolver(concurrency=8, rate=None,
+                                                    wikia_client=wikia)
+
+        real_names = resolver.resolve('lotr', names)
+
+        self.assertEqual(real_names, ['Sam', 'Frodo', 'Gandalf', 'Arwen', 'Gollum'])
+        self.assertGreater(wikia.max_in_flight, 1)
+
+        finished = sorted(wikia.queries, key=lambda query: query[2] + wikia.latencies[query[1]])
+        self.assertNotEqual([query for _, query, _ in finished], names)
+
+    def test_each_distinct_name_is_looked_up_once(self):
+        names = ['SAM', 'FRODO', 'SAM', 'GOLLUM', 'FRODO', 'SAM']
+
+        wikia = SlowWikia({})
+        resolver = imsdb.realnames.RealNameResolver(concurrency=4, rate=None,
+                                                    wikia_client=wikia)
+
+        real_names = resolver.resolve('lotr', names)
+
+        self.assertEqual(real_names, ['Sam', 'Frodo', 'Sam', 'Gollum', 'Frodo', 'Sam'])
+        self.assertEqual(sorted(query for _, query, _ in wikia.queries),
+                         ['FRODO', 'GOLLUM', 'SAM'])
+
+    def test_no_names(self):
+        wikia = SlowWikia({})
+        resolver = imsdb.realnames.RealNameResolver(wikia_client=wikia)
+
+        self.assertEqual(resolver.resolve('lotr', []), [])
+        self.assertEqual(wikia.queries, [])
+
+    def test_lookups_are_spaced_out_per_sub_wikia(self):
+        rate = 20
+        names = ['ORC %d' % i for i in range(6)]
+
+        wikia = SlowWikia({})
+        resolver = imsdb.realnames.RealNameResolver(concurrency=8, rate=rate,
+                                                    wikia_client=wikia)
+
+        # Both sub-wikias are resolved at the same time by the same resolver
+        threads = [threading.Thread(target=resolver.resolve, args=(sub_wikia, names))
+                   for sub_wikia in ['lotr', 'starwars']]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for sub_wikia in ['lotr', 'starwars']:
+            times = wikia.times(sub_wikia)
+
+            self.assertEqual(len(times), len(names))
+
+            for previous, following in zip(times, times[1:]):
+                self.assertGreaterEqual(following - previous, 1.0 / rate - TOLERANCE)
+
+        # The limit of a sub-wikia doesn't delay the other one
+        self.assertLess(abs(wikia.times('lotr')[0] - wikia.times('starwars')[0]),
+                        1.0 / rate - TOLERANCE)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_waits_for_the_next_slot_of_the_host(self):
+        limiter = imsdb.realnames.RateLimiter(10)
+
+        start = time.time()
+        limiter.wait('lotr')
+        limiter.wait('starwars')
+        self.assertLess(time.time() - start, 0.1 - TOLERANCE)
+
+        limiter.wait('lotr')
+        self.assertGreaterEqual(time.time() - start, 0.1 - TOLERANCE)
+
+    def test_no_limit(self):
+        limiter = imsdb.realnames.RateLimiter(None)
+
+        start = time.time()
+        for _ in range(100):
+            limiter.wait('lotr')
+        self.assertLess(time.time() - start, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
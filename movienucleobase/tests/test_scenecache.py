@@ -0,0 +1,108 @@
+"""
+.. module:: test_scenecache
+    :synopsis: Tests of the cache of the results of the scenes
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.filehandlers
+from imsdb.datastructures import MovieCharacter, SceneResult
+from imsdb.scenecache import SceneCache, characters_version
+
+SCRIPT = 'HEADER<b>INT. BAG END</b>\nFRODO\nSam!\n<b>EXT. SHIRE</b>\nSAM\nMr. Frodo!\n'
+
+
+class SceneKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'movie.html')
+
+        with open(path, 'wb') as script_file:
+            script_file.write(SCRIPT)
+
+        with open(path, 'rb') as script_file:
+            buffer_ = mmap.mmap(script_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.script = imsdb.filehandlers.MovieScript(buffer_, len('HEADER'), len(SCRIPT))
+
+    def tearDown(self):
+        self.script.close()
+        shutil.rmtree(self.directory)
+
+    def test_view_is_the_slice(self):
+        for start, end in [(0, 10), (5, 30), (0, len(self.script)), (30, 10),
+                           (40, len(self.script) + 20)]:
+            self.assertEqual(str(self.script.view(start, end)), self.script[start:end])
+
+    def test_key_of_the_view_is_the_key_of_the_text(self):
+        start = self.script.find('<b>EXT.')
+
+        self.assertEqual(SceneCache.key(self.script.view(0, start), 'version'),
+                         SceneCache.key(self.script[0:start], 'version'))
+        self.assertEqual(SceneCache.key(self.script.view(start, len(self.script)), 'version'),
+                         SceneCache.key(SCRIPT[len('HEADER') + start:], 'version'))
+        self.assertNotEqual(SceneCache.key(self.script.view(0, start), 'version'),
+                            SceneCache.key(self.script.view(0, start), 'other version'))
+
+
+class SceneCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SceneCache(os.path.join(self.directory, 'scene_cache.sqlite'),
+                                max_entries=10)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def results(self, names):
+        return dict((SceneCache.key(name, 'version'), SceneResult([name], [(name, 'SAM', 1)]))
+                    for name in names)
+
+    def test_round_trip(self):
+        self.cache.max_entries = 2000
+
+        # More keys than SQLite variables in a single query
+        results = self.results(['FRODO%d' % i for i in range(1200)])
+        self.cache.set_many(results)
+
+        self.assertEqual(self.cache.get_many(results.keys() + ['missing']), results)
+        self.assertEqual(self.cache.get_many([]), {})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        results = self.results(['FRODO%d' % i for i in range(10)])
+        keys = sorted(results)
+
+        self.cache.set_many(results)
+
+        with self.cache._conn:
+            self.cache._conn.executemany('UPDATE scenes SET last_used = ? WHERE key = ?',
+                                         [(i, key) for i, key in enumerate(keys)])
+
+        # The two oldest entries are used again, so the next two are evicted
+        self.cache.get_many(keys[:2])
+        self.cache.set_many(self.results(['SAM']))
+
+        remaining = self.cache.get_many(keys)
+
+        self.assertEqual(sorted(remaining), keys[:2] + keys[4:])
+
+    def test_characters_version(self):
+        version = characters_version([MovieCharacter('FRODO'), MovieCharacter('SAM')])
+
+        self.assertEqual(characters_version([MovieCharacter('FRODO'), MovieCharacter('SAM')]),
+                         version)
+        self.assertNotEqual(characters_version([MovieCharacter('FRODO')]), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
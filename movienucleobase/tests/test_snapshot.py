@@ -0,0 +1,78 @@
+"""
+.. module:: test_snapshot
+    :synopsis: Tests of the snapshots of the movies already parsed and resolved
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import cPickle
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.snapshot
+from tests.test_datastructures import build_movie
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'snapshots', 'lotr.snapshot')
+
+        self.movie = build_movie()
+        self.movie.fingerprint = 'f' * 40
+        self.movie.script = 'lotr.html'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        imsdb.snapshot.save_snapshot(self.movie, self.path)
+
+        movie = imsdb.snapshot.load_snapshot(self.path)
+
+        self.assertEqual((movie.title, movie.fingerprint, movie.script),
+                         (self.movie.title, self.movie.fingerprint, self.movie.script))
+        self.assertEqual(movie.build_table_chars(), self.movie.build_table_chars())
+        self.assertEqual(movie.build_table_interactions(), self.movie.build_table_interactions())
+        self.assertEqual(movie.build_table_mentions(), self.movie.build_table_mentions())
+
+        # No temporary file is left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['lotr.snapshot'])
+
+    def test_fingerprint_is_read_from_the_header(self):
+        imsdb.snapshot.save_snapshot(self.movie, self.path)
+
+        self.assertEqual(imsdb.snapshot.snapshot_fingerprint(self.path), self.movie.fingerprint)
+
+    def test_other_version_is_refused(self):
+        os.makedirs(os.path.dirname(self.path))
+
+        with open(self.path, 'wb') as snapshot_file:
+            cPickle.dump({'format': imsdb.snapshot.SNAPSHOT_FORMAT,
+                          'version': imsdb.snapshot.SNAPSHOT_VERSION - 1,
+                          'fingerprint': None}, snapshot_file)
+            cPickle.dump(self.movie, snapshot_file)
+
+        self.assertRaises(ValueError, imsdb.snapshot.load_snapshot, self.path)
+        self.assertRaises(ValueError, imsdb.snapshot.snapshot_fingerprint, self.path)
+
+    def test_other_files_are_refused(self):
+        os.makedirs(os.path.dirname(self.path))
+
+        for content in ['<html>', cPickle.dumps({'format': 'other'}), '']:
+            with open(self.path, 'wb') as snapshot_file:
+                snapshot_file.write(content)
+
+            self.assertRaises(ValueError, imsdb.snapshot.load_snapshot, self.path)
+
+    def test_is_snapshot(self):
+        self.assertTrue(imsdb.snapshot.is_snapshot('lotr.SNAPSHOT'))
+        self.assertFalse(imsdb.snapshot.is_snapshot('lotr.html'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+.. module:: test_social_net
+    :synopsis: Tests of the metrics of the social network
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import unittest
+
+import networkx as nx
+
+import imsdb.gen_dataframe
+import imsdb.social_net
+from tests.test_datastructures import build_movie
+
+
+class ReturnMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        movie = build_movie(n_characters=20)
+
+        self.nodes = imsdb.gen_dataframe.build_df_chars(movie)
+        self.edges = imsdb.gen_dataframe.build_df_interactions(movie)
+
+        self.graph = nx.Graph()
+        self.graph.add_nodes_from(self.nodes['id'].tolist())
+
+        for _, edge in self.edges.iterrows():
+            self.graph.add_edge(edge['sourceid'], edge['targetid'], weight=edge['ninteractions'])
+
+    def test_metrics_of_the_nodes(self):
+        df_metrics = imsdb.social_net.return_metrics(self.nodes, self.edges)
+
+        self.assertEqual(list(df_metrics.columns),
+                         ['name', 'degree_centrality', 'betweenness_centrality',
+                          'community', 'gender', 'id', 'nsceneappearances'])
+        self.assertEqual(sorted(df_metrics['id'].tolist()), sorted(self.nodes['id'].tolist()))
+
+        degree_centrality = nx.degree_centrality(self.graph)
+        betweenness_centrality = nx.betweenness_centrality(self.graph)
+        names = dict(zip(self.nodes['id'].tolist(), self.nodes['name'].tolist()))
+
+        for _, row in df_metrics.iterrows():
+            self.assertEqual(row['name'], names[row['id']])
+            self.assertAlmostEqual(row['degree_centrality'], degree_centrality[row['id']])
+            self.assertAlmostEqual(row['betweenness_centrality'],
+                                   betweenness_centrality[row['id']])
+
+        # The communities are a partition of the nodes
+        self.assertFalse(df_metrics['community'].isnull().any())
+
+    def test_sorted_by_degree_centrality(self):
+        df_metrics = imsdb.social_net.return_metrics(self.nodes, self.edges)
+
+        degrees = df_metrics['degree_centrality'].tolist()
+
+        self.assertEqual(degrees, sorted(degrees, reverse=True))
+
+    def test_sampled_betweenness_is_reproducible(self):
+        first = imsdb.social_net.return_metrics(self.nodes, self.edges, betweenness_k=4, seed=1)
+        second = imsdb.social_net.return_metrics(self.nodes, self.edges, betweenness_k=4, seed=1)
+
+        self.assertEqual(first['betweenness_centrality'].tolist(),
+                         second['betweenness_centrality'].tolist())
+
+    def test_k_above_the_nodes_is_exact(self):
+        df_metrics = imsdb.social_net.return_metrics(self.nodes, self.edges,
+                                                     betweenness_k=len(self.nodes), seed=1)
+        betweenness_centrality = nx.betweenness_centrality(self.graph)
+
+        for node_id, value in zip(df_metrics['id'].tolist(),
+                                  df_metrics['betweenness_centrality'].tolist()):
+            self.assertAlmostEqual(value, betweenness_centrality[node_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+.. module:: test_tokenizer
+    :synopsis: Tests of the single pass over the movie script
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import unittest
+
+import imsdb.tokenizer
+from imsdb.tokenizer import DIALOGUE, SCENE_HEADING, SPEAKER
+from tests.scripts import INDENT, SCRIPT
+
+
+class ScannedScript(str):
+    """Movie script that records the furthest offset read by find()."""
+
+    def find(self, sub, start=0, end=None):
+        index = str.find(self, sub, start, len(self) if end is None else end)
+
+        self.furthest = max(getattr(self, 'furthest', 0),
+                            len(self) if index == -1 else index + len(sub))
+
+        return index
+
+
+def summary(events):
+    return [(event.kind, event.text) for event in events]
+
+
+def text(script, event):
+    start, end = imsdb.tokenizer.text_span(event)
+
+    return script[start:end]
+
+
+class TokenizeTest(unittest.TestCase):
+
+    def test_events(self):
+        events = list(imsdb.tokenizer.tokenize(SCRIPT))
+
+        self.assertEqual(summary(events),
+                         [(SCENE_HEADING, 'BLACK SCREEN'),
+                          (SPEAKER, INDENT + 'FRODO'), (DIALOGUE, None),
+                          (SCENE_HEADING, 'INT.'),
+                          (SPEAKER, INDENT + 'SAM'), (DIALOGUE, None),
+                          (SPEAKER, INDENT + 'FRODO (V.O.)'), (DIALOGUE, None),
+                          (SPEAKER, INDENT + 'SAMWISE'), (DIALOGUE, None),
+                          (SCENE_HEADING, 'EXT.'),
+                          (SPEAKER, INDENT + 'GANDALF'), (DIALOGUE, None),
+                          (SPEAKER, INDENT + 'PIPPIN'), (DIALOGUE, None),
+                          (SCENE_HEADING, 'INT.')])
+
+    def test_offsets(self):
+        events = list(imsdb.tokenizer.tokenize(SCRIPT))
+
+        self.assertEqual(SCRIPT[events[0].start:events[0].end], '<pre>BLACK SCREEN')
+        self.assertEqual(SCRIPT[events[3].start:events[3].end], '<b>INT.')
+
+        self.assertEqual(text(SCRIPT, events[6]), INDENT + 'FRODO (V.O.)')
+        self.assertEqual(text(SCRIPT, events[7]), '\nSam, Gandalf\nis here.\n')
+
+        # The speakers and their lines are contiguous
+        for speaker, dialogue in zip(events, events[1:]):
+            if speaker.kind == SPEAKER:
+                self.assertEqual(dialogue.start, speaker.end)
+
+        # The line of GANDALF is ended by the "SUPER" tag
+        self.assertEqual(text(SCRIPT, events[12]), '\nFool of a Took! Frodo, Sam!\n')
+
+    def test_script_without_black_screen(self):
+        script = SCRIPT[len('<pre>BLACK SCREEN\n'):]
+
+        events = list(imsdb.tokenizer.tokenize(script))
+
+        self.assertEqual(summary(events)[:3],
+                         [(SPEAKER, INDENT + 'FRODO'), (DIALOGUE, None),
+                          (SCENE_HEADING, 'INT.')])
+
+    def test_script_without_headings(self):
+        script = '<pre>BLACK SCREEN\n<b>' + INDENT + 'FRODO</b>\nHello.\n<b>THE END</b>'
+
+        self.assertEqual(summary(imsdb.tokenizer.tokenize(script)),
+                         [(SCENE_HEADING, 'BLACK SCREEN'),
+                          (SPEAKER, INDENT + 'FRODO'), (DIALOGUE, None)])
+
+    def test_max_scenes_stops_the_walk(self):
+        full = list(imsdb.tokenizer.tokenize(SCRIPT))
+
+        for max_scenes, n_events in [(1, 4), (2, 11), (3, 16), (10, 16)]:
+            script = ScannedScript(SCRIPT)
+            events = list(imsdb.tokenizer.tokenize(script, max_scenes))
+
+            self.assertEqual(events, full[:n_events])
+
+            # The walk stops once it finds the next bold tag
+            if n_events < len(full):
+                self.assertLessEqual(script.furthest, full[n_events].start + len('<b>'))
+
+    def test_events_are_yielded_while_walking(self):
+        script = ScannedScript(SCRIPT)
+        events = imsdb.tokenizer.tokenize(script)
+
+        # The events are only yielded from the first heading on
+        for _ in range(4):
+            next(events)
+
+        self.assertLess(script.furthest, SCRIPT.index('<b>EXT.'))
+
+
+if __name__ == '__main__':
+    unittest.main()
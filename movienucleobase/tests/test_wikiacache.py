@@ -0,0 +1,168 @@
+"""
+.. module:: test_wikiacache
+    :synopsis: Tests of the cache of the real names resolved through the wikia
+
+.. moduleauthor:: Pedro Araujo <pedroaraujo@colorlesscube.com>
+.. moduleauthor:: Pedro Nogueira <pedro.fig.nogueira@gmail.com>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import imsdb.dataadjustment
+import imsdb.wikiacache
+from imsdb.wikiacache import DAY, RealNameCache
+
+
+class StubWikia(object):
+    """Client of the wikia API that answers from a dict and records the
+    queries."""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def search(self, sub_wikia, query):
+        self.queries.append((sub_wikia, query))
+
+        result = self.results[query]
+
+        if isinstance(result, Exception):
+            raise result
+
+        return [result]
+
+
+class StubClock(object):
+    """Replaces the time module of the cache, the time only moves on when
+    told to."""
+
+    def __init__(self):
+        self.now = 1000000000.0
+
+    def time(self):
+        return self.now
+
+
+class RealNameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'wikia_cache.sqlite')
+
+        self.clock = StubClock()
+        self.saved_time = imsdb.wikiacache.time
+        imsdb.wikiacache.time = self.clock
+
+        self.wikia = StubWikia({'SAM': 'Samwise Gamgee',
+                                'FRODO': 'Frodo Baggins (disambiguation)',
+                                'ORC OVERSEER': 'List of unnamed original characters',
+                                'GAFFER': ValueError('no result')})
+
+    def tearDown(self):
+        imsdb.wikiacache.time = self.saved_time
+        shutil.rmtree(self.directory)
+
+    def retrieve(self, cache, name):
+        return imsdb.dataadjustment.retrieve_character_real_name('lotr', name, cache, self.wikia)
+
+    def test_hit_does_not_query_the_wikia(self):
+        cache = RealNameCache(self.path)
+
+        self.assertEqual(self.retrieve(cache, 'FRODO'), 'Frodo Baggins')
+        self.assertEqual(self.retrieve(cache, 'FRODO'), 'Frodo Baggins')
+        self.assertEqual(self.wikia.queries, [('lotr', 'FRODO')])
+
+        cache.close()
+
+    def test_cache_is_kept_across_runs(self):
+        cache = RealNameCache(self.path)
+        self.retrieve(cache, 'SAM')
+        cache.close()
+
+        cache = RealNameCache(self.path)
+        self.assertEqual(self.retrieve(cache, 'SAM'), 'Samwise Gamgee')
+        self.assertEqual(len(self.wikia.queries), 1)
+        cache.close()
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = RealNameCache(self.path, ttl=10 * DAY)
+
+        self.retrieve(cache, 'SAM')
+
+        self.clock.now += 10 * DAY
+        self.retrieve(cache, 'SAM')
+        self.assertEqual(len(self.wikia.queries), 1)
+
+        self.clock.now += 1
+        self.assertEqual(self.retrieve(cache, 'SAM'), 'Samwise Gamgee')
+        self.assertEqual(len(self.wikia.queries), 2)
+
+        cache.close()
+
+    def test_negative_entries_expire_after_the_negative_ttl(self):
+        cache = RealNameCache(self.path, ttl=10 * DAY, negative_ttl=DAY)
+
+        rejected = self.retrieve(cache, 'ORC OVERSEER')
+        problematic = self.retrieve(cache, 'GAFFER')
+        self.retrieve(cache, 'SAM')
+
+        self.assertEqual(problematic, 'problematic character')
+        self.assertEqual(cache.get('lotr', 'ORC OVERSEER'), (True, rejected))
+        self.assertEqual(cache.get('lotr', 'GAFFER'), (True, problematic))
+
+        self.clock.now += DAY + 1
+
+        self.assertEqual(cache.get('lotr', 'ORC OVERSEER'), (False, None))
+        self.assertEqual(cache.get('lotr', 'GAFFER'), (False, None))
+        self.assertEqual(cache.get('lotr', 'SAM'), (True, 'Samwise Gamgee'))
+
+        self.retrieve(cache, 'ORC OVERSEER')
+        self.retrieve(cache, 'GAFFER')
+        self.assertEqual([query for _, query in self.wikia.queries],
+                         ['ORC OVERSEER', 'GAFFER', 'SAM', 'ORC OVERSEER', 'GAFFER'])
+
+        cache.close()
+
+    def test_negative_ttl_is_capped_at_the_ttl(self):
+        cache = RealNameCache(self.path, ttl=DAY / 4, negative_ttl=DAY)
+
+        self.assertEqual(cache.negative_ttl, DAY / 4)
+
+        self.retrieve(cache, 'ORC OVERSEER')
+        self.clock.now += DAY / 4 + 1
+        self.assertEqual(cache.get('lotr', 'ORC OVERSEER'), (False, None))
+
+        cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = RealNameCache(self.path, max_entries=20)
+
+        for i in range(20):
+            cache.set('lotr', 'ORC %d' % i, 'Orc %d' % i)
+            self.clock.now += 1
+
+        # Using the oldest entry makes it the most recently used one
+        self.assertEqual(cache.get('lotr', 'ORC 0'), (True, 'Orc 0'))
+        self.clock.now += 1
+
+        self.retrieve(cache, 'SAM')
+
+        # The bound is exceeded by one, so one entry plus a tenth of the
+        # bound are evicted
+        self.assertEqual(cache.get('lotr', 'ORC 0'), (True, 'Orc 0'))
+        self.assertEqual(cache.get('lotr', 'SAM'), (True, 'Samwise Gamgee'))
+
+        for i in range(1, 4):
+            self.assertEqual(cache.get('lotr', 'ORC %d' % i), (False, None))
+
+        for i in range(4, 20):
+            self.assertEqual(cache.get('lotr', 'ORC %d' % i), (True, 'Orc %d' % i))
+
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()